@@ -0,0 +1,240 @@
+"""
+Vectorized policy evaluation for batches of scenarios.
+
+Beliefs for N scenarios are held as an (N, H) array so evidence application,
+stop checks and top-hypothesis selection run as a handful of array operations
+per step instead of one Python loop per ASIN.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .policy import PolicyEngine
+from .types import Evidence, Hypothesis, ScenarioInput
+
+# Stop reason codes returned by BatchPolicyEngine.should_stop
+STOP_NONE = 0
+STOP_VERY_HIGH_CONFIDENCE = 1
+STOP_HIGH_CONFIDENCE_TOOLS_DONE = 2
+STOP_MAX_ITERATIONS = 3
+STOP_MAIN_TOOLS_LOW_CONFIDENCE = 4
+
+STOP_REASONS = (
+    '',
+    'very_high_confidence',
+    'high_confidence_tools_completed',
+    'max_iterations',
+    'main_tools_low_confidence',
+)
+
+
+class BatchPolicyEngine:
+    """Applies PolicyEngine semantics to many scenarios at once."""
+
+    def __init__(self, policy: PolicyEngine = None):
+        self.policy = policy or PolicyEngine()
+
+        plan = self.policy.plan
+        preferences = plan.hypothesis_tools
+        self.hypothesis_names: List[str] = list(preferences.keys())
+        self.hypothesis_index = {name: i for i, name in enumerate(self.hypothesis_names)}
+
+        tool_names: List[str] = []
+        for tools in preferences.values():
+            for tool in tools:
+                if tool not in tool_names:
+                    tool_names.append(tool)
+        for tool in sorted(plan.main_tools):
+            if tool not in tool_names:
+                tool_names.append(tool)
+        self.tool_names = tool_names
+        self.tool_index = {name: i for i, name in enumerate(tool_names)}
+
+        n_hyp, n_tools = len(self.hypothesis_names), len(self.tool_names)
+
+        # (H, T) mask of preferred tools per hypothesis
+        self.preference_mask = np.zeros((n_hyp, n_tools), dtype=bool)
+        # Flattened (hypothesis, tool, preference rank) pairs for tool selection
+        pair_hyp, pair_tool, pair_rank = [], [], []
+        for h, name in enumerate(self.hypothesis_names):
+            for rank, tool in enumerate(preferences[name]):
+                t = self.tool_index[tool]
+                self.preference_mask[h, t] = True
+                pair_hyp.append(h)
+                pair_tool.append(t)
+                pair_rank.append(rank)
+        self._pair_hyp = np.asarray(pair_hyp, dtype=np.intp)
+        self._pair_tool = np.asarray(pair_tool, dtype=np.intp)
+        self._pair_rank = np.asarray(pair_rank, dtype=np.int64)
+        self._max_rank = max((len(tools) for tools in preferences.values()), default=0) + 1
+
+        self.main_tool_mask = np.zeros(n_tools, dtype=bool)
+        self.main_tool_mask[[self.tool_index[t] for t in plan.main_tools]] = True
+
+        self._strengths = dict(self.policy.evidence_strength_map)
+        self._templates: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def initialize_hypotheses(self, scenarios: Sequence[ScenarioInput]) -> np.ndarray:
+        """Return the (N, H) initial belief matrix for a batch of scenarios.
+
+        Initial beliefs only depend on the goal (and registry ASIN overrides), so
+        the scalar engine is consulted once per distinct template and rows are gathered.
+        """
+        asin_priors = self.policy.registry.asin_priors
+        keys = [(s.goal, s.asin if s.asin in asin_priors else '') for s in scenarios]
+
+        for key in set(keys):
+            if key not in self._templates:
+                goal, asin = key
+                probe = ScenarioInput(asin=asin, goal=goal, lookback_days=0)
+                hypotheses = self.policy.initialize_hypotheses(probe)
+                self._templates[key] = np.array(
+                    [hypotheses[name].belief for name in self.hypothesis_names], dtype=np.float64
+                )
+
+        if not keys:
+            return np.zeros((0, len(self.hypothesis_names)), dtype=np.float64)
+        return np.stack([self._templates[key] for key in keys])
+
+    def new_used_tools(self, n_scenarios: int) -> np.ndarray:
+        """Return an empty (N, T) used-tools mask."""
+        return np.zeros((n_scenarios, len(self.tool_names)), dtype=bool)
+
+    def mark_used(self, used_tools: np.ndarray, tool_names: Sequence[Optional[str]]) -> None:
+        """Mark one executed tool per scenario (None leaves the row untouched)."""
+        rows = [i for i, tool in enumerate(tool_names) if tool is not None]
+        if rows:
+            cols = [self.tool_index[tool_names[i]] for i in rows]
+            used_tools[rows, cols] = True
+
+    def update_beliefs(self, beliefs: np.ndarray, evidence_lists: Sequence[List[Evidence]]) -> np.ndarray:
+        """Apply each scenario's evidence list and return the updated belief matrix.
+
+        Evidence is applied in rounds (the k-th item of every list at once) so the
+        per-item clamp to [0, 1] matches PolicyEngine.update_beliefs exactly.
+        """
+        updated = beliefs.copy()
+        rounds = max((len(ev) for ev in evidence_lists), default=0)
+
+        for k in range(rounds):
+            rows, cols, deltas = [], [], []
+            for i, evidence_list in enumerate(evidence_lists):
+                if k >= len(evidence_list):
+                    continue
+                evidence = evidence_list[k]
+                h = self.hypothesis_index.get(evidence.hypothesis_name)
+                if h is None:
+                    continue
+                rows.append(i)
+                cols.append(h)
+                deltas.append(self._strengths.get(evidence.strength, 0))
+
+            if rows:
+                rows_arr = np.asarray(rows, dtype=np.intp)
+                cols_arr = np.asarray(cols, dtype=np.intp)
+                updated[rows_arr, cols_arr] = np.clip(
+                    updated[rows_arr, cols_arr] + np.asarray(deltas), 0.0, 1.0
+                )
+
+        return updated
+
+    def top_hypotheses(self, beliefs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (index, belief) of the top hypothesis per scenario.
+
+        Ties resolve to the first hypothesis in catalogue order, as in the scalar engine.
+        """
+        top_idx = np.argmax(beliefs, axis=1)
+        return top_idx, beliefs[np.arange(beliefs.shape[0]), top_idx]
+
+    def _top_tools_completed(self, top_idx: np.ndarray, used_tools: np.ndarray) -> np.ndarray:
+        """Whether every preferred tool of each scenario's top hypothesis has run."""
+        return ~(self.preference_mask[top_idx] & ~used_tools).any(axis=1)
+
+    def should_stop(self, beliefs: np.ndarray, steps: np.ndarray, used_tools: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized PolicyEngine.should_stop.
+
+        Returns:
+            Tuple of (stop mask, reason codes indexing STOP_REASONS)
+        """
+        steps = np.broadcast_to(np.asarray(steps), (beliefs.shape[0],))
+        top_idx, top_belief = self.top_hypotheses(beliefs)
+        min_steps = steps >= 3
+
+        very_high = min_steps & (top_belief >= 0.8)
+        high_done = min_steps & (top_belief >= 0.7) & self._top_tools_completed(top_idx, used_tools)
+        max_iter = steps >= 5
+        main_low = min_steps & used_tools[:, self.main_tool_mask].all(axis=1) & (top_belief < 0.4)
+
+        reasons = np.select(
+            [very_high, high_done, max_iter, main_low],
+            [STOP_VERY_HIGH_CONFIDENCE, STOP_HIGH_CONFIDENCE_TOOLS_DONE,
+             STOP_MAX_ITERATIONS, STOP_MAIN_TOOLS_LOW_CONFIDENCE],
+            default=STOP_NONE
+        )
+        return reasons != STOP_NONE, reasons
+
+    def select_next_tool(self, beliefs: np.ndarray, steps: np.ndarray, used_tools: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized PolicyEngine.select_next_tool.
+
+        Walks hypotheses in descending belief order and picks the first unused
+        preferred tool, expressed as an argmin over (hypothesis rank, tool rank).
+
+        Returns:
+            Tuple of (tool index, hypothesis index); -1 where no tool is selected
+        """
+        n = beliefs.shape[0]
+        steps = np.broadcast_to(np.asarray(steps), (n,))
+        no_tool = np.full(n, -1, dtype=np.intp)
+        if n == 0 or self._pair_hyp.size == 0:
+            return no_tool, no_tool.copy()
+
+        # Stable descending order keeps catalogue order among equal beliefs
+        order = np.argsort(-beliefs, axis=1, kind='stable')
+        hyp_rank = np.empty_like(order)
+        np.put_along_axis(hyp_rank, order, np.arange(beliefs.shape[1])[None, :], axis=1)
+
+        score = hyp_rank[:, self._pair_hyp] * self._max_rank + self._pair_rank[None, :]
+        unavailable = np.iinfo(score.dtype).max
+        score = np.where(used_tools[:, self._pair_tool], unavailable, score)
+        best = np.argmin(score, axis=1)
+        has_tool = score[np.arange(n), best] != unavailable
+
+        top_idx, top_belief = self.top_hypotheses(beliefs)
+        min_steps = steps >= 3
+        confident = min_steps & (
+            (top_belief >= 0.8)
+            | ((top_belief >= 0.7) & self._top_tools_completed(top_idx, used_tools))
+        )
+        selected = has_tool & ~confident
+
+        tool_idx = np.where(selected, self._pair_tool[best], -1)
+        hyp_idx = np.where(selected, self._pair_hyp[best], -1)
+        return tool_idx, hyp_idx
+
+    def decide_action(self, beliefs: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized strategy selection, returned column-wise."""
+        top_idx, confidence = self.top_hypotheses(beliefs)
+
+        strategy = np.where(
+            confidence >= 0.7, 'focused_optimization',
+            np.where(confidence >= 0.5, 'targeted_improvement', 'data_gathering')
+        )
+        risk_level = np.where(
+            confidence >= 0.7, 'low',
+            np.where(confidence >= 0.5, 'medium', 'high')
+        )
+
+        return {
+            'primary_hypothesis': np.asarray(self.hypothesis_names, dtype=object)[top_idx],
+            'confidence': confidence,
+            'strategy': strategy,
+            'risk_level': risk_level
+        }
+
+    def to_hypotheses(self, beliefs: np.ndarray, row: int) -> Dict[str, Hypothesis]:
+        """Materialize one scenario's beliefs as scalar-engine hypotheses."""
+        return {
+            name: Hypothesis(name=name, belief=float(beliefs[row, h]), rationale='')
+            for h, name in enumerate(self.hypothesis_names)
+        }
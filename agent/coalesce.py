@@ -0,0 +1,162 @@
+"""
+Request coalescing and short-lived result caching for agent runs.
+
+Several teams often ask for the same analysis, so a batch or the service
+sees the same ``(asin, goal, lookback_days)`` many times. ``RunCoalescer``
+makes identical requests share work:
+
+- a request whose twin is already running waits for that run instead of
+  starting its own (single flight);
+- a request whose twin finished within ``ttl_s`` gets that result straight
+  from the cache.
+
+Two requests are identical when the ASIN, goal, lookback window, resolved data
+directory and flags all match. ``notes`` is ignored because no tool reads it.
+``run()`` blocks a duplicate's thread until its twin finishes, which suits
+batch workers. A server that should not park a worker on a duplicate uses
+``begin()`` and ``finish()`` instead: duplicates register a callback on the
+in-flight run and are completed by whichever thread finishes it.
+
+Errors are shared with the waiters of the failed run but never cached. Shared
+results are the same dict for every requester and must be treated as
+read-only. Within the TTL a cached result does not see changes to the data
+files; pass ``ttl_s=0`` to coalesce in-flight runs only.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+
+from . import metrics
+from .types import ScenarioInput
+
+DEFAULT_TTL_S = 300.0
+DEFAULT_MAX_ENTRIES = 10000
+
+# How a request was served
+EXECUTED = 'executed'
+COALESCED = 'coalesced'
+CACHED = 'cached'
+
+
+def run_key(scenario: ScenarioInput, data_dir: str, flags: Dict[str, Any] = None) -> Tuple:
+    """Identity of a run for deduplication."""
+    return (scenario.asin, scenario.goal, scenario.lookback_days, str(Path(data_dir).resolve()),
+            orjson.dumps(flags or {}, option=orjson.OPT_SORT_KEYS))
+
+
+# Called with (result, error) when the run a duplicate attached to finishes
+Waiter = Callable[[Any, Optional[BaseException]], None]
+
+
+class _Flight:
+    __slots__ = ('waiters',)
+
+    def __init__(self):
+        self.waiters: List[Waiter] = []
+
+
+class RunCoalescer:
+    """Single-flight execution plus a TTL/LRU cache of recent results, with hit-rate stats."""
+
+    def __init__(self, ttl_s: float = DEFAULT_TTL_S, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._cache: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._stats = {'requests': 0, EXECUTED: 0, COALESCED: 0, CACHED: 0, 'errors': 0}
+
+    def begin(self, key: Hashable, waiter: Optional[Waiter] = None) -> Tuple[Any, str]:
+        """Claim ``key`` without blocking; returns (result, source).
+
+        - ``CACHED``: a fresh cached result.
+        - ``COALESCED``: the key is in flight; ``waiter`` (if given) is called when it finishes.
+        - ``EXECUTED``: the caller is the leader, must run it and then call ``finish()``; result is None.
+        """
+        with self._lock:
+            self._stats['requests'] += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[0] > self._clock():
+                    self._cache.move_to_end(key)
+                    self._stats[CACHED] += 1
+                    metrics.run_dedup.inc(CACHED)
+                    return cached[1], CACHED
+                del self._cache[key]
+
+            flight = self._in_flight.get(key)
+            if flight is None:
+                self._in_flight[key] = _Flight()
+                self._stats[EXECUTED] += 1
+                source = EXECUTED
+            else:
+                if waiter is not None:
+                    flight.waiters.append(waiter)
+                self._stats[COALESCED] += 1
+                source = COALESCED
+
+        metrics.run_dedup.inc(source)
+        return None, source
+
+    def finish(self, key: Hashable, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Complete the leader's run of ``key``: cache a success and hand the outcome to every duplicate."""
+        with self._lock:
+            flight = self._in_flight.pop(key)
+            if error is not None:
+                self._stats['errors'] += 1
+            elif self.ttl_s > 0:
+                self._cache[key] = (self._clock() + self.ttl_s, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            waiters = flight.waiters
+        for waiter in waiters:
+            waiter(result, error)
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, str]:
+        """``fn()``'s result for ``key`` and how it was served: executed, coalesced or cached.
+
+        A duplicate of an in-flight run blocks until that run finishes.
+        """
+        done = threading.Event()
+        outcome = []
+
+        def waiter(result: Any, error: Optional[BaseException]) -> None:
+            outcome.append((result, error))
+            done.set()
+
+        result, source = self.begin(key, waiter)
+        if source == CACHED:
+            return result, CACHED
+        if source == COALESCED:
+            done.wait()
+            result, error = outcome[0]
+            if error is not None:
+                raise error
+            return result, COALESCED
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result, EXECUTED
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, in_flight=len(self._in_flight), cached_entries=len(self._cache))
+        requests = stats['requests']
+        stats['hit_rate'] = round((stats[COALESCED] + stats[CACHED]) / requests, 4) if requests else 0.0
+        return stats
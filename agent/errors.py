@@ -1,5 +1,9 @@
 """Custom exceptions and fallback recommendations for the agent."""
 
+from . import metrics
+from .registry import Registry, get_registry
+
+
 class ToolTimeoutError(Exception):
     """Raised when a tool operation times out."""
     pass
@@ -15,54 +19,40 @@ class ConflictError(Exception):
     pass
 
 
-def recommend_fallback(tool_name: str, used_tools: set = None, available_tools: set = None) -> str:
+class CircuitOpenError(Exception):
+    """Raised when a tool's circuit breaker is open and calls fail fast."""
+    pass
+
+
+def recommend_fallback(tool_name: str, used_tools: set = None, available_tools: set = None,
+                       registry: Registry = None) -> str:
     """Provide context-aware fallback recommendations when a tool fails."""
+    metrics.fallbacks.inc(tool_name)
+    if registry is None:
+        registry = get_registry()
     if used_tools is None:
         used_tools = set()
     if available_tools is None:
-        available_tools = {'ads_metrics', 'competitor', 'listing_audit', 'inventory'}
+        available_tools = set(registry.tools)
     
     # Find unused tools
     unused_tools = available_tools - used_tools - {tool_name}
     
-    # Tool-specific fallback strategies
-    fallback_strategies = {
-        'ads_metrics': {
-            'purpose': 'performance analysis',
-            'alternatives': ['listing_audit', 'competitor', 'inventory'],
-            'explanation': 'Focus on listing quality or competitive factors'
-        },
-        'competitor': {
-            'purpose': 'competitive analysis', 
-            'alternatives': ['listing_audit', 'inventory'],
-            'explanation': 'Assess internal factors like listing quality and stock levels'
-        },
-        'listing_audit': {
-            'purpose': 'quality assessment',
-            'alternatives': ['ads_metrics', 'competitor'],
-            'explanation': 'Focus on performance metrics or competitive positioning'
-        },
-        'inventory': {
-            'purpose': 'availability check',
-            'alternatives': ['ads_metrics', 'competitor', 'listing_audit'],
-            'explanation': 'Continue with performance and competitive analysis'
-        }
-    }
-    
-    strategy = fallback_strategies.get(tool_name)
+    # Tool-specific fallback strategies come from the registry
+    strategy = registry.tools.get(tool_name)
     if not strategy:
         return "Try alternative analysis approaches"
     
     # Find available alternatives from the strategy
-    relevant_alternatives = [tool for tool in strategy['alternatives'] if tool in unused_tools]
+    relevant_alternatives = [tool for tool in strategy.fallback_alternatives if tool in unused_tools]
     
     if relevant_alternatives:
         tool_list = ", ".join(relevant_alternatives)
-        return f"Try {tool_list} to {strategy['explanation'].lower()}"
+        return f"Try {tool_list} to {strategy.fallback_explanation.lower()}"
     elif unused_tools:
         # If no relevant alternatives, suggest any unused tool
         remaining = ", ".join(unused_tools)
         return f"Continue with remaining tools: {remaining}"
     else:
         # All tools used or failed
-        return f"All tools explored. Proceed with analysis based on available data for {strategy['purpose']}"
\ No newline at end of file
+        return f"All tools explored. Proceed with analysis based on available data for {strategy.fallback_purpose}"
\ No newline at end of file
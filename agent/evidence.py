@@ -0,0 +1,156 @@
+"""
+Evidence extraction rules that turn tool results into belief updates.
+
+Each tool registers one extractor in the registry catalogue; extractors only
+see successful results and return Evidence for hypotheses by name.
+"""
+
+from typing import List
+
+from .types import Evidence, ToolResult
+
+
+def ads_metrics_evidence(tool_result: ToolResult) -> List[Evidence]:
+    """Evidence from keyword-level ads metrics."""
+    evidence_list = []
+    tool_name = tool_result.name
+    data = tool_result.data
+    
+    # Evidence for ads metrics analysis
+    if 'aggregated_metrics' in data:
+        metrics = data['aggregated_metrics']
+        total_impressions = metrics.get('total_impressions', 0)
+        avg_ctr = metrics.get('avg_ctr', 0)
+        overall_acos = metrics.get('overall_acos')
+
+        # Low impressions evidence
+        if total_impressions < 3000:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='strong',
+                hypothesis_name='h1_low_bids',
+                description=f'Low total impressions ({total_impressions:,}) suggests bid issues',
+                data_point=total_impressions
+            ))
+
+        if total_impressions < 5000:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='medium',
+                hypothesis_name='h2_keyword_coverage',
+                description=f'Limited impressions may indicate poor keyword coverage',
+                data_point=total_impressions
+            ))
+
+        # CTR evidence
+        if avg_ctr < 0.015:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='medium',
+                hypothesis_name='h4_listing_quality',
+                description=f'Low CTR ({avg_ctr:.3f}) suggests listing quality issues',
+                data_point=avg_ctr
+            ))
+
+        # ACOS evidence
+        if overall_acos and overall_acos > 1.0:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='strong',
+                hypothesis_name='h5_broad_match_waste',
+                description=f'High ACOS ({overall_acos:.2f}) indicates inefficient spending',
+                data_point=overall_acos
+            ))
+
+    # Performance issues evidence
+    if 'performance_issues' in data:
+        issues = data['performance_issues']
+        no_conv_keywords = issues.get('no_conversion_keywords', 0)
+        total_keywords = issues.get('total_keywords', 1)
+
+        if no_conv_keywords / total_keywords > 0.6:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='strong',
+                hypothesis_name='h5_broad_match_waste',
+                description=f'High ratio of non-converting keywords ({no_conv_keywords}/{total_keywords})',
+                data_point=no_conv_keywords / total_keywords
+            ))
+    
+    return evidence_list
+
+
+def competitor_evidence(tool_result: ToolResult) -> List[Evidence]:
+    """Evidence from competitive landscape analysis."""
+    evidence_list = []
+    tool_name = tool_result.name
+    data = tool_result.data
+    
+    if 'competitive_analysis' in data:
+        analysis = data['competitive_analysis']
+        pressure = analysis.get('competitive_pressure', 'unknown')
+
+        if pressure in ['high', 'medium']:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='strong' if pressure == 'high' else 'medium',
+                hypothesis_name='h3_competitor_pressure',
+                description=f'Competitive pressure is {pressure}',
+                data_point=pressure
+            ))
+    
+    return evidence_list
+
+
+def listing_audit_evidence(tool_result: ToolResult) -> List[Evidence]:
+    """Evidence from listing quality audit."""
+    evidence_list = []
+    tool_name = tool_result.name
+    data = tool_result.data
+    
+    if 'listing_analysis' in data:
+        analysis = data['listing_analysis']
+        quality_score = analysis.get('overall_quality_score', 0)
+        issues_count = len(analysis.get('quality_issues', []))
+
+        if quality_score < 50:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='strong',
+                hypothesis_name='h4_listing_quality',
+                description=f'Low quality score ({quality_score}/100) with {issues_count} issues',
+                data_point=quality_score
+            ))
+        elif quality_score < 70:
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='medium',
+                hypothesis_name='h4_listing_quality',
+                description=f'Moderate quality score ({quality_score}/100)',
+                data_point=quality_score
+            ))
+    
+    return evidence_list
+
+
+def inventory_evidence(tool_result: ToolResult) -> List[Evidence]:
+    """Evidence from inventory status."""
+    evidence_list = []
+    tool_name = tool_result.name
+    data = tool_result.data
+    
+    if 'inventory_analysis' in data:
+        analysis = data['inventory_analysis']
+        days_remaining = analysis.get('days_remaining', 0)
+
+        if days_remaining < 14:
+            # Low inventory might affect ad performance
+            evidence_list.append(Evidence(
+                tool_name=tool_name,
+                strength='weak',
+                hypothesis_name='h1_low_bids',
+                description=f'Low inventory ({days_remaining} days) may justify reduced bids',
+                data_point=days_remaining
+            ))
+    
+    return evidence_list
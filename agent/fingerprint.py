@@ -0,0 +1,76 @@
+"""
+Input fingerprints for incremental re-analysis.
+
+A tool's fingerprint covers the data files it declares in the registry plus the
+tool context it runs with. A declared directory (e.g. the columnar keyword
+store) covers every file in it, so rewriting one column is detected too. Two runs with equal fingerprints would produce the
+same ToolResult, so the later run can reuse the earlier result.
+"""
+
+import hashlib
+import os
+import stat as stat_module
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+
+# Agent flags that control caching itself and never change tool output
+CACHE_FLAGS = ('incremental', 'fingerprint')
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_entry(path: Path, stat: os.stat_result, content: bool) -> Any:
+    return _file_digest(path) if content else [stat.st_size, stat.st_mtime_ns]
+
+
+def input_fingerprint(scenario_dir: str, inputs: Iterable[str], tool_ctx: Dict[str, Any],
+                      content: bool = False) -> Optional[str]:
+    """Fingerprint a tool invocation, or None when the tool declares no inputs.
+
+    Args:
+        scenario_dir: Data directory the tool reads from
+        inputs: Input files or directories relative to scenario_dir (missing ones are recorded as absent)
+        tool_ctx: Context passed to the tool
+        content: Hash file contents instead of using (size, mtime)
+    """
+    inputs = list(inputs)
+    if not inputs:
+        return None
+
+    files = {}
+    for name in inputs:
+        path = Path(scenario_dir) / name
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            files[name] = None
+            continue
+        if stat_module.S_ISDIR(stat.st_mode):
+            files[name] = {
+                entry.name: _file_entry(Path(entry.path), entry.stat(), content)
+                for entry in sorted(os.scandir(path), key=lambda entry: entry.name) if entry.is_file()
+            }
+        else:
+            files[name] = _file_entry(path, stat, content)
+
+    context = {key: value for key, value in tool_ctx.items() if key != 'flags'}
+    context['flags'] = {
+        key: value for key, value in tool_ctx.get('flags', {}).items() if key not in CACHE_FLAGS
+    }
+
+    payload = orjson.dumps(
+        {'scenario_dir': str(scenario_dir), 'files': files, 'context': context, 'content': content},
+        option=orjson.OPT_SORT_KEYS,
+        default=str
+    )
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
@@ -0,0 +1,158 @@
+"""
+Lightweight timing instrumentation for the agent loop.
+
+Durations are monotonic ``perf_counter_ns`` spans. A ``RunTimer`` records the
+OBSERVE/THINK/DECIDE/ACT/UPDATE phases and per-tool spans of one run; a
+``TimingStats`` aggregates runs into log-bucketed histograms for batch summaries.
+"""
+
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PHASES = ('observe', 'think', 'decide', 'act', 'update')
+
+# Histogram bucket upper bounds: powers of two from ~1µs to ~4.6min, in ns
+BUCKET_BOUNDS_NS = tuple(2 ** i for i in range(10, 39))
+
+
+def ns_to_ms(ns: float) -> float:
+    return round(ns / 1e6, 3)
+
+
+class Histogram:
+    """Fixed log2-bucketed histogram of nanosecond durations."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns: Optional[int] = None
+        self.buckets = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+
+    def observe(self, ns: int) -> None:
+        self.count += 1
+        self.sum_ns += ns
+        self.min_ns = ns if self.min_ns is None else min(self.min_ns, ns)
+        self.max_ns = ns if self.max_ns is None else max(self.max_ns, ns)
+        self.buckets[bisect_left(BUCKET_BOUNDS_NS, ns)] += 1
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Estimate of the q-quantile, interpolated linearly within its bucket.
+
+        The bucket's bounds are clamped to the observed range, so a bucket holding
+        every sample spans [min, max] rather than a whole power of two.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = max(self.min_ns, BUCKET_BOUNDS_NS[i - 1] if i > 0 else 0)
+                upper = min(self.max_ns, BUCKET_BOUNDS_NS[i] if i < len(BUCKET_BOUNDS_NS) else self.max_ns)
+                return round(lower + (upper - lower) * max(0.0, rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max_ns
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': ns_to_ms(self.sum_ns),
+            'mean_ms': ns_to_ms(self.sum_ns / self.count) if self.count else None,
+            'min_ms': ns_to_ms(self.min_ns) if self.count else None,
+            'p50_ms': ns_to_ms(self.percentile(0.5)) if self.count else None,
+            'p90_ms': ns_to_ms(self.percentile(0.9)) if self.count else None,
+            'p99_ms': ns_to_ms(self.percentile(0.99)) if self.count else None,
+            'max_ms': ns_to_ms(self.max_ns) if self.count else None
+        }
+
+
+class RunTimer:
+    """Phase and tool spans for a single agent run.
+
+    Phases are consecutive: ``enter(phase)`` closes the running phase and opens
+    the next one, so the loop body needs no re-nesting.
+    """
+
+    def __init__(self):
+        self.spans: List[Tuple[str, int]] = []
+        self._started_ns = perf_counter_ns()
+        self._phase: Optional[str] = None
+        self._phase_start_ns = 0
+
+    def enter(self, phase: str) -> None:
+        now = perf_counter_ns()
+        self._close(now)
+        self._phase = phase
+        self._phase_start_ns = now
+
+    def stop(self) -> None:
+        self._close(perf_counter_ns())
+        self._phase = None
+
+    def _close(self, now: int) -> None:
+        if self._phase is not None:
+            self.spans.append((f'phase.{self._phase}', now - self._phase_start_ns))
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((name, perf_counter_ns() - start))
+
+    def add(self, name: str, ns: int) -> None:
+        self.spans.append((name, ns))
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-span totals and counts in milliseconds, plus wall time of the run."""
+        totals: Dict[str, List[int]] = {}
+        for name, ns in self.spans:
+            entry = totals.setdefault(name, [0, 0])
+            entry[0] += ns
+            entry[1] += 1
+        return {
+            'wall_ms': ns_to_ms(perf_counter_ns() - self._started_ns),
+            'spans': {name: {'total_ms': ns_to_ms(ns), 'count': count} for name, (ns, count) in totals.items()}
+        }
+
+
+class TimingStats:
+    """Histograms of span durations aggregated across runs."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.runs = 0
+        self._lock = threading.Lock()
+
+    def add_run(self, timer: RunTimer) -> None:
+        with self._lock:
+            self.runs += 1
+            for name, ns in timer.spans:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.observe(ns)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: self.histograms[name].summary() for name in sorted(self.histograms, key=_span_order)}
+
+
+def _span_order(name: str) -> Tuple[int, str]:
+    """Phases in loop order first, then each tool followed by its internal spans."""
+    if name.startswith('phase.') and name[6:] in PHASES:
+        return 0, str(PHASES.index(name[6:]))
+    return (1 if name.startswith('tool.') else 2), name
+
+
+def tool_timings(timings_ns: Dict[str, int], total_ns: int) -> Dict[str, float]:
+    """Tool-internal breakdown in ms; analysis is whatever the named phases don't cover."""
+    timings = {f'{phase}_ms': ns_to_ms(ns) for phase, ns in timings_ns.items()}
+    timings['analysis_ms'] = ns_to_ms(max(0, total_ns - sum(timings_ns.values())))
+    timings['total_ms'] = ns_to_ms(total_ns)
+    return timings
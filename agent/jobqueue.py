@@ -0,0 +1,394 @@
+"""
+Durable SQLite work queue for scenario runs.
+
+A nightly catalog is enqueued once as one job per ``ScenarioInput``. Workers
+lease jobs, run them through ``AgentLoop.run`` and acknowledge each with its
+``trace_file``, so a batch that dies part-way resumes where it stopped
+instead of starting over.
+
+Processing is at-least-once. A lease hides a job for ``visibility_timeout_s``.
+A worker that crashes mid-run never acknowledges, so its job becomes visible
+again once the lease expires and another worker picks it up. A run that raises
+is retried after exponential backoff. Jobs that exhaust ``max_attempts`` are
+marked ``dead`` and left for inspection. Acknowledgements carry the lease
+token, so a worker whose lease expired cannot overwrite the outcome of the
+worker that re-leased the job.
+
+The database runs in WAL mode. Any number of worker threads or processes on
+one host can share it.
+
+Usage:
+    python -m agent.jobqueue enqueue nightly.db scenarios/*.json
+    python -m agent.jobqueue enqueue nightly.db --asins catalog.txt --goal reduce_acos --lookback-days 14 --data-dir /data/exports/2025-09-10
+    python -m agent.jobqueue work nightly.db --workers 4
+    python -m agent.jobqueue stats nightly.db
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from .coalesce import EXECUTED, RunCoalescer, run_key
+from .types import ScenarioInput
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_VISIBILITY_TIMEOUT_S = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_S = 5.0
+MAX_RETRY_BACKOFF_S = 300.0
+THROUGHPUT_WINDOW_S = 60.0
+
+STATUSES = ('pending', 'leased', 'done', 'dead')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    run_ms REAL,
+    trace_file TEXT,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+
+class Job(NamedTuple):
+    """A leased job; ``token`` proves the lease when acknowledging."""
+    id: int
+    scenario: ScenarioInput
+    data_dir: str
+    flags: Dict[str, Any]
+    attempts: int
+    token: str
+
+
+class JobQueue:
+    """SQLite-backed queue of scenario runs with leases, retries and acknowledgements."""
+
+    def __init__(self, path: str, visibility_timeout_s: float = DEFAULT_VISIBILITY_TIMEOUT_S,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, retry_backoff_s: float = DEFAULT_RETRY_BACKOFF_S,
+                 clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        self.visibility_timeout_s = visibility_timeout_s
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self._clock = clock
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode; transactions are explicit."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> sqlite3.Connection:
+        """Connection with a write transaction open; the caller commits or rolls back."""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def enqueue(self, scenario: ScenarioInput, data_dir: str, flags: Dict[str, Any] = None) -> int:
+        return self.enqueue_many([(scenario, data_dir, flags)])[0]
+
+    def enqueue_many(self, jobs: Iterable[Tuple[ScenarioInput, str, Optional[Dict[str, Any]]]]) -> List[int]:
+        """Add jobs in a single transaction; returns their ids."""
+        now = self._clock()
+        ids = []
+        conn = self._transaction()
+        try:
+            for scenario, data_dir, flags in jobs:
+                payload = orjson.dumps({'scenario': scenario.model_dump(), 'data_dir': str(data_dir),
+                                        'flags': flags or {}})
+                cursor = conn.execute('INSERT INTO jobs (payload, available_at, enqueued_at) VALUES (?, ?, ?)',
+                                      (payload, now, now))
+                ids.append(cursor.lastrowid)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return ids
+
+    def lease(self, owner: str, limit: int = 1) -> List[Job]:
+        """Claim up to ``limit`` ready jobs (pending, or leased with an expired lease)."""
+        now = self._clock()
+        conn = self._transaction()
+        try:
+            # Expired leases that used up their attempts will not be handed out again
+            conn.execute("UPDATE jobs SET status = 'dead', error = COALESCE(error, 'lease expired'), finished_at = ?, "
+                         "lease_owner = NULL, lease_token = NULL "
+                         "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= ?",
+                         (now, now, self.max_attempts))
+            rows = conn.execute("SELECT id, payload, attempts FROM jobs "
+                                "WHERE (status = 'pending' AND available_at <= ?) "
+                                "OR (status = 'leased' AND lease_expires <= ?) "
+                                "ORDER BY id LIMIT ?", (now, now, limit)).fetchall()
+            jobs = []
+            for job_id, payload, attempts in rows:
+                token = uuid.uuid4().hex
+                conn.execute("UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                             "lease_token = ?, lease_expires = ?, started_at = ? WHERE id = ?",
+                             (owner, token, now + self.visibility_timeout_s, now, job_id))
+                data = orjson.loads(payload)
+                jobs.append(Job(job_id, ScenarioInput(**data['scenario']), data['data_dir'], data['flags'],
+                                attempts + 1, token))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return jobs
+
+    def extend(self, job: Job, seconds: float = None) -> bool:
+        """Push a held lease's expiry out for long runs; False if the lease was lost."""
+        expires = self._clock() + (seconds or self.visibility_timeout_s)
+        cursor = self._connect().execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_token = ?",
+                                         (expires, job.id, job.token))
+        return cursor.rowcount == 1
+
+    def ack(self, job: Job, trace_file: Optional[str], result: Dict[str, Any] = None,
+            run_ms: float = None) -> bool:
+        """Mark a leased job done with its trace file; False if the lease was lost to another worker."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, run_ms = ?, trace_file = ?, result = ?, error = NULL, "
+            "lease_owner = NULL, lease_token = NULL WHERE id = ? AND lease_token = ?",
+            (self._clock(), run_ms, trace_file,
+             orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY) if result is not None else None,
+             job.id, job.token))
+        return cursor.rowcount == 1
+
+    def nack(self, job: Job, error: str) -> bool:
+        """Release a failed job for a retry after backoff, or mark it dead after ``max_attempts``."""
+        now = self._clock()
+        if job.attempts >= self.max_attempts:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = 'dead', finished_at = ?, error = ?, lease_owner = NULL, lease_token = NULL "
+                "WHERE id = ? AND lease_token = ?", (now, error, job.id, job.token))
+        else:
+            delay = min(self.retry_backoff_s * 2 ** (job.attempts - 1), MAX_RETRY_BACKOFF_S)
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = 'pending', available_at = ?, error = ?, lease_owner = NULL, "
+                "lease_token = NULL WHERE id = ? AND lease_token = ?", (now + delay, error, job.id, job.token))
+        return cursor.rowcount == 1
+
+    def requeue_dead(self) -> int:
+        """Give dead jobs a fresh set of attempts."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, finished_at = NULL "
+            "WHERE status = 'dead'", (self._clock(),))
+        return cursor.rowcount
+
+    def purge_done(self) -> int:
+        cursor = self._connect().execute("DELETE FROM jobs WHERE status = 'done'")
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth by state, job ages and recent throughput."""
+        now = self._clock()
+        conn = self._connect()
+        stats: Dict[str, Any] = {status: 0 for status in STATUSES}
+        stats.update(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        ready, delayed, expired, oldest = conn.execute(
+            "SELECT "
+            "COALESCE(SUM(status = 'pending' AND available_at <= :now), 0), "
+            "COALESCE(SUM(status = 'pending' AND available_at > :now), 0), "
+            "COALESCE(SUM(status = 'leased' AND lease_expires <= :now), 0), "
+            "MIN(CASE WHEN status = 'pending' THEN enqueued_at END) "
+            "FROM jobs WHERE status IN ('pending', 'leased')", {'now': now}).fetchone()
+        recent, mean_run_ms = conn.execute(
+            "SELECT COUNT(*), AVG(run_ms) FROM jobs WHERE status = 'done' AND finished_at > ?",
+            (now - THROUGHPUT_WINDOW_S,)).fetchone()
+        stats.update(
+            ready=ready + expired,
+            delayed=delayed,
+            expired_leases=expired,
+            oldest_pending_s=round(now - oldest, 3) if oldest is not None else None,
+            done_last_minute=recent,
+            throughput_per_s=round(recent / THROUGHPUT_WINDOW_S, 3),
+            mean_run_ms=round(mean_run_ms, 3) if mean_run_ms is not None else None,
+        )
+        return stats
+
+    def unfinished(self) -> int:
+        """Jobs still pending or leased."""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+
+def run_worker(queue: JobQueue, agent=None, owner: str = None, batch: int = 1, poll_s: float = 0.5,
+               drain: bool = True, stop: threading.Event = None,
+               coalescer: Optional[RunCoalescer] = None) -> Dict[str, int]:
+    """Lease, run and acknowledge jobs until the queue is drained (or ``stop`` is set).
+
+    With ``drain`` the worker exits once no job is pending or leased; jobs leased by a crashed worker
+    are waited for until their lease expires and then run here. Workers sharing a ``coalescer`` run
+    duplicate jobs once and acknowledge every copy with the same trace file.
+    """
+    if agent is None:
+        from .loop import AgentLoop
+        agent = AgentLoop(headless=True)
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    counts = {'done': 0, 'failed': 0, 'lost': 0, 'coalesced': 0, 'cached': 0}
+
+    while not (stop and stop.is_set()):
+        jobs = queue.lease(owner, batch)
+        if not jobs:
+            if drain and not queue.unfinished():
+                break
+            time.sleep(poll_s)
+            continue
+        for job in jobs:
+            started = time.perf_counter()
+            try:
+                if coalescer is not None:
+                    result, source = coalescer.run(run_key(job.scenario, job.data_dir, job.flags),
+                                                   lambda: agent.run(job.scenario, job.data_dir, job.flags))
+                else:
+                    result, source = agent.run(job.scenario, job.data_dir, job.flags), EXECUTED
+            except Exception as e:
+                queue.nack(job, f"{type(e).__name__}: {e}")
+                counts['failed'] += 1
+                continue
+            summary = {key: result.get(key) for key in ('strategy', 'primary_hypothesis', 'confidence',
+                                                           'risk_level', 'total_steps')}
+            if queue.ack(job, result.get('trace_file'), summary, (time.perf_counter() - started) * 1000):
+                counts['done'] += 1
+                if source != EXECUTED:
+                    counts[source] += 1
+            else:
+                # The lease expired and another worker owns the job now; its outcome wins
+                counts['lost'] += 1
+    return counts
+
+
+def _catalog_jobs(args) -> List[Tuple[ScenarioInput, str, None]]:
+    with open(args.asins, encoding='utf-8') as f:
+        asins = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return [(ScenarioInput(asin=asin, goal=args.goal, lookback_days=args.lookback_days), args.data_dir, None)
+            for asin in asins]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Durable work queue for scenario runs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = subparsers.add_parser('enqueue', help='Add scenario files or a catalog of ASINs')
+    enqueue.add_argument('db', help='Queue database file')
+    enqueue.add_argument('scenarios', nargs='*', help='Scenario JSON files')
+    enqueue.add_argument('--data-dir', help='Data directory for every job (default: mock/<scenario name>)')
+    enqueue.add_argument('--asins', help='File with one ASIN per line; needs --goal, --lookback-days, --data-dir')
+    enqueue.add_argument('--goal', choices=['increase_impressions', 'improve_conversion', 'reduce_acos'])
+    enqueue.add_argument('--lookback-days', type=int, default=14)
+    enqueue.add_argument('--incremental', action='store_true', help='Run jobs in incremental mode')
+
+    work = subparsers.add_parser('work', help='Run jobs until the queue is drained')
+    work.add_argument('db', help='Queue database file')
+    work.add_argument('--workers', type=int, default=1, help='Worker threads, each with its own AgentLoop')
+    work.add_argument('--batch', type=int, default=1, help='Jobs leased per round trip')
+    work.add_argument('--visibility-timeout', type=float, default=DEFAULT_VISIBILITY_TIMEOUT_S,
+                      help='Seconds a leased job stays hidden before another worker may retry it')
+    work.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work.add_argument('--trace-dir', default='./trace')
+    work.add_argument('--follow', action='store_true', help='Keep polling for new jobs instead of exiting when drained')
+    work.add_argument('--coalesce-ttl', type=float, metavar='SECONDS',
+                      help='Run duplicate jobs once and reuse results for this long (0: only while in flight)')
+
+    stats = subparsers.add_parser('stats', help='Show queue depth and throughput')
+    stats.add_argument('db', help='Queue database file')
+
+    requeue = subparsers.add_parser('requeue-dead', help='Retry dead jobs with fresh attempts')
+    requeue.add_argument('db', help='Queue database file')
+
+    purge = subparsers.add_parser('purge', help='Delete finished (done) jobs')
+    purge.add_argument('db', help='Queue database file')
+
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        if args.asins:
+            if not (args.goal and args.data_dir):
+                parser.error('--asins needs --goal and --data-dir')
+            jobs = _catalog_jobs(args)
+        else:
+            sys.path.insert(0, str(REPO_ROOT))
+            from demo import load_scenario
+            jobs = [(*load_scenario(path, args.data_dir), None) for path in args.scenarios]
+        if args.incremental:
+            jobs = [(scenario, data_dir, {'incremental': True}) for scenario, data_dir, _ in jobs]
+        ids = JobQueue(args.db).enqueue_many(jobs)
+        print(f"Enqueued {len(ids)} job(s) in {args.db}")
+
+    elif args.command == 'work':
+        from .loop import AgentLoop
+
+        queue = JobQueue(args.db, args.visibility_timeout, args.max_attempts)
+        coalescer = RunCoalescer(args.coalesce_ttl) if args.coalesce_ttl is not None else None
+        totals = {'done': 0, 'failed': 0, 'lost': 0, 'coalesced': 0, 'cached': 0}
+        lock = threading.Lock()
+        started = time.perf_counter()
+
+        def work_thread() -> None:
+            counts = run_worker(queue, AgentLoop(headless=True, trace_dir=args.trace_dir), batch=args.batch,
+                                drain=not args.follow, coalescer=coalescer)
+            with lock:
+                for key, value in counts.items():
+                    totals[key] += value
+
+        threads = [threading.Thread(target=work_thread, name=f'worker-{i}') for i in range(args.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"Processed {totals['done']} job(s) in {elapsed:.2f}s ({totals['done'] / elapsed:.1f}/s); "
+              f"{totals['failed']} failed attempt(s), {totals['lost']} lost lease(s)")
+        if coalescer is not None:
+            dedup = coalescer.stats()
+            print(f"Deduplicated {dedup['coalesced']} in-flight and {dedup['cached']} cached duplicate(s); "
+                  f"{dedup['executed']} run(s) executed, hit rate {dedup['hit_rate']:.1%}")
+
+    elif args.command == 'stats':
+        for key, value in JobQueue(args.db).stats().items():
+            print(f"{key:>18}: {value}")
+
+    elif args.command == 'requeue-dead':
+        print(f"Requeued {JobQueue(args.db).requeue_dead()} dead job(s)")
+
+    else:
+        print(f"Purged {JobQueue(args.db).purge_done()} done job(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,39 +4,40 @@ Main agent loop implementing Observe → Think → Act cycle.
 
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
-from .types import ScenarioInput, ToolResult, Evidence
+import numpy as np
+
+from .types import AgentContext, ScenarioInput, ToolResult, Evidence
 from .policy import PolicyEngine
+from .batch_policy import BatchPolicyEngine, STOP_REASONS
 from .memory import WorkingMemory, TraceManager
-from .reasoning import ReasoningDisplay
+from .reasoning import ReasoningDisplay, HeadlessDisplay
 from .errors import recommend_fallback
+from . import metrics
+from .fingerprint import input_fingerprint
+from .instrumentation import RunTimer, TimingStats
+from .registry import Registry, get_registry
 
-# Import tools
+# Tools are imported by the registry from their "module:Class" factories
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
-from tools.ads_metrics import AdsMetricsTool
-from tools.competitor import CompetitorTool
-from tools.listing_audit import ListingAuditTool
-from tools.inventory import InventoryTool
 
 
 class AgentLoop:
     """Main agent execution loop."""
     
-    def __init__(self):
-        self.policy = PolicyEngine()
-        self.display = ReasoningDisplay()
-        self.trace_manager = TraceManager()
+    def __init__(self, registry: Registry = None, headless: bool = False, trace_dir: str = "./trace"):
+        self.registry = registry or get_registry()
+        self.policy = PolicyEngine(self.registry)
+        # Headless loops (benchmarks, batch workers) skip rendering entirely
+        self.display = HeadlessDisplay(self.registry) if headless else ReasoningDisplay(self.registry)
+        self.trace_manager = TraceManager(trace_dir)
+        self.timing_stats = TimingStats()
         
         # Initialize tools
-        self.tools = {
-            'ads_metrics': AdsMetricsTool(),
-            'competitor': CompetitorTool(),
-            'listing_audit': ListingAuditTool(),
-            'inventory': InventoryTool()
-        }
+        self.tools = self.registry.create_tools()
     
     def run(self, scenario_input: ScenarioInput, scenario_dir: str, flags: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -53,9 +54,18 @@ class AgentLoop:
         if flags is None:
             flags = {}
         
+        timer = RunTimer()
+        
         # Initialize memory
         memory = WorkingMemory(scenario_input, scenario_dir, flags)
         
+        # Incremental mode: results from the last run for this ASIN and goal are
+        # reused for tools whose input fingerprint is unchanged
+        incremental = bool(flags.get('incremental'))
+        previous_trace, cached_results = self._load_cached_results(scenario_input) if incremental else (None, {})
+        reused_tools: List[str] = []
+        executed_tools: List[str] = []
+        
         # Initialize hypotheses
         memory.update_hypotheses(self.policy.initialize_hypotheses(scenario_input))
         memory.add_trace_entry('initialization', {
@@ -67,8 +77,10 @@ class AgentLoop:
         # Main execution loop (minimum 3 steps, maximum 5)
         for step in range(1, 6):
             memory.advance_step()
+            metrics.steps.inc()
             
             # OBSERVE: Gather current context
+            timer.enter('observe')
             ctx = memory.get_context()
             self.display.show_observe(step, {
                 'scenario': scenario_input.model_dump(),
@@ -82,13 +94,15 @@ class AgentLoop:
             })
             
             # THINK: Display current hypotheses
+            timer.enter('think')
             self.display.show_hypotheses(memory.hypotheses)
             
             # DECIDE: Select next action
+            timer.enter('decide')
             should_stop, stop_reason = self.policy.should_stop(memory.hypotheses, ctx)
             
             # Allow immediate stop for very high confidence (≥ 0.8), otherwise require minimum 3 steps
-            top_hypothesis = max(memory.hypotheses.values(), key=lambda h: h.belief) if memory.hypotheses else None
+            top_hypothesis = self.policy.top_hypothesis(memory.hypotheses)
             immediate_stop = top_hypothesis and top_hypothesis.belief >= 0.8
             
             if should_stop and (immediate_stop or step >= 3):
@@ -128,8 +142,25 @@ class AgentLoop:
                 'reasoning': decision_reasoning
             })
             
-            # ACT: Execute selected tool
-            tool_result = self._execute_tool(selected_tool, ctx)
+            # ACT: Execute selected tool (or reuse its previous result)
+            timer.enter('act')
+            fingerprint = self._fingerprint(selected_tool, ctx)
+            cached = cached_results.get(selected_tool)
+            if cached is not None and fingerprint is not None and cached.meta.get('fingerprint') == fingerprint:
+                tool_result = cached.model_copy(update={
+                    'meta': {**cached.meta, 'cached': True, 'cached_from': cached.meta.get('cached_from', previous_trace)}
+                })
+                reused_tools.append(selected_tool)
+                self.display.console.print(f"[dim]♻️  Inputs unchanged, reusing {selected_tool} result from {previous_trace}[/dim]")
+            else:
+                with timer.span(f'tool.{selected_tool}'):
+                    tool_result = self._execute_tool(selected_tool, ctx)
+                for phase, ms in tool_result.meta.get('timings', {}).items():
+                    if phase != 'total_ms':
+                        timer.add(f'tool.{selected_tool}.{phase[:-3]}', int(ms * 1e6))
+                if fingerprint is not None:
+                    tool_result.meta['fingerprint'] = fingerprint
+                executed_tools.append(selected_tool)
             self.display.show_tool_result(tool_result)
             
             # Store result
@@ -142,7 +173,7 @@ class AgentLoop:
             # Handle tool failure with fallback
             if not tool_result.ok:
                 used_tools = set(memory.previous_results.keys())
-                fallback_suggestion = recommend_fallback(selected_tool, used_tools)
+                fallback_suggestion = recommend_fallback(selected_tool, used_tools, registry=self.registry)
                 self.display.console.print(f"[yellow]💡 Fallback suggestion: {fallback_suggestion}[/yellow]")
                 
                 memory.add_trace_entry('fallback', {
@@ -155,6 +186,7 @@ class AgentLoop:
                 continue
             
             # EVALUATE: Update beliefs based on evidence
+            timer.enter('update')
             evidence_list = self._extract_evidence(tool_result)
             old_beliefs = {name: hyp.belief for name, hyp in memory.hypotheses.items()}
             
@@ -178,21 +210,108 @@ class AgentLoop:
                 }
             })
         
+        timer.stop()
+        
         # Generate final action plan
         final_action = self.policy.decide_action(memory.hypotheses, memory.get_context())
+        if incremental:
+            final_action['incremental'] = {
+                'previous_trace': previous_trace,
+                'reused_tools': reused_tools,
+                'executed_tools': executed_tools
+            }
         self.display.show_final_action(final_action)
         
         memory.add_trace_entry('final_action', final_action)
         
+        self.timing_stats.add_run(timer)
+        timings = timer.summary()
+        metrics.runs.inc()
+        metrics.run_latency.observe(timings['wall_ms'] / 1000)
+        memory.add_trace_entry('timings', timings)
+        
         # Save trace
-        trace_file = self.trace_manager.save_trace(memory, final_action)
+        trace_file = self.trace_manager.save_trace(memory, final_action, update_index=incremental)
         
         # Add trace file to results
         final_action['trace_file'] = trace_file
         final_action['total_steps'] = memory.step
+        final_action['timings'] = timings
         
         return final_action
     
+    def run_batch(self, scenarios: Sequence[ScenarioInput], scenario_dirs: Sequence[str],
+                  flags: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate many scenarios in lockstep with the vectorized BatchPolicyEngine.
+        
+        Makes the same decisions as run() for each scenario, but stop checks, tool
+        selection and belief updates are array operations over the whole batch. Only
+        the tools run per scenario. Nothing is displayed or traced and results are
+        never reused, so this suits large catalogue evaluations rather than reports.
+        
+        Returns:
+            One dict per scenario with the final action, beliefs, selected tools,
+            stop reason and step count
+        """
+        if flags is None:
+            flags = {}
+        
+        batch = BatchPolicyEngine(self.policy)
+        n = len(scenarios)
+        beliefs = batch.initialize_hypotheses(scenarios)
+        used_tools = batch.new_used_tools(n)
+        active = np.ones(n, dtype=bool)
+        steps = np.zeros(n, dtype=np.int64)
+        stop_reasons = [''] * n
+        selected_tools: List[List[str]] = [[] for _ in range(n)]
+        
+        for step in range(1, 6):
+            steps[active] = step
+            
+            stop, reasons = batch.should_stop(beliefs, step, used_tools)
+            for i in np.flatnonzero(stop & active):
+                stop_reasons[i] = STOP_REASONS[reasons[i]]
+                metrics.stop_reasons.inc(stop_reasons[i])
+            active &= ~stop
+            
+            tool_idx, _ = batch.select_next_tool(beliefs, step, used_tools)
+            for i in np.flatnonzero(active & (tool_idx < 0)):
+                stop_reasons[i] = 'no_tool_available'
+            active &= tool_idx >= 0
+            if not active.any():
+                break
+            
+            step_tools: List[Optional[str]] = [None] * n
+            evidence_lists: List[List[Evidence]] = [[] for _ in range(n)]
+            for i in np.flatnonzero(active):
+                tool_name = batch.tool_names[tool_idx[i]]
+                ctx = AgentContext(scenario=scenarios[i], scenario_dir=scenario_dirs[i], flags=flags,
+                                   step=step, previous_results={}, hypotheses={})
+                evidence_lists[i] = self._extract_evidence(self._execute_tool(tool_name, ctx))
+                step_tools[i] = tool_name
+                selected_tools[i].append(tool_name)
+            
+            batch.mark_used(used_tools, step_tools)
+            beliefs = batch.update_beliefs(beliefs, evidence_lists)
+        
+        actions = batch.decide_action(beliefs)
+        return [
+            {
+                'asin': scenario.asin,
+                'goal': scenario.goal,
+                'primary_hypothesis': actions['primary_hypothesis'][i],
+                'confidence': float(actions['confidence'][i]),
+                'strategy': str(actions['strategy'][i]),
+                'risk_level': str(actions['risk_level'][i]),
+                'beliefs': {name: float(beliefs[i, h]) for h, name in enumerate(batch.hypothesis_names)},
+                'tools': selected_tools[i],
+                'stop_reason': stop_reasons[i],
+                'total_steps': int(steps[i])
+            }
+            for i, scenario in enumerate(scenarios)
+        ]
+    
     def _execute_tool(self, tool_name: str, ctx) -> ToolResult:
         """Execute a tool with error handling."""
         if tool_name not in self.tools:
@@ -206,18 +325,8 @@ class AgentLoop:
         
         tool = self.tools[tool_name]
         
-        # Prepare context for tool
-        tool_ctx = {
-            'scenario_dir': ctx.scenario_dir,
-            'flags': ctx.flags
-        }
-        
-        # Add tool-specific context
-        if tool_name == 'ads_metrics':
-            tool_ctx['mode'] = ctx.flags.get('ads_mode', 'keyword')
-        
         try:
-            return tool.run(tool_ctx)
+            return tool.run(self._tool_context(tool_name, ctx))
         except Exception as e:
             # This should be caught by the tool's wrap_call decorator,
             # but provide a safety fallback
@@ -229,130 +338,53 @@ class AgentLoop:
                 error=f"Unexpected error: {str(e)}"
             )
     
+    def _tool_context(self, tool_name: str, ctx) -> Dict[str, Any]:
+        """Context passed to a tool's run()."""
+        tool_ctx = {
+            'scenario_dir': ctx.scenario_dir,
+            'asin': ctx.scenario.asin,
+            'lookback_days': ctx.scenario.lookback_days,
+            'flags': ctx.flags
+        }
+        
+        # Add tool-specific context from flags declared in the registry
+        for ctx_key, flag_name in self.registry.tools[tool_name].context_flags.items():
+            if flag_name in ctx.flags:
+                tool_ctx[ctx_key] = ctx.flags[flag_name]
+        return tool_ctx
+    
+    def _fingerprint(self, tool_name: str, ctx) -> Optional[str]:
+        """Fingerprint of a tool's declared inputs and context; None if it declares none."""
+        spec = self.registry.tools.get(tool_name)
+        if spec is None or tool_name not in self.tools:
+            return None
+        return input_fingerprint(
+            ctx.scenario_dir,
+            spec.inputs,
+            self._tool_context(tool_name, ctx),
+            content=ctx.flags.get('fingerprint') == 'content'
+        )
+    
+    def _load_cached_results(self, scenario_input: ScenarioInput) -> Tuple[Optional[str], Dict[str, ToolResult]]:
+        """Successful, fingerprinted tool results from the latest trace for this ASIN and goal."""
+        latest = self.trace_manager.latest_trace(scenario_input.asin, scenario_input.goal)
+        if latest is None:
+            return None, {}
+        
+        trace_file, trace_data = latest
+        cached_results = {}
+        for name, result in trace_data.get('final_state', {}).get('tool_results', {}).items():
+            if result.get('ok') and result.get('meta', {}).get('fingerprint'):
+                cached_results[name] = ToolResult(**result)
+        return trace_file, cached_results
+    
     def _extract_evidence(self, tool_result: ToolResult) -> List[Evidence]:
         """Extract evidence from tool results to update beliefs."""
         if not tool_result.ok:
             return []
         
-        evidence_list = []
-        tool_name = tool_result.name
-        data = tool_result.data
-        
-        if tool_name == 'ads_metrics':
-            # Evidence for ads metrics analysis
-            if 'aggregated_metrics' in data:
-                metrics = data['aggregated_metrics']
-                total_impressions = metrics.get('total_impressions', 0)
-                avg_ctr = metrics.get('avg_ctr', 0)
-                overall_acos = metrics.get('overall_acos')
-                
-                # Low impressions evidence
-                if total_impressions < 3000:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='strong',
-                        hypothesis_name='h1_low_bids',
-                        description=f'Low total impressions ({total_impressions:,}) suggests bid issues',
-                        data_point=total_impressions
-                    ))
-                
-                if total_impressions < 5000:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='medium',
-                        hypothesis_name='h2_keyword_coverage',
-                        description=f'Limited impressions may indicate poor keyword coverage',
-                        data_point=total_impressions
-                    ))
-                
-                # CTR evidence
-                if avg_ctr < 0.015:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='medium',
-                        hypothesis_name='h4_listing_quality',
-                        description=f'Low CTR ({avg_ctr:.3f}) suggests listing quality issues',
-                        data_point=avg_ctr
-                    ))
-                
-                # ACOS evidence
-                if overall_acos and overall_acos > 1.0:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='strong',
-                        hypothesis_name='h5_broad_match_waste',
-                        description=f'High ACOS ({overall_acos:.2f}) indicates inefficient spending',
-                        data_point=overall_acos
-                    ))
-            
-            # Performance issues evidence
-            if 'performance_issues' in data:
-                issues = data['performance_issues']
-                no_conv_keywords = issues.get('no_conversion_keywords', 0)
-                total_keywords = issues.get('total_keywords', 1)
-                
-                if no_conv_keywords / total_keywords > 0.6:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='strong',
-                        hypothesis_name='h5_broad_match_waste',
-                        description=f'High ratio of non-converting keywords ({no_conv_keywords}/{total_keywords})',
-                        data_point=no_conv_keywords / total_keywords
-                    ))
-        
-        elif tool_name == 'competitor':
-            if 'competitive_analysis' in data:
-                analysis = data['competitive_analysis']
-                pressure = analysis.get('competitive_pressure', 'unknown')
-                
-                if pressure in ['high', 'medium']:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='strong' if pressure == 'high' else 'medium',
-                        hypothesis_name='h3_competitor_pressure',
-                        description=f'Competitive pressure is {pressure}',
-                        data_point=pressure
-                    ))
-        
-        elif tool_name == 'listing_audit':
-            if 'listing_analysis' in data:
-                analysis = data['listing_analysis']
-                quality_score = analysis.get('overall_quality_score', 0)
-                issues_count = len(analysis.get('quality_issues', []))
-                
-                if quality_score < 50:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='strong',
-                        hypothesis_name='h4_listing_quality',
-                        description=f'Low quality score ({quality_score}/100) with {issues_count} issues',
-                        data_point=quality_score
-                    ))
-                elif quality_score < 70:
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='medium',
-                        hypothesis_name='h4_listing_quality',
-                        description=f'Moderate quality score ({quality_score}/100)',
-                        data_point=quality_score
-                    ))
-        
-        elif tool_name == 'inventory':
-            if 'inventory_analysis' in data:
-                analysis = data['inventory_analysis']
-                days_remaining = analysis.get('days_remaining', 0)
-                
-                if days_remaining < 14:
-                    # Low inventory might affect ad performance
-                    evidence_list.append(Evidence(
-                        tool_name=tool_name,
-                        strength='weak',
-                        hypothesis_name='h1_low_bids',
-                        description=f'Low inventory ({days_remaining} days) may justify reduced bids',
-                        data_point=days_remaining
-                    ))
-        
-        return evidence_list
+        extractor = self.registry.evidence_extractor(tool_result.name)
+        return extractor(tool_result) if extractor else []
     
     def _explain_tool_choice(self, tool_name: str, hypothesis_name: str, hypotheses: Dict[str, Any], ctx) -> str:
         """Explain why a specific tool was chosen with detailed reasoning."""
@@ -364,8 +396,8 @@ class AgentLoop:
         tool_mapping = self.policy.get_tool_preferences()
         used_tools = set(ctx.previous_results.keys())
         
-        # Sort hypotheses by belief to explain selection logic
-        sorted_hyps = sorted(hypotheses.items(), key=lambda x: x[1].belief, reverse=True)
+        # Hypotheses in belief order to explain selection logic
+        sorted_hyps = self.policy.rank_hypotheses(hypotheses)
         
         # Build hypothesis selection reasoning
         hyp_reasoning = self._build_hypothesis_selection_reasoning(hypothesis_name, sorted_hyps, tool_mapping, used_tools)
@@ -374,14 +406,8 @@ class AgentLoop:
         tool_reasoning = self._build_tool_selection_reasoning(tool_name, hypothesis_name, tool_mapping, used_tools)
         
         # Combine explanations
-        base_explanations = {
-            'ads_metrics': f'analyzing keyword performance, CTR, and ACOS metrics. This data will help determine if bid amounts are adequate or if keyword coverage needs improvement.',
-            'competitor': f'investigating competitive landscape and market positioning. This analysis will reveal if competitor pressure is limiting performance or if our positioning needs adjustment.',
-            'listing_audit': f'conducting comprehensive listing quality assessment. This audit will identify content, image, and SEO optimization opportunities affecting conversion rates.',
-            'inventory': f'examining inventory levels and restocking timeline. Low inventory may justify conservative bidding strategies or explain reduced advertising aggressiveness.'
-        }
-        
-        tool_purpose = base_explanations.get(tool_name, f'gathering additional information')
+        tool_spec = self.registry.tools.get(tool_name)
+        tool_purpose = tool_spec.selection_explanation if tool_spec else 'gathering additional information'
         
         return f"{hyp_reasoning} {tool_reasoning} We're {tool_purpose}"
     
@@ -422,7 +448,7 @@ class AgentLoop:
     
     def _prepare_decision_context(self, hypotheses: Dict[str, Any], ctx) -> Dict[str, Any]:
         """Prepare context information for decision display."""
-        top_hypothesis = max(hypotheses.values(), key=lambda h: h.belief) if hypotheses else None
+        top_hypothesis = self.policy.top_hypothesis(hypotheses)
         
         # Prepare tool status information (success/failure)
         tool_results = {}
@@ -439,9 +465,10 @@ class AgentLoop:
     
     def _summarize_context(self, ctx) -> Dict[str, Any]:
         """Create a summary of current context for trace."""
+        top_hypothesis = self.policy.top_hypothesis(ctx.hypotheses)
         return {
             'step': ctx.step,
             'goal': ctx.scenario.goal,
             'tools_used': list(ctx.previous_results.keys()),
-            'top_hypothesis': max(ctx.hypotheses.values(), key=lambda h: h.belief).name if ctx.hypotheses else None
+            'top_hypothesis': top_hypothesis.name if top_hypothesis else None
         }
\ No newline at end of file
@@ -2,10 +2,14 @@
 Memory management for agent working memory and execution traces.
 """
 
+import itertools
+import sqlite3
+import threading
+import time
 import orjson
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import BinaryIO, Dict, Any, List, Optional, Tuple
 
 from .types import ScenarioInput, ToolResult, Hypothesis, AgentContext
 
@@ -63,15 +67,24 @@ class WorkingMemory:
 class TraceManager:
     """Manages persistent trace storage."""
     
+    # Latest trace per (asin, goal), for incremental runs; safe across threads and processes
+    INDEX_NAME = 'index.sqlite'
+    INDEX_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS latest_trace (
+        key        TEXT PRIMARY KEY,
+        trace_file TEXT NOT NULL,
+        updated    REAL NOT NULL
+    );
+    """
+    
     def __init__(self, trace_dir: str = "./trace"):
         self.trace_dir = Path(trace_dir)
         self.trace_dir.mkdir(exist_ok=True)
+        self._local = threading.local()
     
-    def save_trace(self, memory: WorkingMemory, final_action: Optional[Dict[str, Any]] = None) -> str:
-        """Save execution trace to file."""
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        trace_file = self.trace_dir / f"{timestamp}.json"
+    def save_trace(self, memory: WorkingMemory, final_action: Optional[Dict[str, Any]] = None,
+                   update_index: bool = False) -> str:
+        """Save execution trace to file; ``update_index`` also records it as the latest for its ASIN and goal."""
         
         trace_data = {
             'metadata': {
@@ -90,11 +103,61 @@ class TraceManager:
         }
         
         # Save using orjson for better performance
-        with open(trace_file, 'wb') as f:
+        trace_file, f = self._create_trace_file()
+        with f:
             f.write(orjson.dumps(trace_data, option=orjson.OPT_INDENT_2))
         
+        if update_index:
+            self._update_index(memory.scenario, str(trace_file))
         return str(trace_file)
     
+    def _create_trace_file(self) -> Tuple[Path, BinaryIO]:
+        """Open a new, uniquely named trace file.
+        
+        Names carry microseconds and are created exclusively, with a numeric
+        suffix on collision, so concurrent runs never overwrite each other.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        for attempt in itertools.count():
+            trace_file = self.trace_dir / (f"{timestamp}.json" if attempt == 0 else f"{timestamp}_{attempt}.json")
+            try:
+                return trace_file, open(trace_file, 'xb')
+            except FileExistsError:
+                continue
+    
+    def latest_trace(self, asin: str, goal: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Most recent saved trace for an ASIN and goal, as (trace file, trace data)."""
+        row = self._index().execute(
+            "SELECT trace_file FROM latest_trace WHERE key = ?", (self._index_key(asin, goal),)
+        ).fetchone()
+        if row is None or not Path(row[0]).exists():
+            return None
+        return row[0], self.load_trace(row[0])
+    
+    @staticmethod
+    def _index_key(asin: str, goal: str) -> str:
+        return f"{asin}:{goal}"
+    
+    def _index(self) -> sqlite3.Connection:
+        """This thread's connection to trace/index.sqlite, created on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.trace_dir / self.INDEX_NAME), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.INDEX_SCHEMA)
+            self._local.conn = conn
+        return conn
+    
+    def _update_index(self, scenario: ScenarioInput, trace_file: str) -> None:
+        """Point the (asin, goal) entry of the index at the newest trace with a single upsert."""
+        self._index().execute(
+            "INSERT INTO latest_trace (key, trace_file, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET trace_file = excluded.trace_file, updated = excluded.updated "
+            "WHERE excluded.updated >= latest_trace.updated",
+            (self._index_key(scenario.asin, scenario.goal), trace_file, time.time())
+        )
+    
     def load_trace(self, trace_file: str) -> Dict[str, Any]:
         """Load execution trace from file."""
         with open(trace_file, 'rb') as f:
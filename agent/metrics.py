@@ -0,0 +1,191 @@
+"""
+Optional run metrics in Prometheus/OpenMetrics text format.
+
+Metrics are process-wide and disabled by default; enable them with
+``enable_metrics()`` or ``AGENT_METRICS=1``. While disabled every hook returns
+after a single attribute check. Expose them with ``serve_metrics(port)`` (HTTP
+``/metrics``) or ``write_textfile(path)`` for a node-exporter textfile collector.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f'# TYPE {self.name} counter', f'# HELP {self.name} {self.help}']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}_total{_labels(self.labelnames, labels)} {_format(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f'# TYPE {self.name} histogram', f'# HELP {self.name} {self.help}']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), series[:-1]):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % le)
+                    lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_format(series[-1])}')
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metric families rendered together."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: List = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry(enabled=os.getenv('AGENT_METRICS', '').lower() in ('1', 'true', 'yes'))
+
+runs = METRICS.counter('agent_runs', 'Agent runs completed')
+steps = METRICS.counter('agent_steps', 'Agent loop steps executed')
+tool_calls = METRICS.counter('agent_tool_calls', 'Tool invocations', ('tool',))
+tool_failures = METRICS.counter('agent_tool_failures', 'Tool invocations that failed after retries', ('tool', 'error_type'))
+tool_retries = METRICS.counter('agent_tool_retries', 'Tool retry attempts', ('tool',))
+tool_short_circuits = METRICS.counter('agent_tool_short_circuits', 'Tool calls failed fast by an open circuit breaker', ('tool',))
+tool_breaker_transitions = METRICS.counter('agent_tool_breaker_transitions', 'Tool circuit breaker state changes', ('tool', 'state'))
+fallbacks = METRICS.counter('agent_fallbacks', 'Fallback recommendations issued for failed tools', ('tool',))
+stop_reasons = METRICS.counter('agent_stop_reasons', 'Stop conditions reported by the policy', ('reason',))
+report_cache_lookups = METRICS.counter('agent_report_cache_lookups', 'LLM report cache lookups', ('result',))
+report_requests = METRICS.counter('agent_report_requests', 'LLM report completion attempts', ('result',))
+run_dedup = METRICS.counter('agent_run_dedup', 'Run requests by how they were served', ('result',))
+tool_latency = METRICS.histogram('agent_tool_latency_seconds', 'Tool call latency including retries', ('tool',))
+run_latency = METRICS.histogram('agent_run_latency_seconds', 'Agent run wall time')
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    METRICS.enabled = enabled
+
+
+def render_metrics() -> str:
+    return METRICS.render()
+
+
+def write_textfile(path: str) -> None:
+    """Atomically write current metrics for a textfile collector."""
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Enable metrics and serve them at http://host:port/metrics from a daemon thread."""
+    enable_metrics()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,135 @@
+"""
+Precomputed policy lookup tables and belief-ordered hypothesis storage.
+"""
+
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .types import Hypothesis
+
+
+class PolicyPlan:
+    """Immutable hypothesis → tools table with a reverse tool → hypotheses index."""
+
+    def __init__(self, hypothesis_tools: Mapping[str, Sequence[str]], main_tools: Iterable[str] = ()):
+        self.hypothesis_tools: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {name: tuple(tools) for name, tools in hypothesis_tools.items()}
+        )
+
+        tool_hypotheses: Dict[str, List[str]] = {}
+        for name, tools in self.hypothesis_tools.items():
+            for tool in tools:
+                tool_hypotheses.setdefault(tool, []).append(name)
+        self.tool_hypotheses: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {tool: tuple(names) for tool, names in tool_hypotheses.items()}
+        )
+
+        self.hypotheses: Tuple[str, ...] = tuple(self.hypothesis_tools)
+        self.tools: Tuple[str, ...] = tuple(self.tool_hypotheses)
+        self.main_tools = frozenset(main_tools)
+
+    def tools_for(self, hypothesis_name: str) -> Tuple[str, ...]:
+        """Preferred tools for a hypothesis, in priority order."""
+        return self.hypothesis_tools.get(hypothesis_name, ())
+
+    def hypotheses_for(self, tool_name: str) -> Tuple[str, ...]:
+        """Hypotheses that list the tool among their preferred tools."""
+        return self.tool_hypotheses.get(tool_name, ())
+
+    def tools_completed(self, hypothesis_name: str, used_tools: Iterable[str]) -> bool:
+        """Whether every preferred tool of the hypothesis has been executed."""
+        return all(tool in used_tools for tool in self.tools_for(hypothesis_name))
+
+
+class RankedHypotheses(dict):
+    """Hypothesis dict that keeps a descending-belief order up to date on every write.
+
+    Assigning a hypothesis repositions only that entry (bisect into a sorted key
+    list), so a belief update costs O(changed hypotheses) instead of a full re-sort.
+    Ties keep insertion order, matching ``sorted(..., reverse=True)`` on a plain dict.
+    """
+
+    def __init__(self, hypotheses: Optional[Mapping[str, Hypothesis]] = None):
+        super().__init__()
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        self._keys: List[Tuple[float, int]] = []
+        self._names: List[str] = []
+        if hypotheses:
+            for name, hypothesis in hypotheses.items():
+                self[name] = hypothesis
+
+    def __setitem__(self, name: str, hypothesis: Hypothesis) -> None:
+        if name in self:
+            self._unlink(name)
+        else:
+            self._seq[name] = self._next_seq
+            self._next_seq += 1
+        super().__setitem__(name, hypothesis)
+
+        key = (-hypothesis.belief, self._seq[name])
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._names.insert(index, name)
+
+    def __delitem__(self, name: str) -> None:
+        self._unlink(name)
+        super().__delitem__(name)
+        del self._seq[name]
+
+    def _unlink(self, name: str) -> None:
+        key = (-dict.__getitem__(self, name).belief, self._seq[name])
+        index = bisect_left(self._keys, key)
+        del self._keys[index]
+        del self._names[index]
+
+    def update(self, *args, **kwargs) -> None:
+        for name, hypothesis in dict(*args, **kwargs).items():
+            self[name] = hypothesis
+
+    def pop(self, name: str, *default):
+        if name not in self:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        hypothesis = self[name]
+        del self[name]
+        return hypothesis
+
+    def setdefault(self, name: str, default: Hypothesis = None) -> Hypothesis:
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def clear(self) -> None:
+        super().clear()
+        self._seq.clear()
+        self._keys.clear()
+        self._names.clear()
+
+    def copy(self) -> 'RankedHypotheses':
+        clone = RankedHypotheses()
+        dict.update(clone, self)
+        clone._seq = self._seq.copy()
+        clone._next_seq = self._next_seq
+        clone._keys = self._keys.copy()
+        clone._names = self._names.copy()
+        return clone
+
+    def __reduce__(self):
+        return (RankedHypotheses, (dict(self),))
+
+    def iter_ranked(self) -> Iterator[Tuple[str, Hypothesis]]:
+        """Yield (name, hypothesis) pairs from highest to lowest belief."""
+        for name in self._names:
+            yield name, dict.__getitem__(self, name)
+
+    def ranked(self, limit: Optional[int] = None) -> List[Tuple[str, Hypothesis]]:
+        """(name, hypothesis) pairs from highest to lowest belief."""
+        names = self._names if limit is None else self._names[:limit]
+        return [(name, dict.__getitem__(self, name)) for name in names]
+
+    def top(self) -> Optional[Hypothesis]:
+        """Highest-belief hypothesis, or None when empty."""
+        return dict.__getitem__(self, self._names[0]) if self._names else None
@@ -2,73 +2,54 @@
 Policy engine for hypothesis management, belief updates, and tool selection.
 """
 
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Mapping
 from .types import Hypothesis, ScenarioInput, ToolResult, Evidence, AgentContext
+from . import metrics
+from .plan import PolicyPlan, RankedHypotheses
+from .registry import Registry, get_registry
 
 
 class PolicyEngine:
     """Core policy engine for autonomous agent decision-making."""
     
-    def __init__(self):
+    def __init__(self, registry: Registry = None):
+        self.registry = registry or get_registry()
+        self.plan: PolicyPlan = self.registry.plan
         self.evidence_strength_map = {
             'strong': 0.2,
             'medium': 0.1,
             'weak': 0.05,
             'counter': -0.1
         }
+        # Normalized initial hypotheses per (goal, ASIN override), copied per run
+        self._initial_hypotheses: Dict[Tuple[str, str], RankedHypotheses] = {}
     
     def initialize_hypotheses(self, scenario: ScenarioInput) -> Dict[str, Hypothesis]:
         """Initialize hypotheses based on scenario goal."""
-        base_hypotheses = {
-            'h1_low_bids': Hypothesis(
-                name='h1_low_bids',
-                belief=0.3,
-                rationale='Bid amounts may be too low to win competitive auctions'
-            ),
-            'h2_keyword_coverage': Hypothesis(
-                name='h2_keyword_coverage',
-                belief=0.25,
-                rationale='Keyword coverage may be insufficient for target audience'
-            ),
-            'h3_competitor_pressure': Hypothesis(
-                name='h3_competitor_pressure',
-                belief=0.2,
-                rationale='Strong competitor presence may be limiting performance'
-            ),
-            'h4_listing_quality': Hypothesis(
-                name='h4_listing_quality',
-                belief=0.25,
-                rationale='Product listing quality may be affecting conversion rates'
-            ),
-            'h5_broad_match_waste': Hypothesis(
-                name='h5_broad_match_waste',
-                belief=0.15,
-                rationale='Broad match keywords may be generating irrelevant traffic'
-            )
-        }
-        
-        # Adjust initial beliefs based on scenario goal
-        if scenario.goal == 'reduce_acos':
-            base_hypotheses['h5_broad_match_waste'].belief = 0.4
-            base_hypotheses['h4_listing_quality'].belief = 0.35
-        elif scenario.goal == 'increase_impressions':
-            base_hypotheses['h1_low_bids'].belief = 0.45
-            base_hypotheses['h2_keyword_coverage'].belief = 0.4
-            # Demo scenario for ≥0.8 immediate termination
-            if scenario.asin == 'B0MOCKSTOP':
-                base_hypotheses['h1_low_bids'].belief = 0.85  # High enough to survive normalization and reach ≥0.8
-        elif scenario.goal == 'improve_conversion':
-            base_hypotheses['h4_listing_quality'].belief = 0.5
-            base_hypotheses['h3_competitor_pressure'].belief = 0.3
-        
-        # Normalize beliefs to ensure they sum reasonably
-        self._normalize_beliefs(base_hypotheses)
+        override_asin = scenario.asin if scenario.asin in self.registry.asin_priors else ''
+        key = (scenario.goal, override_asin)
+        
+        template = self._initial_hypotheses.get(key)
+        if template is None:
+            # Goal-specific priors (and demo ASIN overrides) come from the registry
+            beliefs = self.registry.initial_beliefs(scenario.goal, override_asin)
+            base_hypotheses = {
+                name: Hypothesis(name=name, belief=beliefs[name], rationale=spec.rationale)
+                for name, spec in self.registry.hypotheses.items()
+            }
+            
+            # Normalize beliefs to ensure they sum reasonably
+            self._normalize_beliefs(base_hypotheses)
+            
+            template = RankedHypotheses(base_hypotheses)
+            self._initial_hypotheses[key] = template
         
-        return base_hypotheses
+        return template.copy()
     
     def update_beliefs(self, hypotheses: Dict[str, Hypothesis], evidence_list: List[Evidence]) -> Dict[str, Hypothesis]:
         """Update belief scores based on collected evidence."""
-        updated_hypotheses = hypotheses.copy()
+        # Copying keeps the belief order; each write below repositions one entry
+        updated_hypotheses = self._ranked(hypotheses).copy()
         
         for evidence in evidence_list:
             if evidence.hypothesis_name in updated_hypotheses:
@@ -94,32 +75,29 @@ class PolicyEngine:
         """
         
         # Get the top hypotheses by belief score
-        sorted_hypotheses = sorted(hypotheses.items(), key=lambda x: x[1].belief, reverse=True)
-        top_hypothesis = sorted_hypotheses[0][1] if sorted_hypotheses else None
+        ranked = self._ranked(hypotheses)
+        top_hypothesis = ranked.top()
         
         if not top_hypothesis:
             return None
         
+        used_tools = ctx.previous_results.keys()
+        
         # Check if we meet confidence thresholds BUT still need minimum 3 steps (assignment requirement)
         if top_hypothesis.belief >= 0.8 and ctx.step >= 3:
             return None  # Stop - very high confidence after minimum steps
         
         if top_hypothesis.belief >= 0.7 and ctx.step >= 3:
             # For ≥0.7 confidence, also check if preferred tools are completed
-            used_tools = set(ctx.previous_results.keys())
-            preferred_tools = self.get_tool_preferences().get(top_hypothesis.name, [])
-            tools_completed = all(tool in used_tools for tool in preferred_tools)
-            
-            if tools_completed:
+            if self.plan.tools_completed(top_hypothesis.name, used_tools):
                 return None  # Stop - high confidence + tools completed + minimum steps
             # Otherwise continue even with high confidence if tools not completed
         
         # Select tool based on information gain potential
         
         # Find best tool based on top hypotheses (prioritize mapped tools)
-        used_tools = set(ctx.previous_results.keys())
-        for hyp_name, hyp in sorted_hypotheses:  # Check ALL hypotheses in order
-            preferred_tools = self.get_tool_preferences().get(hyp_name, [])
+        for hyp_name, hyp in ranked.iter_ranked():  # Check ALL hypotheses in order
+            preferred_tools = self.plan.tools_for(hyp_name)
             
             for tool_name in preferred_tools:
                 if tool_name not in used_tools:
@@ -128,36 +106,49 @@ class PolicyEngine:
         # If no mapped tools available, don't use fallback - let agent stop naturally
         return None
     
-    def get_tool_preferences(self) -> Dict[str, List[str]]:
-        """Get the mapping of hypotheses to preferred tools."""
-        return {
-            'h1_low_bids': ['ads_metrics', 'inventory'],
-            'h2_keyword_coverage': ['ads_metrics', 'listing_audit'],
-            'h3_competitor_pressure': ['competitor', 'ads_metrics'],
-            'h4_listing_quality': ['listing_audit', 'competitor'],
-            'h5_broad_match_waste': ['ads_metrics']
-        }
+    def get_tool_preferences(self) -> Mapping[str, Tuple[str, ...]]:
+        """Get the (read-only, precomputed) mapping of hypotheses to preferred tools."""
+        return self.plan.hypothesis_tools
+    
+    def rank_hypotheses(self, hypotheses: Dict[str, Hypothesis], limit: Optional[int] = None) -> List[Tuple[str, Hypothesis]]:
+        """Return (name, hypothesis) pairs ordered by descending belief."""
+        if isinstance(hypotheses, RankedHypotheses):
+            return hypotheses.ranked(limit)
+        sorted_hyps = sorted(hypotheses.items(), key=lambda x: x[1].belief, reverse=True)
+        return sorted_hyps if limit is None else sorted_hyps[:limit]
+    
+    def top_hypothesis(self, hypotheses: Dict[str, Hypothesis]) -> Optional[Hypothesis]:
+        """Return the highest-belief hypothesis, or None when there are none."""
+        if isinstance(hypotheses, RankedHypotheses):
+            return hypotheses.top()
+        return max(hypotheses.values(), key=lambda h: h.belief) if hypotheses else None
+    
+    def _ranked(self, hypotheses: Dict[str, Hypothesis]) -> RankedHypotheses:
+        """Return hypotheses as a RankedHypotheses, wrapping plain dicts once."""
+        if isinstance(hypotheses, RankedHypotheses):
+            return hypotheses
+        return RankedHypotheses(hypotheses)
     
     def should_stop(self, hypotheses: Dict[str, Hypothesis], ctx: AgentContext) -> Tuple[bool, str]:
         """Determine if agent should stop execution."""
         
         if not hypotheses:
+            metrics.stop_reasons.inc('no_hypotheses')
             return True, "No hypotheses to evaluate"
         
         # Get top hypothesis
-        top_hypothesis = max(hypotheses.values(), key=lambda h: h.belief)
+        top_hypothesis = self.top_hypothesis(hypotheses)
+        used_tools = ctx.previous_results.keys()
         
         # Very high confidence (≥ 0.8) but still require minimum 3 steps (assignment requirement)
         if top_hypothesis.belief >= 0.8 and ctx.step >= 3:
+            metrics.stop_reasons.inc('very_high_confidence')
             return True, f"Very high confidence in {top_hypothesis.name} (belief={top_hypothesis.belief:.2f})"
         
         # High confidence threshold (≥ 0.7) but require minimum 3 steps AND tool completion (assignment requirement)
         if top_hypothesis.belief >= 0.7 and ctx.step >= 3:
-            used_tools = set(ctx.previous_results.keys())
-            preferred_tools = self.get_tool_preferences().get(top_hypothesis.name, [])
-            tools_completed = all(tool in used_tools for tool in preferred_tools)
-            
-            if tools_completed:
+            if self.plan.tools_completed(top_hypothesis.name, used_tools):
+                metrics.stop_reasons.inc('high_confidence_tools_completed')
                 return True, f"High confidence in {top_hypothesis.name} (belief={top_hypothesis.belief:.2f}) with all preferred tools completed"
             # Otherwise continue even with high confidence if tools not completed
         
@@ -165,13 +156,12 @@ class PolicyEngine:
         if ctx.step >= 3:
             # Check for low marginal information gain
             if ctx.step >= 5:
+                metrics.stop_reasons.inc('max_iterations')
                 return True, f"Maximum iterations reached with top hypothesis {top_hypothesis.name} (belief={top_hypothesis.belief:.2f})"
             
             # Check if we've used all main tools
-            main_tools = {'ads_metrics', 'competitor', 'listing_audit'}
-            used_tools = set(ctx.previous_results.keys())
-            
-            if main_tools.issubset(used_tools) and top_hypothesis.belief < 0.4:
+            if self.plan.main_tools.issubset(used_tools) and top_hypothesis.belief < 0.4:
+                metrics.stop_reasons.inc('main_tools_low_confidence')
                 return True, f"All main tools used with low confidence (belief={top_hypothesis.belief:.2f})"
         
         return False, ""
@@ -188,7 +178,7 @@ class PolicyEngine:
             }
         
         # Get top hypotheses
-        sorted_hyps = sorted(hypotheses.items(), key=lambda x: x[1].belief, reverse=True)
+        sorted_hyps = self.rank_hypotheses(hypotheses, limit=3)
         top_hypothesis = sorted_hyps[0][1]
         
         # Generate recommendations based on top hypothesis
@@ -226,36 +216,7 @@ class PolicyEngine:
     def _generate_recommendations(self, hypothesis_name: str, confidence: float, ctx: AgentContext) -> List[str]:
         """Generate specific recommendations based on hypothesis."""
         
-        recs = {
-            'h1_low_bids': [
-                'Increase bid amounts for high-performing keywords',
-                'Implement automated bid adjustments based on performance',
-                'Focus budget on keywords with proven conversion potential'
-            ],
-            'h2_keyword_coverage': [
-                'Expand keyword list with relevant long-tail terms',
-                'Add phrase and exact match variants of performing keywords',
-                'Research competitor keywords for expansion opportunities'
-            ],
-            'h3_competitor_pressure': [
-                'Differentiate product positioning in ads and listing',
-                'Focus on unique value propositions and features',
-                'Consider niche keyword targeting to avoid direct competition'
-            ],
-            'h4_listing_quality': [
-                'Optimize product title with high-performing keywords',
-                'Improve main product images and add lifestyle shots',
-                'Enhance product descriptions and bullet points',
-                'Add or improve A+ Content'
-            ],
-            'h5_broad_match_waste': [
-                'Convert broad match keywords to phrase or exact match',
-                'Add negative keywords to filter irrelevant traffic',
-                'Review search term reports and optimize accordingly'
-            ]
-        }
-        
-        base_recs = recs.get(hypothesis_name, ['Review performance data and adjust strategy'])
+        base_recs = self.registry.recommendations(hypothesis_name) or ['Review performance data and adjust strategy']
         
         # Adjust recommendations based on confidence
         if confidence < 0.4:
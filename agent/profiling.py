@@ -0,0 +1,317 @@
+"""
+Profiling hooks for single runs and whole batches.
+
+``Profiler`` wraps any block with ``cProfile`` (deterministic, written as
+``.pstats``), a low-overhead stack sampler (written as collapsed stacks for
+``flamegraph.pl`` / speedscope), or both. Time is attributed to agent
+components by the innermost repository frame on the stack, so library calls
+such as rich rendering or orjson encoding count toward the module that made them.
+
+Usage:
+    python -m agent.profiling scenarios/*.json
+    python -m agent.profiling scenarios/*.json --mode sample --repeat 5 --out profiles
+"""
+
+import argparse
+import cProfile
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from .instrumentation import ns_to_ms
+
+PROFILE_MODES = ('cprofile', 'sample', 'both')
+COMPONENTS = ('policy', 'tools', 'display', 'trace_save', 'report', 'loop', 'other')
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# (component, repo-relative path prefix, function-name prefix or None); first match wins
+_COMPONENT_RULES = (
+    ('policy', 'agent/policy.py', None),
+    ('policy', 'agent/plan.py', None),
+    ('policy', 'agent/batch_policy.py', None),
+    ('policy', 'agent/evidence.py', None),
+    ('policy', 'agent/registry.py', None),
+    ('tools', 'tools/', None),
+    ('display', 'agent/reasoning.py', None),
+    ('trace_save', 'agent/memory.py', None),
+    ('report', 'enhanced_report.py', None),
+    ('report', 'report_', None),
+    ('report', 'demo.py', 'generate_'),
+    ('display', 'demo.py', None),
+    ('loop', 'agent/', None),
+)
+
+_FuncKey = Tuple[str, int, str]
+
+
+def _repo_path(filename: str) -> Optional[str]:
+    """Repository-relative posix path of a source file, or None for code outside the repo."""
+    try:
+        return Path(filename).resolve().relative_to(REPO_ROOT).as_posix()
+    except (ValueError, OSError):
+        return None
+
+
+def _short_path(filename: str) -> str:
+    """Readable frame location: repo-relative, or relative to site-packages/stdlib."""
+    rel = _repo_path(filename)
+    if rel is not None:
+        return rel
+    for marker in ('site-packages/', 'dist-packages/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return Path(filename).name
+
+
+class _Classifier:
+    """Memoized file/function -> component lookup."""
+
+    def __init__(self):
+        self._paths: Dict[str, Optional[str]] = {}
+
+    def __call__(self, filename: str, function: str) -> Optional[str]:
+        if filename not in self._paths:
+            self._paths[filename] = _repo_path(filename)
+        rel = self._paths[filename]
+        if rel is None or rel == 'agent/profiling.py':
+            return None
+        for component, prefix, func_prefix in _COMPONENT_RULES:
+            if rel.startswith(prefix) and (func_prefix is None or function.startswith(func_prefix)):
+                return component
+        return None
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a daemon thread at a fixed interval."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                # Code objects are cheap to hash; formatting happens once at write time
+                self.stacks[tuple(reversed(codes))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> List[str]:
+        """``root;...;leaf count`` lines, merged by formatted frame."""
+        merged: Counter = Counter()
+        for codes, count in self.stacks.items():
+            frames = (f"{_short_path(code.co_filename)}:{code.co_name}" for code in codes
+                      if code.co_filename != __file__)
+            merged[';'.join(frames)] += count
+        return [f"{stack} {count}" for stack, count in sorted(merged.items()) if stack]
+
+    def components(self, classify: _Classifier) -> Dict[str, int]:
+        """Sample counts per component, keyed by the innermost repository frame."""
+        counts = {component: 0 for component in COMPONENTS}
+        for codes, count in self.stacks.items():
+            component = 'other'
+            for code in reversed(codes):
+                found = classify(code.co_filename, code.co_name)
+                if found:
+                    component = found
+                    break
+            counts[component] += count
+        return counts
+
+
+def _pstats_components(stats: pstats.Stats, classify: _Classifier, max_rounds: int = 500) -> Dict[str, float]:
+    """Self time per component in seconds.
+
+    Functions outside the repository have no component of their own; their self
+    time is pushed up the caller graph, split in proportion to the time each
+    caller spent in them, until it reaches a repository frame. Mutually
+    recursive library code (rich renderables) just takes a few more rounds.
+    """
+    table = stats.stats
+    seconds = {component: 0.0 for component in COMPONENTS}
+    owners: Dict[_FuncKey, Optional[str]] = {func: classify(func[0], func[2]) for func in table}
+    pending: Dict[_FuncKey, float] = {func: entry[2] for func, entry in table.items() if entry[2] > 0}
+
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        carried: Dict[_FuncKey, float] = {}
+        for func, amount in pending.items():
+            owner = owners.get(func)
+            if owner:
+                seconds[owner] += amount
+                continue
+            callers = table[func][4] if func in table else {}
+            weights = [(caller, entry[3]) for caller, entry in callers.items() if caller != func and entry[3] > 0]
+            total = sum(weight for _, weight in weights)
+            if total <= 0:
+                seconds['other'] += amount
+                continue
+            for caller, weight in weights:
+                carried[caller] = carried.get(caller, 0.0) + amount * weight / total
+        pending = carried
+    seconds['other'] += sum(pending.values())
+    return seconds
+
+
+class Profiler:
+    """Profile a block with cProfile, the stack sampler, or both.
+
+    Use as a context manager or with ``start()``/``stop()``; ``write()`` saves
+    ``<name>.pstats``, ``<name>.collapsed`` and ``<name>.components.json``
+    (whichever apply to the mode) and returns the component breakdown.
+    """
+
+    def __init__(self, mode: str = 'both', out_dir: str = './profiles', name: Optional[str] = None,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.out_dir = Path(out_dir)
+        self.name = name or f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.profile = cProfile.Profile() if mode in ('cprofile', 'both') else None
+        self.sampler = StackSampler(interval) if mode in ('sample', 'both') else None
+        self.wall_ns = 0
+        self._started_ns: Optional[int] = None
+
+    def start(self) -> None:
+        self._started_ns = perf_counter_ns()
+        if self.sampler:
+            self.sampler.start()
+        if self.profile:
+            self.profile.enable()
+
+    def stop(self) -> None:
+        if self._started_ns is None:
+            return
+        if self.profile:
+            self.profile.disable()
+        if self.sampler:
+            self.sampler.stop()
+        self.wall_ns += perf_counter_ns() - self._started_ns
+        self._started_ns = None
+
+    def __enter__(self) -> 'Profiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Per-component attribution from each active profiler."""
+        classify = _Classifier()
+        report: Dict[str, Any] = {'mode': self.mode, 'wall_ms': ns_to_ms(self.wall_ns)}
+        if self.profile:
+            seconds = _pstats_components(pstats.Stats(self.profile), classify)
+            total = sum(seconds.values()) or 1.0
+            report['cprofile'] = {
+                component: {'self_ms': round(value * 1000, 3), 'share': round(value / total, 4)}
+                for component, value in seconds.items()
+            }
+        if self.sampler:
+            counts = self.sampler.components(classify)
+            total = sum(counts.values()) or 1
+            report['sampling'] = {
+                'interval_ms': self.sampler.interval * 1000,
+                'samples': self.sampler.samples,
+                'components': {
+                    component: {'samples': count, 'share': round(count / total, 4)}
+                    for component, count in counts.items()
+                }
+            }
+        return report
+
+    def write(self) -> Dict[str, Any]:
+        """Write profile artifacts and return the breakdown with their paths."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        base = self.out_dir / self.name
+        report = self.breakdown()
+        files = {}
+        if self.profile:
+            files['pstats'] = str(base.with_suffix('.pstats'))
+            self.profile.dump_stats(files['pstats'])
+        if self.sampler:
+            files['collapsed'] = str(base.with_suffix('.collapsed'))
+            with open(files['collapsed'], 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.sampler.collapsed()) + '\n')
+        files['components'] = str(base.with_suffix('.components.json'))
+        report['files'] = files
+        with open(files['components'], 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        return report
+
+    def top_functions(self, limit: int = 15, sort: str = 'cumulative') -> str:
+        """pstats text table of the hottest functions (cProfile modes only)."""
+        if not self.profile:
+            return ''
+        buffer = io.StringIO()
+        pstats.Stats(self.profile, stream=buffer).strip_dirs().sort_stats(sort).print_stats(limit)
+        return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Profile the agent over a batch of scenarios')
+    parser.add_argument('scenarios', nargs='+', help='Scenario JSON files')
+    parser.add_argument('--mode', choices=PROFILE_MODES, default='both')
+    parser.add_argument('--out', default='./profiles', help='Directory for .pstats/.collapsed output')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per scenario')
+    parser.add_argument('--interval', type=float, default=DEFAULT_SAMPLE_INTERVAL, help='Sampling interval in seconds')
+    parser.add_argument('--verbose', action='store_true', help='Keep the per-step reasoning output')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(REPO_ROOT))
+    from demo import generate_markdown_summary, load_scenario
+    from .loop import AgentLoop
+    from .reasoning import console
+
+    scenarios = [(path, *load_scenario(path)) for path in args.scenarios]
+    agent = AgentLoop()
+    console.quiet = not args.verbose
+
+    # Rendering still runs when quiet, so display cost stays in the profile
+    with Profiler(args.mode, args.out, interval=args.interval) as profiler:
+        for _ in range(args.repeat):
+            for path, scenario_input, data_dir in scenarios:
+                result = agent.run(scenario_input, data_dir, {})
+                trace_data = agent.trace_manager.load_trace(result['trace_file'])
+                generate_markdown_summary(result, scenario_input, trace_data)
+
+    console.quiet = False
+    report = profiler.write()
+    agent.display.show_profile(report, runs=args.repeat * len(scenarios))
+
+
+if __name__ == '__main__':
+    main()
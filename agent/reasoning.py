@@ -11,6 +11,7 @@ from rich.text import Text
 from rich.json import JSON
 
 from .types import Hypothesis, ToolResult
+from .registry import Registry, get_registry
 
 console = Console()
 
@@ -18,8 +19,9 @@ console = Console()
 class ReasoningDisplay:
     """Handles structured display of agent reasoning process."""
     
-    def __init__(self):
+    def __init__(self, registry: Registry = None):
         self.console = console
+        self.registry = registry or get_registry()
     
     def show_observe(self, step: int, context: Dict[str, Any]) -> None:
         """Display observation phase information."""
@@ -322,16 +324,54 @@ class ReasoningDisplay:
         # Add separator for clean output
         self.console.print("=" * 80)
     
+    def show_timings(self, summary: Dict[str, Dict[str, Any]], runs: int = 1) -> None:
+        """Display per-phase and per-tool timing histograms."""
+        
+        table = Table(title=f"⏱️  TIMINGS ({runs} run{'s' if runs != 1 else ''}, ms)", show_header=True, header_style="bold magenta")
+        table.add_column("Span", style="cyan", no_wrap=True, min_width=26)
+        for column in ("n", "Mean", "p50", "p99", "Max", "Total"):
+            table.add_column(column, justify="right", no_wrap=True)
+        
+        for name, stats in summary.items():
+            table.add_row(
+                name,
+                str(stats['count']),
+                *(f"{stats[key]:.2f}" for key in ('mean_ms', 'p50_ms', 'p99_ms', 'max_ms', 'total_ms'))
+            )
+        
+        self.console.print(table)
+    
+    def show_profile(self, report: Dict[str, Any], runs: int = 1) -> None:
+        """Display the per-component profile breakdown and written artifacts."""
+    
+        table = Table(title=f"🔬 PROFILE ({runs} run{'s' if runs != 1 else ''}, {report['wall_ms']:.0f} ms wall)", show_header=True, header_style="bold magenta")
+        table.add_column("Component", style="cyan", no_wrap=True, min_width=12)
+        cprofile = report.get('cprofile')
+        sampling = report.get('sampling')
+        if cprofile:
+            table.add_column("Self ms", justify="right", no_wrap=True)
+            table.add_column("Share", justify="right", no_wrap=True)
+        if sampling:
+            table.add_column("Samples", justify="right", no_wrap=True)
+            table.add_column("Share", justify="right", no_wrap=True)
+    
+        components = (cprofile or sampling['components']).keys()
+        for component in components:
+            row = [component]
+            if cprofile:
+                row += [f"{cprofile[component]['self_ms']:.1f}", f"{cprofile[component]['share']:.1%}"]
+            if sampling:
+                stats = sampling['components'][component]
+                row += [str(stats['samples']), f"{stats['share']:.1%}"]
+            table.add_row(*row)
+    
+        self.console.print(table)
+        for kind, path in report.get('files', {}).items():
+            self.console.print(f"[dim]   {kind}: {path}[/dim]")
+    
     def _format_hypothesis_name(self, name: str) -> str:
         """Format hypothesis names for better readability."""
-        name_map = {
-            'h1_low_bids': 'Low Bid Amounts',
-            'h2_keyword_coverage': 'Keyword Coverage',
-            'h3_competitor_pressure': 'Competitor Pressure',
-            'h4_listing_quality': 'Listing Quality',
-            'h5_broad_match_waste': 'Broad Match Waste'
-        }
-        return name_map.get(name, name.replace('_', ' ').title())
+        return self.registry.display_name(name)
     
     def _extract_key_findings(self, tool_name: str, data: Dict[str, Any]) -> List[str]:
         """Extract key findings from tool results for display."""
@@ -368,4 +408,30 @@ class ReasoningDisplay:
                 findings.append(f"Days remaining: {analysis.get('days_remaining', 0)}")
                 findings.append(f"Health status: {analysis.get('health_status', 'unknown')}")
         
-        return findings[:3]  # Limit to 3 key findings
\ No newline at end of file
+        return findings[:3]  # Limit to 3 key findings
+
+
+class HeadlessDisplay(ReasoningDisplay):
+    """Display that renders nothing, for benchmarks and batch workers."""
+    
+    def __init__(self, registry: Registry = None):
+        super().__init__(registry)
+        self.console = Console(quiet=True)
+    
+    def show_observe(self, step: int, context: Dict[str, Any]) -> None:
+        pass
+    
+    def show_hypotheses(self, hypotheses: Dict[str, Hypothesis]) -> None:
+        pass
+    
+    def show_decision(self, tool_choice: str, reasoning: str, decision_context: Dict[str, Any] = None, current_hypothesis: str = None) -> None:
+        pass
+    
+    def show_tool_result(self, result: ToolResult) -> None:
+        pass
+    
+    def show_belief_update(self, evidence_list: List, old_beliefs: Dict[str, float], new_beliefs: Dict[str, float]) -> None:
+        pass
+    
+    def show_final_action(self, action_plan: Dict[str, Any]) -> None:
+        pass
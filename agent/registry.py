@@ -0,0 +1,130 @@
+"""
+Hypothesis and tool registry.
+
+The catalogue of hypotheses, tools and their mappings is loaded once from a JSON
+config (``agent/registry.json`` by default, or the file named by the
+``AGENT_REGISTRY`` environment variable) and indexed for constant-time lookups.
+"""
+
+import os
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import orjson
+from pydantic import BaseModel
+
+from .plan import PolicyPlan
+
+DEFAULT_REGISTRY_PATH = Path(__file__).parent / 'registry.json'
+
+
+class HypothesisSpec(BaseModel):
+    """Registered hypothesis with its priors, preferred tools and recommendations."""
+    name: str
+    display_name: Optional[str] = None
+    rationale: str
+    prior: float
+    goal_priors: Dict[str, float] = {}
+    tools: List[str] = []
+    recommendations: List[str] = []
+
+
+class ToolSpec(BaseModel):
+    """Registered tool with its factory, evidence extractor and fallback guidance."""
+    name: str
+    factory: Optional[str] = None  # "module:Class"
+    evidence: Optional[str] = None  # "module:function" taking a ToolResult
+    main: bool = False
+    context_flags: Dict[str, str] = {}  # tool ctx key -> agent flag name
+    inputs: List[str] = []  # data files (relative to scenario_dir) covered by the input fingerprint
+    selection_explanation: str = 'gathering additional information'
+    fallback_purpose: str = 'additional analysis'
+    fallback_alternatives: List[str] = []
+    fallback_explanation: str = 'Continue with alternative analysis approaches'
+
+
+def _import_object(path: str) -> Any:
+    """Import "module:attribute"."""
+    module_name, _, attribute = path.partition(':')
+    return getattr(import_module(module_name), attribute)
+
+
+class Registry:
+    """Indexed catalogue of hypotheses and tools."""
+
+    def __init__(self, hypotheses: List[HypothesisSpec], tools: List[ToolSpec],
+                 asin_priors: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None):
+        self.hypotheses: Mapping[str, HypothesisSpec] = MappingProxyType({h.name: h for h in hypotheses})
+        self.tools: Mapping[str, ToolSpec] = MappingProxyType({t.name: t for t in tools})
+        self.asin_priors = MappingProxyType(dict(asin_priors or {}))
+
+        if len(self.hypotheses) != len(hypotheses) or len(self.tools) != len(tools):
+            raise ValueError("Registry contains duplicate hypothesis or tool names")
+        for spec in hypotheses:
+            unknown = [tool for tool in spec.tools if tool not in self.tools]
+            if unknown:
+                raise ValueError(f"Hypothesis {spec.name} references unregistered tools: {unknown}")
+
+        self.hypothesis_index = {name: i for i, name in enumerate(self.hypotheses)}
+        self.tool_index = {name: i for i, name in enumerate(self.tools)}
+        self.plan = PolicyPlan(
+            {spec.name: spec.tools for spec in hypotheses},
+            main_tools=[spec.name for spec in tools if spec.main]
+        )
+        self._display_names = {
+            spec.name: spec.display_name or spec.name.replace('_', ' ').title() for spec in hypotheses
+        }
+        self._extractors: Dict[str, Optional[Callable]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Registry':
+        return cls(
+            hypotheses=[HypothesisSpec(**h) for h in data.get('hypotheses', [])],
+            tools=[ToolSpec(**t) for t in data.get('tools', [])],
+            asin_priors=data.get('asin_priors')
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Registry':
+        with open(path, 'rb') as f:
+            return cls.from_dict(orjson.loads(f.read()))
+
+    def initial_beliefs(self, goal: str, asin: str = '') -> Dict[str, float]:
+        """Prior beliefs for a goal, before normalization."""
+        beliefs = {name: spec.goal_priors.get(goal, spec.prior) for name, spec in self.hypotheses.items()}
+        beliefs.update(self.asin_priors.get(asin, {}).get(goal, {}))
+        return beliefs
+
+    def display_name(self, hypothesis_name: str) -> str:
+        return self._display_names.get(hypothesis_name) or hypothesis_name.replace('_', ' ').title()
+
+    def recommendations(self, hypothesis_name: str) -> List[str]:
+        spec = self.hypotheses.get(hypothesis_name)
+        return list(spec.recommendations) if spec and spec.recommendations else []
+
+    def create_tools(self) -> Dict[str, Any]:
+        """Instantiate every registered tool that declares a factory."""
+        return {
+            name: _import_object(spec.factory)()
+            for name, spec in self.tools.items() if spec.factory
+        }
+
+    def evidence_extractor(self, tool_name: str) -> Optional[Callable]:
+        """Evidence extractor for a tool, imported on first use."""
+        if tool_name not in self._extractors:
+            spec = self.tools.get(tool_name)
+            self._extractors[tool_name] = _import_object(spec.evidence) if spec and spec.evidence else None
+        return self._extractors[tool_name]
+
+
+@lru_cache(maxsize=None)
+def _load_registry(path: str) -> Registry:
+    return Registry.from_file(path)
+
+
+def get_registry() -> Registry:
+    """Return the process-wide registry, loading it on first use."""
+    return _load_registry(os.getenv('AGENT_REGISTRY', str(DEFAULT_REGISTRY_PATH)))
@@ -0,0 +1,121 @@
+"""
+Single-pass index over a saved execution trace.
+
+Every report and summary generator needs the same view of a run: which tool
+each step selected and why, whether it succeeded, what it found, how beliefs
+moved and how long it took. ``TraceIndex.build`` derives that once in a single
+linear walk of ``execution_trace``; generators read the index instead of
+re-walking the trace with their own state machines.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+# Belief moves smaller than this are not worth reporting
+SIGNIFICANT_CHANGE = 0.01
+
+
+class TraceStep:
+    """One tool step: the decision, its action result and the belief update that followed."""
+
+    __slots__ = ('step', 'tool', 'reasoning', 'ok', 'error', 'findings', 'latency_ms', 'belief_changes', 'fallback')
+
+    def __init__(self, step: int, tool: str, reasoning: str):
+        self.step = step
+        self.tool = tool
+        self.reasoning = reasoning
+        # None until the action entry is seen
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.findings: Dict[str, Any] = {}
+        self.latency_ms: Optional[float] = None
+        self.belief_changes: Dict[str, Dict[str, float]] = {}
+        self.fallback: Optional[str] = None
+
+    @property
+    def executed(self) -> bool:
+        return self.ok is not None
+
+    def significant_changes(self, threshold: float = SIGNIFICANT_CHANGE) -> List[Tuple[str, float, float]]:
+        """``(hypothesis, old, new)`` for beliefs that moved by more than ``threshold``."""
+        changes = []
+        for hyp, change in self.belief_changes.items():
+            old = change.get('old', 0)
+            new = change.get('new', 0)
+            if abs(new - old) > threshold:
+                changes.append((hyp, old, new))
+        return changes
+
+
+class TraceIndex:
+    """Steps, tools and outcome of one run, built from its trace in one pass."""
+
+    def __init__(self, steps: List[TraceStep], final_action: Optional[Dict[str, Any]] = None,
+                 stop_reasoning: Optional[str] = None, wall_ms: Optional[float] = None, available: bool = True):
+        self.steps = steps
+        # False when built from missing trace data, so generators can say so
+        self.available = available
+        self.final_action = final_action or {}
+        self.stop_reasoning = stop_reasoning
+        self.wall_ms = wall_ms
+
+    @classmethod
+    def build(cls, trace_data: Optional[Dict[str, Any]]) -> 'TraceIndex':
+        steps: List[TraceStep] = []
+        current: Optional[TraceStep] = None
+        final_action = stop_reasoning = wall_ms = None
+
+        for entry in (trace_data or {}).get('execution_trace', ()):
+            entry_type = entry['type']
+            data = entry['data']
+
+            if entry_type == 'decision':
+                if 'selected_tool' in data:
+                    current = TraceStep(len(steps) + 1, data['selected_tool'], data.get('reasoning', 'No reasoning provided'))
+                    steps.append(current)
+                elif data.get('action') == 'stop':
+                    stop_reasoning = data.get('reasoning')
+
+            elif entry_type == 'action' and 'result' in data and current is not None:
+                result = data['result']
+                current.ok = result['ok']
+                current.findings = result.get('data') or {}
+                current.error = result.get('error') if not result['ok'] else None
+                current.latency_ms = (result.get('meta') or {}).get('latency_ms')
+
+            elif entry_type == 'update' and 'belief_changes' in data and current is not None:
+                current.belief_changes = data['belief_changes']
+
+            elif entry_type == 'fallback' and current is not None:
+                current.fallback = data.get('suggestion')
+
+            elif entry_type == 'final_action':
+                final_action = data
+
+            elif entry_type == 'timings':
+                wall_ms = data.get('wall_ms')
+
+        available = bool(trace_data) and 'execution_trace' in trace_data
+        return cls(steps, final_action, stop_reasoning, wall_ms, available)
+
+    def __iter__(self) -> Iterator[TraceStep]:
+        return iter(self.steps)
+
+    @property
+    def executed_steps(self) -> List[TraceStep]:
+        return [step for step in self.steps if step.executed]
+
+    @property
+    def tools_used(self) -> List[str]:
+        """Distinct executed tools, sorted."""
+        return sorted({step.tool for step in self.steps if step.executed})
+
+    @property
+    def failed_tools(self) -> List[str]:
+        return [step.tool for step in self.steps if step.ok is False]
+
+
+def as_index(trace: Union['TraceIndex', Dict[str, Any], None]) -> TraceIndex:
+    """Accept either a prebuilt index or raw trace data, so callers can share one index."""
+    if isinstance(trace, TraceIndex):
+        return trace
+    return TraceIndex.build(trace)
@@ -0,0 +1 @@
+"""Benchmarks for the agent's hot paths."""
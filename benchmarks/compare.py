@@ -0,0 +1,197 @@
+"""
+Compare two benchmark result sets and fail on regressions.
+
+Each side is a ``benchmarks.suite`` results file or a directory of them;
+samples from repeated suite runs are pooled per benchmark before computing the
+median and IQR. A benchmark regresses when its median slows down by more than
+the larger of ``--tolerance`` and ``--noise-factor`` times its relative IQR
+(whichever side is noisier), so noisy benchmarks need a bigger change to fail
+the gate. Changes smaller than ``--min-delta-ms`` in absolute terms never count,
+which keeps sub-millisecond benchmarks from flapping on scheduler jitter.
+
+Exit status: 0 no regressions, 1 regressions found, 2 a key benchmark or input
+is missing (with ``--strict``).
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/main.json benchmarks/results/branch.json
+    python -m benchmarks.compare base_runs/ head_runs/ --tolerance 0.05 --strict --json comparison.json
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.suite import matches, summarize
+
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_NOISE_FACTOR = 2.0
+DEFAULT_MIN_DELTA_S = 0.001
+MIN_ROUNDS = 3
+
+# Paths the regression gate must cover; produce them with
+#   python -m benchmarks.suite --filter tool.ads_metrics agent.run --keywords 1000 1000000
+KEY_BENCHMARKS = (
+    'tool.ads_metrics.run[keywords=1000000]',
+    'agent.run[keywords=*]',
+)
+
+
+def _result_files(path: Path) -> List[Path]:
+    if path.is_dir():
+        return sorted(path.glob('*.json'))
+    return [path]
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    """Pool one or more suite result files into per-benchmark summaries."""
+    files = _result_files(Path(path))
+    if not files:
+        raise FileNotFoundError(f"No benchmark results in {path}")
+
+    samples: Dict[str, List[float]] = {}
+    units: Dict[str, int] = {}
+    machines = []
+    for file in files:
+        with open(file, 'rb') as f:
+            data = orjson.loads(f.read())
+        machines.append(data.get('machine', {}))
+        for name, stats in data.get('benchmarks', {}).items():
+            samples.setdefault(name, []).extend(stats.get('samples_s') or [stats['median_s']])
+            units[name] = stats.get('units', 1)
+
+    return {
+        'files': [str(file) for file in files],
+        'machine': machines[0],
+        'mixed_machines': any(m != machines[0] for m in machines),
+        'benchmarks': {name: summarize(values, units[name]) for name, values in samples.items()}
+    }
+
+
+def _relative_iqr(stats: Dict[str, Any]) -> float:
+    return stats['iqr_s'] / stats['median_s'] if stats['median_s'] > 0 else 0.0
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE,
+            noise_factor: float = DEFAULT_NOISE_FACTOR, min_delta_s: float = DEFAULT_MIN_DELTA_S,
+            patterns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Per-benchmark deltas for benchmarks present on both sides."""
+    rows = []
+    names = sorted(set(baseline['benchmarks']) & set(candidate['benchmarks']))
+    for name in names:
+        if patterns and not any(matches(name, p) for p in patterns):
+            continue
+        base = baseline['benchmarks'][name]
+        new = candidate['benchmarks'][name]
+        delta = new['median_s'] / base['median_s'] - 1 if base['median_s'] > 0 else 0.0
+        noise = max(_relative_iqr(base), _relative_iqr(new))
+        threshold = max(tolerance, noise_factor * noise)
+
+        if min(base['rounds'], new['rounds']) < MIN_ROUNDS:
+            status = 'too_few_rounds'
+        elif abs(new['median_s'] - base['median_s']) < min_delta_s:
+            status = 'unchanged'
+        elif delta > threshold:
+            status = 'regressed'
+        elif delta < -threshold:
+            status = 'improved'
+        else:
+            status = 'unchanged'
+
+        rows.append({
+            'benchmark': name,
+            'baseline_median_s': base['median_s'],
+            'candidate_median_s': new['median_s'],
+            'baseline_rounds': base['rounds'],
+            'candidate_rounds': new['rounds'],
+            'delta': delta,
+            'noise': noise,
+            'threshold': threshold,
+            'status': status
+        })
+    return rows
+
+
+def missing_key_benchmarks(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[str]:
+    """Key benchmark patterns that do not match any benchmark present on both sides."""
+    common = set(baseline['benchmarks']) & set(candidate['benchmarks'])
+    return [pattern for pattern in KEY_BENCHMARKS if not any(matches(name, pattern) for name in common)]
+
+
+def _format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    markers = {'regressed': '❌', 'improved': '✅', 'unchanged': '  ', 'too_few_rounds': '⚠️'}
+    print(f"{'benchmark':<55} {'base ms':>10} {'new ms':>10} {'delta':>8} {'thresh':>7}  status")
+    for row in rows:
+        print(f"{row['benchmark']:<55} {_format_ms(row['baseline_median_s']):>10} "
+              f"{_format_ms(row['candidate_median_s']):>10} {row['delta']:>+8.1%} {row['threshold']:>7.1%}  "
+              f"{markers[row['status']]} {row['status']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare benchmark results and gate on regressions')
+    parser.add_argument('baseline', help='Baseline results file or directory of repeated runs')
+    parser.add_argument('candidate', help='Candidate results file or directory of repeated runs')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Minimum relative slowdown that counts as a regression (default: 0.10)')
+    parser.add_argument('--noise-factor', type=float, default=DEFAULT_NOISE_FACTOR,
+                        help='Threshold multiplier on the relative IQR of the noisier side (default: 2)')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_S * 1000,
+                        help='Ignore median changes smaller than this many milliseconds (default: 1)')
+    parser.add_argument('--filter', nargs='*', default=[], help='Benchmark name prefixes or glob patterns')
+    parser.add_argument('--strict', action='store_true', help='Fail when key benchmarks are missing')
+    parser.add_argument('--json', help='Also write the comparison as JSON')
+    args = parser.parse_args()
+
+    try:
+        baseline = load_results(Path(args.baseline))
+        candidate = load_results(Path(args.candidate))
+    except (FileNotFoundError, orjson.JSONDecodeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if baseline['machine'] != candidate['machine'] or baseline['mixed_machines'] or candidate['mixed_machines']:
+        print("Warning: results come from different machines or Python/numpy versions; deltas may not be meaningful",
+              file=sys.stderr)
+
+    rows = compare(baseline, candidate, args.tolerance, args.noise_factor, args.min_delta_ms / 1000, args.filter)
+    print_report(rows)
+
+    only_one_side = sorted(set(baseline['benchmarks']) ^ set(candidate['benchmarks']))
+    if only_one_side:
+        print(f"\nNot compared (present on one side only): {', '.join(only_one_side)}")
+
+    missing = missing_key_benchmarks(baseline, candidate)
+    if missing:
+        print(f"{'Error' if args.strict else 'Warning'}: key benchmarks not covered: {', '.join(missing)}",
+              file=sys.stderr)
+
+    regressions = [row for row in rows if row['status'] == 'regressed']
+    if args.json:
+        with open(args.json, 'wb') as f:
+            f.write(orjson.dumps({
+                'baseline': baseline['files'],
+                'candidate': candidate['files'],
+                'tolerance': args.tolerance,
+                'noise_factor': args.noise_factor,
+                'min_delta_s': args.min_delta_ms / 1000,
+                'missing_key_benchmarks': missing,
+                'results': rows
+            }, option=orjson.OPT_INDENT_2))
+
+    print(f"\n{len(regressions)} regression(s), "
+          f"{sum(row['status'] == 'improved' for row in rows)} improvement(s), {len(rows)} compared")
+    if regressions:
+        sys.exit(1)
+    if missing and args.strict:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark keyword metrics loading: ads_keywords.json vs the columnar store.
+
+Times load + full AdsMetricsTool keyword analysis for each format and reports
+resident-set growth for the run.
+
+Usage:
+    python -m benchmarks.keyword_io
+    python -m benchmarks.keyword_io --rows 100000 1000000 --repeat 3
+"""
+
+import argparse
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import orjson
+
+sys.path.append(str(Path(__file__).parent.parent))
+from tools.ads_metrics import AdsMetricsTool
+from tools.columnar import COLUMNS_DIRNAME, write_keyword_columns
+
+MATCH_TYPES = ('broad', 'phrase', 'exact')
+
+
+def build_keywords(rows: int, seed: int = 13) -> List[Dict]:
+    """Deterministic synthetic keyword rows in the ads_keywords.json shape."""
+    rng = random.Random(seed)
+    keywords = []
+    for i in range(rows):
+        impressions = rng.randint(0, 20000)
+        clicks = rng.randint(0, max(1, impressions // 20))
+        cpc = round(rng.uniform(0.1, 1.5), 2)
+        spend = round(clicks * cpc, 2)
+        orders = rng.randint(0, max(1, clicks // 8))
+        revenue = round(orders * rng.uniform(15, 60), 2)
+        keywords.append({
+            'keyword': f'synthetic keyword {i}',
+            'match': rng.choice(MATCH_TYPES),
+            'impressions': impressions,
+            'clicks': clicks,
+            'ctr': round(clicks / impressions, 4) if impressions else 0,
+            'cpc': cpc,
+            'spend': spend,
+            'orders': orders,
+            'cvr': round(orders / clicks, 4) if clicks else 0,
+            'revenue': revenue,
+            'acos': round(spend / revenue, 2) if revenue else None
+        })
+    return keywords
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _time_run(tool: AdsMetricsTool, scenario_dir: Path, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = tool.run({'scenario_dir': str(scenario_dir), 'mode': 'keyword'})
+        best = min(best, time.perf_counter() - start)
+        if not result.ok:
+            raise RuntimeError(result.error)
+    return best * 1000
+
+
+def run(rows: int, repeat: int) -> Dict[str, float]:
+    """Return best-of-N milliseconds for the JSON and columnar keyword paths."""
+    tool = AdsMetricsTool()
+    workdir = Path(tempfile.mkdtemp(prefix='keyword_io_'))
+    try:
+        keywords = build_keywords(rows)
+        json_dir = workdir / 'json'
+        columnar_dir = workdir / 'columnar'
+        json_dir.mkdir()
+        columnar_dir.mkdir()
+        with open(json_dir / 'ads_keywords.json', 'wb') as f:
+            f.write(orjson.dumps({'keywords': keywords}))
+        write_keyword_columns(keywords, columnar_dir / COLUMNS_DIRNAME)
+        del keywords
+
+        rss_before = _max_rss_mb()
+        columnar_ms = _time_run(tool, columnar_dir, repeat)
+        rss_columnar = _max_rss_mb()
+        json_ms = _time_run(tool, json_dir, repeat)
+        rss_json = _max_rss_mb()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'rows': rows,
+        'json_ms': json_ms,
+        'columnar_ms': columnar_ms,
+        'columnar_peak_rss_growth_mb': rss_columnar - rss_before,
+        'json_peak_rss_growth_mb': rss_json - rss_columnar
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Keyword metrics load benchmark (JSON vs columnar)')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000],
+                        help='Keyword row counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'json ms':>10} {'columnar ms':>12} {'speedup':>8} {'json ΔRSS MB':>13} {'col ΔRSS MB':>12}")
+    for rows in args.rows:
+        result = run(rows, args.repeat)
+        print(f"{result['rows']:>10} {result['json_ms']:>10.1f} {result['columnar_ms']:>12.1f} "
+              f"{result['json_ms'] / result['columnar_ms']:>7.1f}x "
+              f"{result['json_peak_rss_growth_mb']:>13.1f} {result['columnar_peak_rss_growth_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Per-event overhead of the metrics hooks, enabled and disabled.
+
+Usage:
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --events 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from agent.metrics import MetricsRegistry
+
+
+def _per_event_ns(fn: Callable[[], None], events: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(events):
+        fn()
+    return (time.perf_counter_ns() - start) / events
+
+
+def run(events: int) -> Dict[str, float]:
+    """Return mean nanoseconds per counter increment and histogram observation."""
+    results = {}
+    baseline = _per_event_ns(lambda: None, events)
+    for enabled in (False, True):
+        registry = MetricsRegistry(enabled=enabled)
+        counter = registry.counter('bench_events', 'benchmark', ('tool',))
+        histogram = registry.histogram('bench_latency_seconds', 'benchmark', ('tool',))
+        state = 'enabled' if enabled else 'disabled'
+        results[f'counter_{state}_ns'] = _per_event_ns(lambda: counter.inc('ads_metrics'), events) - baseline
+        results[f'histogram_{state}_ns'] = _per_event_ns(lambda: histogram.observe(0.0042, 'ads_metrics'), events) - baseline
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Metrics hook overhead microbenchmark')
+    parser.add_argument('--events', type=int, default=500000)
+    args = parser.parse_args()
+
+    results = run(args.events)
+    print(f"{'hook':>12} {'disabled':>10} {'enabled':>10}  (ns/event)")
+    for hook in ('counter', 'histogram'):
+        print(f"{hook:>12} {results[f'{hook}_disabled_ns']:>10.0f} {results[f'{hook}_enabled_ns']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
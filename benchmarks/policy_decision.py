@@ -0,0 +1,148 @@
+"""
+Microbenchmark for per-step policy decisions.
+
+Usage:
+    python -m benchmarks.policy_decision
+    python -m benchmarks.policy_decision --hypotheses 10 50 200 --tools 15 --steps 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from agent.plan import PolicyPlan
+from agent.policy import PolicyEngine
+from agent.registry import HypothesisSpec, Registry, ToolSpec
+from agent.types import AgentContext, Evidence, Hypothesis, ScenarioInput
+
+STRENGTHS = ('strong', 'medium', 'weak', 'counter')
+
+
+def build_registry(n_hypotheses: int, n_tools: int, seed: int = 7) -> Registry:
+    """Deterministic synthetic catalogue of hypotheses and tools."""
+    rng = random.Random(seed)
+    tools = [f'tool_{t:03d}' for t in range(n_tools)]
+    return Registry(
+        hypotheses=[
+            HypothesisSpec(
+                name=f'h{h:03d}_synthetic',
+                rationale='synthetic',
+                prior=round(rng.uniform(0.05, 0.35), 3),
+                tools=rng.sample(tools, k=min(n_tools, rng.randint(1, 3)))
+            )
+            for h in range(n_hypotheses)
+        ],
+        tools=[ToolSpec(name=name, main=i < 3) for i, name in enumerate(tools)]
+    )
+
+
+def build_hypotheses(registry: Registry) -> Dict[str, Hypothesis]:
+    """Low priors so no confidence-based stop short-circuits the walk."""
+    return {
+        name: Hypothesis(name=name, belief=spec.prior, rationale=spec.rationale)
+        for name, spec in registry.hypotheses.items()
+    }
+
+
+def build_context(step: int = 1) -> AgentContext:
+    return AgentContext(
+        scenario=ScenarioInput(asin='B0BENCH', goal='increase_impressions', lookback_days=7),
+        scenario_dir='',
+        flags={},
+        step=step,
+        previous_results={},
+        hypotheses={}
+    )
+
+
+def _evidence_stream(plan: PolicyPlan, steps: int, seed: int = 11) -> List[List[Evidence]]:
+    rng = random.Random(seed)
+    names = list(plan.hypotheses)
+    return [
+        [Evidence(tool_name='bench', strength=rng.choice(STRENGTHS),
+                  hypothesis_name=rng.choice(names), description='synthetic', data_point=0)]
+        for _ in range(steps)
+    ]
+
+
+def _fresh(preferences: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {name: list(tools) for name, tools in preferences.items()}
+
+
+def _legacy_step(preferences: Dict[str, List[str]], hypotheses: Dict[str, Hypothesis],
+                 used_tools: set) -> Tuple[Dict[str, Hypothesis], object]:
+    """Decision cost before the precomputed plan: fresh tables and full sorts per call."""
+    top = max(hypotheses.values(), key=lambda h: h.belief)
+    all(tool in used_tools for tool in _fresh(preferences).get(top.name, []))
+    all(tool in used_tools for tool in _fresh(preferences).get(top.name, []))
+    sorted_hypotheses = sorted(hypotheses.items(), key=lambda x: x[1].belief, reverse=True)
+    for hyp_name, _ in sorted_hypotheses:
+        for tool_name in _fresh(preferences).get(hyp_name, []):
+            if tool_name not in used_tools:
+                return hypotheses, (tool_name, hyp_name)
+    return hypotheses, None
+
+
+def run(n_hypotheses: int, n_tools: int, steps: int) -> Dict[str, float]:
+    """Return mean per-step nanoseconds for the planned and legacy decision paths."""
+    registry = build_registry(n_hypotheses, n_tools)
+    plan = registry.plan
+    policy = PolicyEngine(registry)
+    ctx = build_context(step=1)
+    evidence = _evidence_stream(plan, steps)
+
+    # Planned path: incremental belief order + precomputed tables
+    hypotheses = policy._ranked(build_hypotheses(registry))
+    start = time.perf_counter_ns()
+    for evidence_list in evidence:
+        hypotheses = policy.update_beliefs(hypotheses, evidence_list)
+        policy.should_stop(hypotheses, ctx)
+        policy.select_next_tool(hypotheses, ctx)
+    planned_ns = (time.perf_counter_ns() - start) / steps
+
+    # Decision-only legacy path (excludes belief updates, which are shared)
+    preferences = {name: list(tools) for name, tools in plan.hypothesis_tools.items()}
+    legacy_hypotheses = build_hypotheses(registry)
+    start = time.perf_counter_ns()
+    for _ in range(steps):
+        _legacy_step(preferences, legacy_hypotheses, set())
+    legacy_ns = (time.perf_counter_ns() - start) / steps
+
+    # Decision-only planned path for a like-for-like comparison
+    start = time.perf_counter_ns()
+    for _ in range(steps):
+        policy.should_stop(hypotheses, ctx)
+        policy.select_next_tool(hypotheses, ctx)
+    decision_ns = (time.perf_counter_ns() - start) / steps
+
+    return {
+        'hypotheses': n_hypotheses,
+        'tools': n_tools,
+        'step_ns': planned_ns,
+        'decision_ns': decision_ns,
+        'legacy_decision_ns': legacy_ns
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-step policy decision microbenchmark')
+    parser.add_argument('--hypotheses', type=int, nargs='+', default=[10, 20, 50, 200],
+                        help='Catalogue sizes to benchmark')
+    parser.add_argument('--tools', type=int, default=15)
+    parser.add_argument('--steps', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'hypotheses':>10} {'tools':>6} {'update+decide':>14} {'decide':>10} {'legacy decide':>14}  (µs/step)")
+    for n_hypotheses in args.hypotheses:
+        result = run(n_hypotheses, args.tools, args.steps)
+        print(f"{result['hypotheses']:>10} {result['tools']:>6} "
+              f"{result['step_ns'] / 1000:>14.2f} {result['decision_ns'] / 1000:>10.2f} "
+              f"{result['legacy_decision_ns'] / 1000:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+"""
+Benchmark suite for the agent's end-to-end and per-component paths.
+
+Each benchmark has a setup step (untimed) that returns the callable to time;
+every callable runs ``--warmup`` untimed rounds and then ``--repeat`` timed
+rounds. Results are written as JSON with raw per-round samples and summary
+statistics (median, IQR, ...) so runs can be compared over time with
+``benchmarks.compare``.
+
+Benchmarks (``[keywords=N]`` suffixes for each ``--keywords`` size):
+- ``agent.run``                      end-to-end AgentLoop.run, headless display
+- ``tool.<name>.run``                each tool's run() against the synthetic scenario
+- ``trace.save``                     TraceManager.save_trace for a full run's memory
+- ``batch.run[asins=N]``             N headless runs over a partitioned dataset
+- ``report.context``                 building the enhanced-report prompt context from a run's trace
+- ``report.generate[backend=template]`` enhanced reports from the local template backend
+- ``report.portfolio[format=F]``     one consolidated portfolio report of template-backend sections
+
+Synthetic data is generated once per configuration under ``--data-dir``.
+
+Usage:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --keywords 1000 100000 1000000 --repeat 7 --out benchmarks/results/local.json
+    python -m benchmarks.suite --filter tool.ads_metrics --keywords 1000000
+"""
+
+import argparse
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+sys.path.append(str(Path(__file__).parent.parent))
+from agent.loop import AgentLoop
+from agent.memory import TraceManager, WorkingMemory
+from agent.trace_index import TraceIndex
+from agent.types import ScenarioInput
+from benchmarks.synthetic import GeneratedScenarios, generate
+from enhanced_report import EnhancedReportGenerator
+from report_backends import TemplateBackend
+from report_cache import ResponseCache
+from report_portfolio import FORMATS, PortfolioReport
+
+SCHEMA_VERSION = 1
+DEFAULT_DATA_DIR = Path(__file__).parent / '.data'
+DEFAULT_RESULTS_DIR = Path(__file__).parent / 'results'
+
+# name -> setup(suite) returning [(parametrized name, callable, units per call)]
+Setup = Callable[['Suite'], List[Tuple[str, Callable[[], Any], int]]]
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark setup function."""
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def matches(name: str, pattern: str) -> bool:
+    """Prefix or ``*``-glob match; brackets in names are literal."""
+    regex = '.*'.join(re.escape(part) for part in pattern.split('*'))
+    return name.startswith(pattern) or re.fullmatch(regex, name) is not None
+
+
+def summarize(samples: List[float], units: int = 1) -> Dict[str, Any]:
+    """Summary statistics of per-round wall times in seconds."""
+    ordered = sorted(samples)
+    q1, median, q3 = np.percentile(ordered, [25, 50, 75]).tolist()
+    return {
+        'rounds': len(ordered),
+        'min_s': ordered[0],
+        'max_s': ordered[-1],
+        'mean_s': statistics.fmean(ordered),
+        'stdev_s': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'median_s': median,
+        'q1_s': q1,
+        'q3_s': q3,
+        'iqr_s': q3 - q1,
+        'units': units,
+        'ops_per_s': units / median if median > 0 else None,
+        'samples_s': samples
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Suite:
+    """Shared synthetic data and scratch directories for one suite run."""
+
+    def __init__(self, data_dir: Path, keyword_sizes: List[int], campaigns: int, batch_asins: int, seed: int):
+        self.data_dir = Path(data_dir)
+        self.keyword_sizes = keyword_sizes
+        self.campaigns = campaigns
+        self.batch_asins = batch_asins
+        self.seed = seed
+        self.scratch = Path(tempfile.mkdtemp(prefix='agent-bench-'))
+        self._generated: Dict[Tuple, GeneratedScenarios] = {}
+
+    def scenarios(self, keywords: int, asins: int = 1) -> GeneratedScenarios:
+        """Generated (or previously generated) scenario set for a configuration."""
+        key = (keywords, self.campaigns, asins, self.seed)
+        if key not in self._generated:
+            name = f'kw{keywords}_c{self.campaigns}_a{asins}_s{self.seed}'
+            root = self.data_dir / name
+            marker = root / 'complete.json'
+            if not marker.exists():
+                print(f"  generating {name} ...", file=sys.stderr)
+                generate(root, name, keywords, self.campaigns, asins, self.seed)
+                marker.write_bytes(orjson.dumps({'keywords': keywords, 'campaigns': self.campaigns, 'asins': asins}))
+            scenario_files = sorted((root / 'scenarios').glob('scenario_*.json'))
+            asin_list = [orjson.loads(p.read_bytes())['asin'] for p in scenario_files]
+            self._generated[key] = GeneratedScenarios(root / 'mock' / name, scenario_files, asin_list)
+        return self._generated[key]
+
+    def load_scenario(self, path: Path) -> ScenarioInput:
+        return ScenarioInput(**orjson.loads(path.read_bytes()))
+
+    def agent(self) -> AgentLoop:
+        return AgentLoop(headless=True, trace_dir=str(self.scratch / 'trace'))
+
+
+@benchmark('agent.run')
+def bench_agent_run(suite: Suite):
+    cases = []
+    agent = suite.agent()
+    for size in suite.keyword_sizes:
+        generated = suite.scenarios(size)
+        scenario = suite.load_scenario(generated.scenario_files[0])
+        data_dir = str(generated.data_dir)
+        cases.append((f'agent.run[keywords={size}]', lambda s=scenario, d=data_dir: agent.run(s, d, {}), 1))
+    return cases
+
+
+@benchmark('tool.*.run')
+def bench_tools(suite: Suite):
+    cases = []
+    tools = suite.agent().tools
+    for size in suite.keyword_sizes:
+        generated = suite.scenarios(size)
+        scenario = suite.load_scenario(generated.scenario_files[0])
+        base_ctx = {
+            'scenario_dir': str(generated.data_dir),
+            'asin': scenario.asin,
+            'lookback_days': scenario.lookback_days,
+            'flags': {}
+        }
+        for name, tool in tools.items():
+            variants = [('', {})]
+            if name == 'ads_metrics':
+                variants = [('', {'mode': 'keyword'}), (',mode=campaign', {'mode': 'campaign'})]
+            for suffix, extra in variants:
+                ctx = dict(base_ctx, **extra)
+                cases.append((f'tool.{name}.run[keywords={size}{suffix}]', lambda t=tool, c=ctx: _checked(t.run(dict(c))), 1))
+    return cases
+
+
+def _checked(result):
+    if not result.ok:
+        raise RuntimeError(f"{result.name} failed: {result.error}")
+    return result
+
+
+@benchmark('trace.save')
+def bench_trace_save(suite: Suite):
+    cases = []
+    agent = suite.agent()
+    manager = TraceManager(str(suite.scratch / 'trace_save'))
+    for size in suite.keyword_sizes:
+        generated = suite.scenarios(size)
+        scenario = suite.load_scenario(generated.scenario_files[0])
+        # Rebuild a full run's memory: every tool result plus decision/action entries
+        memory = WorkingMemory(scenario, str(generated.data_dir), {})
+        memory.update_hypotheses(agent.policy.initialize_hypotheses(scenario))
+        for name, tool in agent.tools.items():
+            memory.advance_step()
+            result = tool.run({'scenario_dir': str(generated.data_dir), 'asin': scenario.asin,
+                               'lookback_days': scenario.lookback_days, 'flags': {}})
+            memory.add_tool_result(name, result)
+            memory.add_trace_entry('decision', {'selected_tool': name, 'reasoning': 'benchmark'})
+            memory.add_trace_entry('action', {'tool': name, 'result': result.model_dump()})
+        final_action = agent.policy.decide_action(memory.hypotheses, memory.get_context())
+        cases.append((f'trace.save[keywords={size}]', lambda m=memory, a=final_action: manager.save_trace(m, a), 1))
+    return cases
+
+
+@benchmark('batch.run')
+def bench_batch(suite: Suite):
+    generated = suite.scenarios(200, asins=suite.batch_asins)
+    scenarios = [suite.load_scenario(path) for path in generated.scenario_files]
+    data_dir = str(generated.data_dir)
+    agent = suite.agent()
+
+    def run_batch():
+        for scenario in scenarios:
+            agent.run(scenario, data_dir, {})
+
+    return [(f'batch.run[asins={len(scenarios)}]', run_batch, len(scenarios))]
+
+
+@benchmark('report.context')
+def bench_report_context(suite: Suite):
+    cases = []
+    agent = suite.agent()
+    generator = EnhancedReportGenerator(backend=TemplateBackend(), cache=ResponseCache(enabled=False))
+    for size in suite.keyword_sizes:
+        generated = suite.scenarios(size)
+        scenario = suite.load_scenario(generated.scenario_files[0])
+        result = agent.run(scenario, str(generated.data_dir), {})
+        trace_data = agent.trace_manager.load_trace(result['trace_file'])
+        cases.append((f'report.context[keywords={size}]',
+                      lambda r=result, s=scenario, t=trace_data:
+                      generator._prepare_analysis_context(r, s, TraceIndex.build(t)), 1))
+    return cases
+
+
+@benchmark('report.generate')
+def bench_report(suite: Suite, reports: int = 100):
+    generated = suite.scenarios(suite.keyword_sizes[0])
+    scenario = suite.load_scenario(generated.scenario_files[0])
+    agent = suite.agent()
+    result = agent.run(scenario, str(generated.data_dir), {})
+    trace_data = agent.trace_manager.load_trace(result['trace_file'])
+    generator = EnhancedReportGenerator(backend=TemplateBackend(), cache=ResponseCache(enabled=False),
+                                        reports_dir=str(suite.scratch / 'reports'))
+
+    def run_reports():
+        for _ in range(reports):
+            generator.generate_enhanced_report(result, scenario, trace_data)
+
+    return [('report.generate[backend=template]', run_reports, reports)]
+
+
+@benchmark('report.portfolio')
+def bench_report_portfolio(suite: Suite, sections: int = 100):
+    generated = suite.scenarios(suite.keyword_sizes[0])
+    scenario = suite.load_scenario(generated.scenario_files[0])
+    agent = suite.agent()
+    result = agent.run(scenario, str(generated.data_dir), {})
+    trace_index = TraceIndex.build(agent.trace_manager.load_trace(result['trace_file']))
+    generator = EnhancedReportGenerator(backend=TemplateBackend(), cache=ResponseCache(enabled=False))
+
+    def run_portfolio(fmt: str):
+        portfolio = PortfolioReport(suite.scratch / f'portfolio.{fmt}')
+        for _ in range(sections):
+            portfolio.add(result, scenario, generator.render_report(result, scenario, trace_index))
+        portfolio.close()
+
+    return [(f'report.portfolio[format={fmt}]', lambda f=fmt: run_portfolio(f), sections) for fmt in FORMATS]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).parent.parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__
+    }
+
+
+def _wanted(name: str, patterns: List[str]) -> bool:
+    """Whether any filter could match a case of the registered benchmark ``name``."""
+    prefix = name.split('*')[0]
+    return not patterns or any(p.startswith(prefix) or prefix.startswith(p.split('*')[0]) for p in patterns)
+
+
+def run_suite(suite: Suite, patterns: List[str], repeat: int, warmup: int) -> Dict[str, Any]:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if not _wanted(name, patterns):
+            continue
+        for case_name, fn, units in setup(suite):
+            if patterns and not any(matches(case_name, p) for p in patterns):
+                continue
+            samples = measure(fn, repeat, warmup)
+            results[case_name] = summarize(samples, units)
+            stats = results[case_name]
+            print(f"{case_name:<55} median {stats['median_s'] * 1000:>10.2f} ms  "
+                  f"IQR {stats['iqr_s'] * 1000:>8.2f} ms  ({stats['rounds']} rounds)")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Agent benchmark suite')
+    parser.add_argument('--keywords', type=int, nargs='+', default=[1000, 100000], help='Keyword rows per scenario (1k-5M)')
+    parser.add_argument('--campaigns', type=int, default=50, help='Campaigns per ASIN')
+    parser.add_argument('--batch-asins', type=int, default=100, help='ASINs in the batch throughput dataset')
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed rounds per benchmark')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed rounds per benchmark')
+    parser.add_argument('--filter', nargs='*', default=[], help='Benchmark name prefixes or glob patterns')
+    parser.add_argument('--data-dir', default=str(DEFAULT_DATA_DIR), help='Cache for generated synthetic data')
+    parser.add_argument('--out', help='Results JSON path (default: benchmarks/results/<timestamp>.json)')
+    args = parser.parse_args()
+
+    suite = Suite(Path(args.data_dir), args.keywords, args.campaigns, args.batch_asins, args.seed)
+    started = datetime.now()
+    results = run_suite(suite, args.filter, args.repeat, args.warmup)
+
+    out = Path(args.out) if args.out else DEFAULT_RESULTS_DIR / f"{started.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'wb') as f:
+        f.write(orjson.dumps({
+            'schema': SCHEMA_VERSION,
+            'created': started.isoformat(),
+            'commit': _git_commit(),
+            'machine': machine_info(),
+            'config': {
+                'keywords': args.keywords,
+                'campaigns': args.campaigns,
+                'batch_asins': args.batch_asins,
+                'seed': args.seed,
+                'repeat': args.repeat,
+                'warmup': args.warmup
+            },
+            'benchmarks': results
+        }, option=orjson.OPT_INDENT_2))
+    print(f"Wrote {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+Deterministic synthetic scenarios at realistic scale.
+
+Writes the same layout as the repository fixtures: ``scenarios/scenario_<name>.json``
+plus ``mock/<name>/`` with ads_keywords.json, ads_campaign.json, competitor.json,
+inventory.json and listing_audit.json. With more than one ASIN the data directory
+is a partitioned dataset (``manifest.json`` + ``{"partitions": {...}}`` files) and
+one scenario file is written per ASIN. Keyword rows are generated and streamed
+in fixed-size chunks, so multi-million-row files never sit in memory as dicts.
+
+Usage:
+    python -m benchmarks.synthetic --out /tmp/synth --keywords 100000
+    python -m benchmarks.synthetic --out /tmp/synth --keywords 5000000 --campaigns 500 --columnar
+    python -m benchmarks.synthetic --out /tmp/synth --name bulk --asins 1000 --keywords 200
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+import numpy as np
+import orjson
+
+sys.path.append(str(Path(__file__).parent.parent))
+from tools.columnar import convert_json
+from tools.dataset import MANIFEST_NAME
+
+GOALS = ('reduce_acos', 'increase_impressions', 'improve_conversion')
+MATCH_TYPES = ('broad', 'phrase', 'exact')
+CAMPAIGN_TYPES = ('SP', 'SB', 'SD')
+STOCKOUT_RISKS = ('low', 'medium', 'high')
+WORDS = (
+    'wireless', 'bluetooth', 'ergonomic', 'silent', 'gaming', 'usb', 'mouse', 'keyboard',
+    'portable', 'rechargeable', 'mini', 'vertical', 'office', 'travel', 'laptop', 'compact',
+    'black', 'white', 'pink', 'cheap', 'best', 'pro', 'quiet', 'left', 'hand', 'kids'
+)
+
+CHUNK_ROWS = 100_000
+START_DATE = np.datetime64('2025-09-01')
+
+
+class GeneratedScenarios(NamedTuple):
+    """Paths written by ``generate``."""
+    data_dir: Path
+    scenario_files: List[Path]
+    asins: List[str]
+
+
+def _asin(seed: int, index: int) -> str:
+    return f"B0SYN{seed % 100:02d}{index:05d}"
+
+
+def _keyword_chunk(rng: np.random.Generator, start: int, n: int, price: float) -> List[Dict[str, Any]]:
+    """``n`` keyword rows in the ads_keywords.json shape, long-tailed like real exports."""
+    impressions = np.minimum(rng.lognormal(6.5, 1.6, n), 250_000).astype(np.int64)
+    clicks = rng.binomial(impressions, rng.uniform(0.001, 0.03, n))
+    cpc = np.round(rng.uniform(0.1, 2.5, n), 2)
+    spend = np.round(clicks * cpc, 2)
+    orders = rng.binomial(clicks, rng.uniform(0.0, 0.15, n))
+    revenue = np.round(orders * price * rng.uniform(0.9, 1.1, n), 2)
+    ctr = np.round(np.divide(clicks, impressions, out=np.zeros(n), where=impressions > 0), 4)
+    cvr = np.round(np.divide(orders, clicks, out=np.zeros(n), where=clicks > 0), 4)
+    acos = np.round(np.divide(spend, revenue, out=np.zeros(n), where=revenue > 0), 2)
+    words = rng.integers(0, len(WORDS), (n, 3))
+    matches = rng.integers(0, len(MATCH_TYPES), n)
+
+    columns = [c.tolist() for c in (impressions, clicks, ctr, cpc, spend, orders, cvr, revenue, acos, matches)]
+    rows = []
+    for i, (imp, clk, ct, cp, sp, od, cv, rev, ac, match) in enumerate(zip(*columns)):
+        w = words[i]
+        rows.append({
+            'keyword': f"{WORDS[w[0]]} {WORDS[w[1]]} {WORDS[w[2]]} {start + i}",
+            'match': MATCH_TYPES[match],
+            'impressions': imp,
+            'clicks': clk,
+            'ctr': ct,
+            'cpc': cp,
+            'spend': sp,
+            'orders': od,
+            'cvr': cv,
+            'revenue': rev,
+            'acos': ac if rev else None
+        })
+    return rows
+
+
+def _write_keywords(f, rng: np.random.Generator, n: int, price: float) -> None:
+    """Stream a ``{"keywords": [...]}`` document into an open binary file."""
+    f.write(b'{"keywords":[')
+    for start in range(0, n, CHUNK_ROWS):
+        chunk = orjson.dumps(_keyword_chunk(rng, start, min(CHUNK_ROWS, n - start), price))
+        if start:
+            f.write(b',')
+        f.write(chunk[1:-1])
+    f.write(b']}')
+
+
+def _campaign_payload(rng: np.random.Generator, asin: str, n_campaigns: int, days: int, price: float) -> Dict[str, Any]:
+    campaigns = []
+    for c in range(n_campaigns):
+        daily_budget = float(np.round(rng.uniform(10, 200), 2))
+        spend = float(np.round(daily_budget * days * rng.uniform(0.2, 1.05), 2))
+        clicks = int(spend / rng.uniform(0.3, 1.8))
+        impressions = int(clicks / rng.uniform(0.002, 0.03))
+        orders = int(rng.binomial(clicks, rng.uniform(0.02, 0.15)))
+        campaigns.append({
+            'campaign_id': f'{asin}-C{c:05d}',
+            'name': f'{asin} {CAMPAIGN_TYPES[c % 3]} campaign {c}',
+            'type': CAMPAIGN_TYPES[c % 3],
+            'daily_budget': daily_budget,
+            'impressions': impressions,
+            'clicks': clicks,
+            'spend': spend,
+            'orders': orders,
+            'revenue': round(orders * price, 2)
+        })
+
+    daily = []
+    for d in range(days):
+        impressions = int(rng.integers(2000, 8000))
+        clicks = int(impressions * rng.uniform(0.005, 0.02))
+        cpc = float(np.round(rng.uniform(0.4, 1.2), 2))
+        orders = int(clicks * rng.uniform(0.03, 0.12))
+        daily.append({
+            'date': str(START_DATE + d),
+            'impressions': impressions,
+            'clicks': clicks,
+            'ctr': round(clicks / impressions, 2),
+            'cpc': cpc,
+            'spend': round(clicks * cpc, 2),
+            'orders': orders,
+            'cvr': round(orders / clicks, 2) if clicks else 0
+        })
+
+    totals = {key: sum(day[key] for day in daily) for key in ('impressions', 'clicks', 'spend', 'orders')}
+    revenue = round(totals['orders'] * price, 2)
+    return {
+        'asin': asin,
+        'price': price,
+        'summary': {
+            'days': days,
+            'impressions': totals['impressions'],
+            'clicks': totals['clicks'],
+            'ctr': round(totals['clicks'] / totals['impressions'], 2),
+            'avg_cpc': round(totals['spend'] / totals['clicks'], 2) if totals['clicks'] else 0,
+            'spend': round(totals['spend'], 2),
+            'orders': totals['orders'],
+            'cvr': round(totals['orders'] / totals['clicks'], 2) if totals['clicks'] else 0,
+            'revenue': revenue,
+            'acos': round(totals['spend'] / revenue, 2) if revenue else None
+        },
+        'daily': daily,
+        'campaigns': campaigns
+    }
+
+
+def _small_payloads(rng: np.random.Generator, price: float) -> Dict[str, Dict[str, Any]]:
+    """competitor.json, inventory.json and listing_audit.json payloads for one ASIN."""
+    days_of_inventory = int(rng.integers(3, 90))
+    return {
+        'competitor.json': {
+            'avg_competitor_price': round(price * float(rng.uniform(0.8, 1.2)), 2),
+            'sponsored_share': round(float(rng.uniform(0.1, 0.7)), 2),
+            'top_competitor_rating': round(float(rng.uniform(3.8, 4.9)), 1)
+        },
+        'inventory.json': {
+            'days_of_inventory': days_of_inventory,
+            'restock_eta_days': int(rng.integers(2, 30)),
+            'stockout_risk': STOCKOUT_RISKS[0 if days_of_inventory > 30 else 1 if days_of_inventory > 14 else 2]
+        },
+        'listing_audit.json': {
+            'title_kws_coverage': round(float(rng.uniform(0.3, 0.95)), 2),
+            'main_image_score': round(float(rng.uniform(0.4, 0.95)), 2),
+            'a_plus': bool(rng.integers(0, 2)),
+            'rating': round(float(rng.uniform(3.5, 4.8)), 1),
+            'reviews': int(rng.integers(5, 5000))
+        }
+    }
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+
+
+def generate(out: Path, name: str = 'synthetic', keywords: int = 1000, campaigns: int = 20, asins: int = 1,
+             seed: int = 13, goal: str = 'reduce_acos', days: int = 7, columnar: bool = False) -> GeneratedScenarios:
+    """Write a synthetic scenario set under ``out``; ``keywords`` and ``campaigns`` are per ASIN.
+
+    The same arguments always produce byte-identical files.
+    """
+    out = Path(out)
+    data_dir = out / 'mock' / name
+    scenario_dir = out / 'scenarios'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    scenario_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    asin_list = [_asin(seed, i) for i in range(asins)]
+    prices = [float(np.round(rng.uniform(9.99, 59.99), 2)) for _ in asin_list]
+
+    if asins == 1:
+        asin, price = asin_list[0], prices[0]
+        with open(data_dir / 'ads_keywords.json', 'wb') as f:
+            _write_keywords(f, rng, keywords, price)
+        _write_json(data_dir / 'ads_campaign.json', _campaign_payload(rng, asin, campaigns, days, price))
+        for filename, payload in _small_payloads(rng, price).items():
+            _write_json(data_dir / filename, payload)
+        if columnar:
+            convert_json(data_dir / 'ads_keywords.json')
+    else:
+        # Partitioned export: each file holds every ASIN's slice
+        with open(data_dir / 'ads_keywords.json', 'wb') as f:
+            f.write(b'{"partitions":{')
+            for i, (asin, price) in enumerate(zip(asin_list, prices)):
+                f.write((b',' if i else b'') + orjson.dumps(asin) + b':')
+                _write_keywords(f, rng, keywords, price)
+            f.write(b'}}')
+        _write_json(data_dir / 'ads_campaign.json', {'partitions': {
+            asin: _campaign_payload(rng, asin, campaigns, days, price) for asin, price in zip(asin_list, prices)
+        }})
+        small = [_small_payloads(rng, price) for price in prices]
+        for filename in small[0]:
+            _write_json(data_dir / filename, {'partitions': {
+                asin: payloads[filename] for asin, payloads in zip(asin_list, small)
+            }})
+        _write_json(data_dir / MANIFEST_NAME, {'partition_key': 'asin', 'asins': len(asin_list)})
+
+    scenario_files = []
+    for i, asin in enumerate(asin_list):
+        path = scenario_dir / (f'scenario_{name}.json' if asins == 1 else f'scenario_{name}_{asin}.json')
+        _write_json(path, {
+            'asin': asin,
+            'goal': goal if asins == 1 else GOALS[i % len(GOALS)],
+            'lookback_days': days,
+            'notes': f'Synthetic: {keywords} keywords, {campaigns} campaigns (seed {seed}).'
+        })
+        scenario_files.append(path)
+    return GeneratedScenarios(data_dir, scenario_files, asin_list)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate deterministic synthetic scenarios')
+    parser.add_argument('--out', required=True, help='Output root (scenarios/ and mock/ are created under it)')
+    parser.add_argument('--name', default='synthetic', help='Scenario / data directory name')
+    parser.add_argument('--keywords', type=int, default=1000, help='Keyword rows per ASIN')
+    parser.add_argument('--campaigns', type=int, default=20, help='Campaigns per ASIN')
+    parser.add_argument('--asins', type=int, default=1, help='ASIN count; more than one writes a partitioned dataset')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--goal', choices=GOALS, default='reduce_acos', help='Goal for single-ASIN scenarios')
+    parser.add_argument('--seed', type=int, default=13)
+    parser.add_argument('--columnar', action='store_true', help='Also write the columnar keyword store (single ASIN)')
+    args = parser.parse_args()
+
+    generated = generate(Path(args.out), args.name, args.keywords, args.campaigns, args.asins,
+                         args.seed, args.goal, args.days, args.columnar)
+    print(f"Wrote {generated.data_dir} and {len(generated.scenario_files)} scenario file(s) under {Path(args.out) / 'scenarios'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,15 @@ Demo CLI for Amazon Seller AI Agent.
 Usage:
     python demo.py --scenario scenarios/scenario_low_impr.json
     python demo.py --scenario scenarios/scenario_low_impr.json --break-competitor
+    python demo.py --scenario scenarios/scenario_low_impr.json --incremental
+    python demo.py --scenario scenarios/scenario_low_impr.json --profile
 """
 
 import json
 import sys
 import argparse
 from pathlib import Path
+from typing import Union
 
 import orjson
 from rich.console import Console
@@ -25,18 +28,25 @@ except ImportError:
     pass  # dotenv not available, continue with system env vars
 
 from agent.loop import AgentLoop
+from agent.reasoning import ReasoningDisplay
+from agent.metrics import enable_metrics, write_textfile
+from agent.profiling import PROFILE_MODES, Profiler
+from agent.trace_index import TraceIndex, as_index
 from agent.types import ScenarioInput
+from report_backends import BACKENDS
 
 console = Console()
 
 
-def load_scenario(scenario_path: str) -> tuple[ScenarioInput, str]:
-    """Load scenario configuration and determine data directory."""
+def resolve_scenario(scenario_path: str, data_dir: str = None, mock_root: str = 'mock') -> tuple[ScenarioInput, str]:
+    """Load scenario configuration and determine data directory.
+    
+    Raises FileNotFoundError or ValueError instead of exiting, for in-process runners.
+    """
     
     scenario_file = Path(scenario_path)
     if not scenario_file.exists():
-        console.print(f"[red]Error: Scenario file not found: {scenario_path}[/red]")
-        sys.exit(1)
+        raise FileNotFoundError(f"Scenario file not found: {scenario_path}")
     
     # Load scenario data
     try:
@@ -44,21 +54,34 @@ def load_scenario(scenario_path: str) -> tuple[ScenarioInput, str]:
             scenario_data = orjson.loads(f.read())
         scenario_input = ScenarioInput(**scenario_data)
     except Exception as e:
-        console.print(f"[red]Error loading scenario: {e}[/red]")
-        sys.exit(1)
+        raise ValueError(f"Error loading scenario: {e}") from e
+    
+    # Explicit data directory (e.g. a partitioned multi-ASIN export) wins
+    if data_dir:
+        if not Path(data_dir).exists():
+            raise FileNotFoundError(f"Data directory not found: {data_dir}")
+        return scenario_input, data_dir
     
     # Determine mock data directory from filename
     scenario_name = scenario_file.stem.replace('scenario_', '')
-    mock_dir = Path('mock') / scenario_name
+    mock_dir = Path(mock_root) / scenario_name
     
     if not mock_dir.exists():
-        console.print(f"[red]Error: Mock data directory not found: {mock_dir}[/red]")
-        console.print(f"[yellow]Available directories: {[d.name for d in Path('mock').iterdir() if d.is_dir()]}[/yellow]")
-        sys.exit(1)
+        available = [d.name for d in Path(mock_root).iterdir() if d.is_dir()] if Path(mock_root).is_dir() else []
+        raise FileNotFoundError(f"Mock data directory not found: {mock_dir} (available: {available})")
     
     return scenario_input, str(mock_dir)
 
 
+def load_scenario(scenario_path: str, data_dir: str = None) -> tuple[ScenarioInput, str]:
+    """Load scenario configuration and determine data directory, exiting on errors."""
+    try:
+        return resolve_scenario(scenario_path, data_dir)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+
+
 def main():
     """Main CLI entry point."""
     
@@ -70,6 +93,8 @@ Examples:
     python demo.py --scenario scenarios/scenario_low_impr.json
     python demo.py --scenario scenarios/scenario_high_acos.json --mode campaign
     python demo.py --scenario scenarios/scenario_low_impr.json --break-competitor
+    python demo.py --scenario scenarios/scenario_low_impr.json --incremental
+    python demo.py --scenario scenarios/scenario_low_impr.json --profile
         """
     )
     
@@ -80,6 +105,12 @@ Examples:
         help='Path to scenario JSON file'
     )
     
+    parser.add_argument(
+        '--data-dir',
+        type=str,
+        help='Data directory to read instead of mock/<scenario>; may be a partitioned multi-ASIN dataset'
+    )
+    
     parser.add_argument(
         '--mode',
         type=str,
@@ -88,6 +119,39 @@ Examples:
         help='Ads metrics analysis mode (default: keyword)'
     )
     
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        default=3,
+        help='Worst offenders to report per category in ads metrics (default: 3)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Reuse tool results from the last run for this ASIN and goal when their inputs are unchanged'
+    )
+    
+    parser.add_argument(
+        '--fingerprint',
+        type=str,
+        choices=['stat', 'content'],
+        default='stat',
+        help='How --incremental detects changed inputs: file size and mtime, or content hash (default: stat)'
+    )
+    
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Show per-phase and per-tool timing summary'
+    )
+    
+    parser.add_argument(
+        '--metrics-textfile',
+        type=str,
+        help='Write run metrics in OpenMetrics text format to this file'
+    )
+    
     parser.add_argument(
         '--break-competitor',
         action='store_true',
@@ -118,6 +182,19 @@ Examples:
         help='Skip OpenAI enhanced report generation'
     )
     
+    parser.add_argument(
+        '--report-backend',
+        type=str,
+        choices=BACKENDS,
+        help='Enhanced report backend: OpenAI API, OpenAI-compatible HTTP server, or local template (default: $REPORT_BACKEND or openai)'
+    )
+    
+    parser.add_argument(
+        '--no-report-cache',
+        action='store_true',
+        help='Always call the LLM for the enhanced report instead of reusing a cached response'
+    )
+    
     parser.add_argument(
         '--lang',
         type=str,
@@ -126,14 +203,32 @@ Examples:
         help='Report language (en=English, zh-tw=Traditional Chinese)'
     )
     
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='both',
+        choices=PROFILE_MODES,
+        help='Profile the run with cProfile, the stack sampler, or both (default: both)'
+    )
+    
+    parser.add_argument(
+        '--profile-dir',
+        type=str,
+        default='./profiles',
+        help='Directory for .pstats, collapsed-stack and component breakdown output'
+    )
+    
     args = parser.parse_args()
     
     # Load scenario and determine data directory
-    scenario_input, mock_dir = load_scenario(args.scenario)
+    scenario_input, mock_dir = load_scenario(args.scenario, args.data_dir)
     
     # Prepare flags for agent
     flags = {
         'ads_mode': args.mode,
+        'top_k': args.top_k,
+        'incremental': args.incremental,
+        'fingerprint': args.fingerprint,
         'break_competitor': args.break_competitor,
         'break_audit': args.break_audit,
         'break_inventory': args.break_inventory,
@@ -167,6 +262,13 @@ Examples:
     if scenario_input.notes:
         console.print(f"[dim]Note: {scenario_input.notes}[/dim]\n")
     
+    if args.metrics_textfile:
+        enable_metrics()
+    
+    profiler = Profiler(args.profile, args.profile_dir) if args.profile else None
+    if profiler:
+        profiler.start()
+    
     # Initialize and run agent
     try:
         agent = AgentLoop()
@@ -191,7 +293,8 @@ Examples:
 **Risk Level:** {result.get('risk_level', 'unknown').upper()}
 **Total Steps:** {result.get('total_steps', 0)}
 **Trace File:** {result.get('trace_file', 'not saved')}
-""",
+""" + (f"""**Reused Results:** {', '.join(result['incremental']['reused_tools']) or 'none'} (from {result['incremental']['previous_trace'] or 'no previous run'})
+""" if result.get('incremental') else ''),
             title="Final Results",
             title_align="left",
             border_style="bold green"
@@ -210,8 +313,18 @@ Examples:
             'total_steps': result.get('total_steps'),
             'trace_file': result.get('trace_file')
         }
+        if result.get('incremental'):
+            json_output['incremental'] = result['incremental']
         console.print(JSON.from_data(json_output))
         
+        if args.metrics_textfile:
+            write_textfile(args.metrics_textfile)
+            console.print(f"[dim]📈 Metrics written to {args.metrics_textfile}[/dim]")
+        
+        if args.timings:
+            console.print()
+            agent.display.show_timings(agent.timing_stats.summary(), agent.timing_stats.runs)
+        
         # Generate markdown summary
         console.print("\n[bold]📝 Markdown Summary:[/bold]")
         # Load the trace file that was just saved
@@ -223,16 +336,26 @@ Examples:
             except Exception:
                 trace_data = None
         
-        markdown_summary = generate_markdown_summary(result, scenario_input, trace_data)
+        # One pass over the trace, shared by the summary and the enhanced report
+        trace_index = TraceIndex.build(trace_data) if trace_data else None
+        markdown_summary = generate_markdown_summary(result, scenario_input, trace_index)
         console.print(Panel(markdown_summary, border_style="dim"))
         
         # Generate enhanced report if OpenAI is available and not skipped
         if not args.no_openai:
             try:
                 from enhanced_report import generate_enhanced_report
-                enhanced_report_path = generate_enhanced_report(result, scenario_input, trace_data, language=args.lang)
+                from report_backends import create_backend
+                from report_cache import ResponseCache, cache_enabled_from_env
+                report_cache = ResponseCache(enabled=cache_enabled_from_env(args.no_report_cache))
+                report_backend = create_backend(args.report_backend)
+                enhanced_report_path = generate_enhanced_report(result, scenario_input, trace_index, language=args.lang,
+                                                                cache=report_cache, backend=report_backend)
                 if enhanced_report_path:
                     console.print(f"\n[bold green]📋 Enhanced Report Generated:[/bold green] {enhanced_report_path}")
+                    if report_cache.enabled and report_backend.remote:
+                        cache_stats = report_cache.stats()
+                        console.print(f"[dim]🗄️  Report cache: {cache_stats['hits']} hit(s), {cache_stats['misses'] + cache_stats['expired']} miss(es)[/dim]")
                 else:
                     console.print("[dim yellow]💡 Set OPENAI_API_KEY environment variable to generate enhanced reports[/dim yellow]")
             except Exception as e:
@@ -250,10 +373,19 @@ Examples:
         console.print(f"\n[red]❌ Agent execution failed: {e}[/red]")
         console.print(f"[dim]Error type: {type(e).__name__}[/dim]")
         sys.exit(1)
+    
+    finally:
+        if profiler:
+            profiler.stop()
+            console.print()
+            ReasoningDisplay().show_profile(profiler.write())
 
 
-def generate_markdown_summary(result: dict, scenario: ScenarioInput, trace_data: dict = None) -> str:
-    """Generate a markdown summary of results with execution flow diagram."""
+def generate_markdown_summary(result: dict, scenario: ScenarioInput, trace_data: Union[TraceIndex, dict] = None) -> str:
+    """Generate a markdown summary of results with execution flow diagram.
+    
+    ``trace_data`` may be the saved trace or a ``TraceIndex`` already built from it.
+    """
     
     recommendations = result.get('recommendations', [])
     rec_text = "\n".join([f"- {rec}" for rec in recommendations[:3]])  # Top 3 recommendations
@@ -292,57 +424,27 @@ def generate_markdown_summary(result: dict, scenario: ScenarioInput, trace_data:
     return markdown
 
 
-def generate_execution_flow_diagram(trace_data: dict) -> str:
-    """Generate a text-based execution flow diagram from trace data."""
-    if not trace_data or 'execution_trace' not in trace_data:
+def generate_execution_flow_diagram(trace: Union[TraceIndex, dict]) -> str:
+    """Generate a text-based execution flow diagram from trace data or a prebuilt trace index."""
+    index = as_index(trace)
+    if not index.available:
         return "No execution trace available"
     
-    trace_entries = trace_data['execution_trace']
-    steps = []
-    
-    # Extract step information
-    current_step = 0
-    tool_actions = {}
-    belief_changes = {}
-    
-    for entry in trace_entries:
-        if entry['type'] == 'decision' and 'selected_tool' in entry['data']:
-            current_step += 1
-            tool_name = entry['data']['selected_tool']
-            tool_actions[current_step] = tool_name
-        
-        elif entry['type'] == 'action' and 'result' in entry['data']:
-            result = entry['data']['result']
-            status = "✅" if result['ok'] else "❌"
-            if current_step in tool_actions:
-                tool_actions[current_step] = f"{tool_actions[current_step]} {status}"
-        
-        elif entry['type'] == 'update' and 'belief_changes' in entry['data']:
-            changes = entry['data']['belief_changes']
-            significant_changes = []
-            for hyp, change in changes.items():
-                old = change.get('old', 0)
-                new = change.get('new', 0)
-                if abs(new - old) > 0.01:  # Significant change
-                    arrow = "↗️" if new > old else "↘️"
-                    significant_changes.append(f"{hyp}: {old:.2f}→{new:.2f}{arrow}")
-            if significant_changes:
-                belief_changes[current_step] = significant_changes
-    
     # Create flow diagram
     flow_lines = ["```", "🔄 AGENT EXECUTION FLOW", ""]
     
-    for step in range(1, current_step + 1):
+    for step in index:
         # Step header
-        flow_lines.append(f"Step {step}: {tool_actions.get(step, 'Unknown')}")
+        status = "" if step.ok is None else (" ✅" if step.ok else " ❌")
+        flow_lines.append(f"Step {step.step}: {step.tool}{status}")
         
-        # Belief changes if any
-        if step in belief_changes:
-            for change in belief_changes[step][:2]:  # Show top 2 changes
-                flow_lines.append(f"   └─ {change}")
+        # Belief changes if any; show top 2
+        for hyp, old, new in step.significant_changes()[:2]:
+            arrow = "↗️" if new > old else "↘️"
+            flow_lines.append(f"   └─ {hyp}: {old:.2f}→{new:.2f}{arrow}")
         
         # Add connector except for last step
-        if step < current_step:
+        if step.step < len(index.steps):
             flow_lines.append("   │")
     
     flow_lines.extend(["", "```"])
@@ -1,8 +1,8 @@
 """Enhanced report generation with OpenAI integration for human-friendly analysis."""
 
-import os
 import json
-from typing import Dict, Any, Optional
+import uuid
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
 from datetime import datetime
 
@@ -13,43 +13,66 @@ try:
 except ImportError:
     pass
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from agent.trace_index import TraceIndex, as_index
+from report_backends import OpenAIBackend, ReportBackend, create_backend
+from report_cache import ResponseCache, cache_enabled_from_env
+from report_context import ContextBuilder
+
+REPORT_TEMPERATURE = 0.7
+REPORT_MAX_TOKENS = 1500
 
 
 class EnhancedReportGenerator:
-    """Generate enhanced human-friendly reports using OpenAI."""
+    """Generate enhanced human-friendly reports using an LLM backend."""
     
-    def __init__(self, language='en'):
-        self.openai_client = None
+    def __init__(self, language='en', client=None, cache: Optional[ResponseCache] = None,
+                 backend: Optional[ReportBackend] = None, reports_dir: str = 'reports',
+                 context_tokens: Optional[int] = None):
+        """``backend`` defaults to ``create_backend()`` (``REPORT_BACKEND``, else OpenAI); ``client`` is a shortcut for
+        an OpenAI backend around any object with an OpenAI-style ``chat.completions.create``. ``cache`` defaults to
+        the on-disk response cache. ``context_tokens`` budgets the execution steps in the prompt
+        (default ``REPORT_CONTEXT_TOKENS`` or 1200)."""
+        if backend is None:
+            backend = OpenAIBackend(client) if client is not None else create_backend()
+        self.backend = backend
         self.language = language
-        if OPENAI_AVAILABLE:
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
+        self.reports_dir = Path(reports_dir)
+        self.context_builder = ContextBuilder(context_tokens)
+        self.cache = cache if cache is not None else ResponseCache(enabled=cache_enabled_from_env())
     
-    def generate_enhanced_report(self, result: dict, scenario_input, trace_data: dict = None) -> Optional[str]:
-        """Generate an enhanced report with human-friendly analysis and visualizations."""
+    def generate_enhanced_report(self, result: dict, scenario_input,
+                                 trace_data: Union[TraceIndex, dict] = None) -> Optional[str]:
+        """Generate an enhanced report with human-friendly analysis and visualizations.
+        
+        ``trace_data`` may be the saved trace or a ``TraceIndex`` already built from it; either way the
+        trace is walked once and every section reads the index. Returns the path of the saved report.
+        """
         
-        if not self.openai_client:
+        enhanced_report = self.render_report(result, scenario_input, trace_data)
+        if enhanced_report is None:
+            return None
+        
+        return self._save_report(enhanced_report, scenario_input.asin)
+    
+    def render_report(self, result: dict, scenario_input,
+                      trace_data: Union[TraceIndex, dict] = None) -> Optional[str]:
+        """The enhanced report as markdown, without saving it; ``None`` when no backend or analysis is available."""
+        
+        if not self.backend:
             return None
             
         try:
+            trace_index = as_index(trace_data)
+            
             # Prepare context data
-            context = self._prepare_analysis_context(result, scenario_input, trace_data)
+            context = self._prepare_analysis_context(result, scenario_input, trace_index)
             
             # Generate human-friendly analysis
             analysis = self._generate_analysis_with_ai(context)
             
             if analysis:
                 # Generate the enhanced markdown report
-                enhanced_report = self._create_enhanced_markdown(analysis, result, scenario_input, trace_data)
-                
-                # Save to file
-                return self._save_report(enhanced_report, scenario_input.asin)
+                return self._create_enhanced_markdown(analysis, result, scenario_input, trace_index)
                 
         except Exception as e:
             print(f"[dim yellow]⚠️  Enhanced report generation failed: {str(e)}[/dim yellow]")
@@ -59,64 +82,17 @@ class EnhancedReportGenerator:
         
         return None
     
-    def _prepare_analysis_context(self, result: dict, scenario_input, trace_data: dict) -> str:
+    def _prepare_analysis_context(self, result: dict, scenario_input, trace_index: TraceIndex) -> str:
         """Prepare detailed step-by-step execution context for AI analysis."""
         
         goal = scenario_input.goal
         asin = scenario_input.asin
         
-        # Extract detailed execution steps
-        execution_details = []
-        if trace_data and 'execution_trace' in trace_data:
-            step_counter = 0
-            current_step = {}
-            
-            for entry in trace_data['execution_trace']:
-                entry_type = entry['type']
-                data = entry['data']
-                
-                if entry_type == 'decision' and 'selected_tool' in data:
-                    step_counter += 1
-                    current_step = {
-                        'step': step_counter,
-                        'tool': data['selected_tool'],
-                        'reasoning': data.get('reasoning', 'No reasoning provided')
-                    }
-                
-                elif entry_type == 'action' and 'result' in data and current_step:
-                    tool_result = data['result']
-                    current_step['success'] = tool_result['ok']
-                    current_step['findings'] = tool_result.get('data', {})
-                    current_step['error'] = tool_result.get('error', '') if not tool_result['ok'] else None
-                    
-                elif entry_type == 'update' and 'belief_changes' in data and current_step:
-                    current_step['belief_changes'] = data['belief_changes']
-                    # Step is complete, add it to execution details
-                    execution_details.append(current_step)
-                    current_step = {}
-        
-        # Format execution steps for AI
-        steps_text = ""
-        for step_info in execution_details:
-            status = "✅ Success" if step_info.get('success') else "❌ Failed"
-            steps_text += f"""
-Step {step_info['step']}: {step_info['tool']} {status}
-- Reasoning: {step_info.get('reasoning', 'No reasoning')}
-- Findings: {self._format_findings(step_info.get('findings', {}))}
-"""
-            if step_info.get('error'):
-                steps_text += f"- Error: {step_info['error']}\n"
-            
-            # Add belief changes
-            if step_info.get('belief_changes'):
-                steps_text += "- Belief Updates:\n"
-                for hyp, changes in step_info['belief_changes'].items():
-                    old = changes.get('old', 0)
-                    new = changes.get('new', 0)
-                    if abs(new - old) > 0.01:
-                        arrow = "↗️" if new > old else "↘️"
-                        steps_text += f"  * {hyp}: {old:.2f} → {new:.2f} {arrow}\n"
-            steps_text += "\n"
+        # Executed steps, including failed ones, so the analysis can cover how errors were handled
+        execution_details = trace_index.executed_steps
+        
+        # Format execution steps for AI: compact per-tool summaries within the token budget
+        steps_text = self.context_builder.steps_text(execution_details)
         
         context = f"""
 Amazon Advertising Agent Execution Analysis:
@@ -137,23 +113,6 @@ Focus on explaining:
 """
         return context
     
-    def _format_findings(self, findings: dict) -> str:
-        """Format tool findings in a readable way."""
-        if not findings:
-            return "No specific findings recorded"
-        
-        # Extract key metrics and information
-        key_info = []
-        for key, value in findings.items():
-            if key in ['quality_score', 'grade', 'issues_found']:
-                key_info.append(f"{key.replace('_', ' ')}: {value}")
-            elif key in ['total_impressions', 'overall_ctr', 'overall_acos']:
-                key_info.append(f"{key.replace('_', ' ')}: {value}")
-            elif key in ['competitive_pressure', 'price_positioning']:
-                key_info.append(f"{key.replace('_', ' ')}: {value}")
-        
-        return "; ".join(key_info) if key_info else str(findings)[:100]
-    
     def _generate_analysis_with_ai(self, context: str) -> Optional[dict]:
         """Use OpenAI to generate human-friendly analysis."""
         
@@ -252,23 +211,33 @@ Write in an educational tone with rich explanations and examples to help readers
         try:
             system_content = "You are an expert AI educator and Amazon advertising consultant who provides detailed, educational explanations about AI reasoning and business insights." if self.language == 'en' else "你是一位專業的AI教育專家和Amazon廣告顧問，提供關於AI推理和商業洞察的詳細教學解釋。"
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
+            content = self._complete(system_content, prompt)
             return self._parse_ai_response(content)
             
         except Exception as e:
             print(f"OpenAI API error: {str(e)}")
             return None
     
+    def _complete(self, system_content: str, prompt: str) -> str:
+        """Completion text, served from the response cache when a remote backend's request is unchanged."""
+        messages = [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": prompt}
+        ]
+        if not self.backend.remote:
+            return self.backend.complete(messages, REPORT_MAX_TOKENS, REPORT_TEMPERATURE).content
+        
+        key = self.cache.key(self.backend.model, self.language, system_content, prompt, REPORT_TEMPERATURE,
+                             REPORT_MAX_TOKENS, backend=self.backend.cache_namespace)
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+        
+        content = self.backend.complete(messages, REPORT_MAX_TOKENS, REPORT_TEMPERATURE).content
+        self.cache.put(key, content, {'model': self.backend.model, 'backend': self.backend.cache_namespace,
+                                      'language': self.language})
+        return content
+    
     def _parse_ai_response(self, content: str) -> dict:
         """Parse the AI response into structured components."""
         # Simple fallback: if parsing fails, use the whole content as execution overview
@@ -286,13 +255,16 @@ Write in an educational tone with rich explanations and examples to help readers
         current_section = None
         current_content = []
         
+        spaced_keywords = [(keyword, keyword.replace('_', ' ')) for keyword in keywords]
+        
         for line in content.split('\n'):
             line = line.strip()
+            upper_line = line.upper()
             
             # Check if this line contains any keyword
             found_keyword = None
-            for keyword in keywords:
-                if keyword.replace('_', ' ').upper() in line.upper() or keyword.upper() in line.upper():
+            for keyword, spaced in spaced_keywords:
+                if spaced in upper_line or keyword in upper_line:
                     found_keyword = keyword
                     break
             
@@ -320,7 +292,7 @@ Write in an educational tone with rich explanations and examples to help readers
         
         return sections
     
-    def _create_enhanced_markdown(self, analysis: dict, result: dict, scenario_input, trace_data: dict) -> str:
+    def _create_enhanced_markdown(self, analysis: dict, result: dict, scenario_input, trace_index: TraceIndex) -> str:
         """Create the enhanced markdown report."""
         
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -386,14 +358,14 @@ Write in an educational tone with rich explanations and examples to help readers
 ## 🔧 執行追蹤
 
 ### 已執行的工具:
-{self._get_detailed_tools_trace(trace_data)}
+{self._get_detailed_tools_trace(trace_index)}
 
 ### 假設信心度演化:
 {chr(10).join([f"- **{name.replace('_', ' ').title()}:** {belief:.0%}" for name, belief in result.get('all_hypotheses', {}).items()])}
 
 ---
 
-*🤖 此報告使用OpenAI GPT-4o逐步推理分析AI代理執行過程*
+*🤖 此報告使用{self.backend.label}逐步推理分析AI代理執行過程*
 """
         else:
             report = f"""# 🤖 AI Agent Execution Analysis
@@ -453,14 +425,14 @@ Write in an educational tone with rich explanations and examples to help readers
 ## 🔧 Execution Trace
 
 ### Tools Executed:
-{self._get_detailed_tools_trace(trace_data)}
+{self._get_detailed_tools_trace(trace_index)}
 
 ### Hypothesis Confidence Evolution:
 {chr(10).join([f"- **{name.replace('_', ' ').title()}:** {belief:.0%}" for name, belief in result.get('all_hypotheses', {}).items()])}
 
 ---
 
-*🤖 This report analyzes AI agent execution with step-by-step reasoning powered by OpenAI GPT-4o*
+*🤖 This report analyzes AI agent execution with step-by-step reasoning powered by {self.backend.label}*
 """
         
         return report
@@ -497,40 +469,29 @@ Write in an educational tone with rich explanations and examples to help readers
         else:
             return "\n".join(chart_lines) + f"\n\n*Suggested visualization: {chart_suggestion}*"
     
-    def _get_tools_summary(self, trace_data: dict) -> str:
+    def _get_tools_summary(self, trace_index: TraceIndex) -> str:
         """Get summary of tools used in execution."""
-        if not trace_data or 'execution_trace' not in trace_data:
+        if not trace_index.available:
             return "Unknown"
-            
-        tools = set()
-        for entry in trace_data['execution_trace']:
-            if entry['type'] == 'action' and 'tool' in entry['data']:
-                tools.add(entry['data']['tool'])
         
-        return ", ".join(sorted(tools))
+        return ", ".join(trace_index.tools_used)
     
-    def _get_detailed_tools_trace(self, trace_data: dict) -> str:
+    def _get_detailed_tools_trace(self, trace_index: TraceIndex) -> str:
         """Get detailed trace of tool execution."""
-        if not trace_data or 'execution_trace' not in trace_data:
+        if not trace_index.available:
             return "No execution trace available"
         
         trace_lines = []
-        step_num = 0
-        
-        for entry in trace_data['execution_trace']:
-            if entry['type'] == 'decision' and 'selected_tool' in entry['data']:
-                step_num += 1
-                tool = entry['data']['selected_tool']
-                reasoning = entry['data'].get('reasoning', 'No reasoning provided')
-                trace_lines.append(f"**Step {step_num}:** Selected `{tool}`")
-                trace_lines.append(f"- *Reasoning:* {reasoning}")
+        
+        for step in trace_index:
+            trace_lines.append(f"**Step {step.step}:** Selected `{step.tool}`")
+            trace_lines.append(f"- *Reasoning:* {step.reasoning}")
             
-            elif entry['type'] == 'action' and 'result' in entry['data']:
-                result = entry['data']['result']
-                status = "✅ Success" if result['ok'] else "❌ Failed"
+            if step.executed:
+                status = "✅ Success" if step.ok else "❌ Failed"
                 trace_lines.append(f"- *Result:* {status}")
-                if not result['ok'] and 'error' in result:
-                    trace_lines.append(f"- *Error:* {result['error']}")
+                if not step.ok:
+                    trace_lines.append(f"- *Error:* {step.error}")
                 trace_lines.append("")
         
         return "\n".join(trace_lines)
@@ -539,22 +500,29 @@ Write in an educational tone with rich explanations and examples to help readers
         """Save the enhanced report to a markdown file."""
         
         # Create reports directory
-        reports_dir = Path("reports")
-        reports_dir.mkdir(exist_ok=True)
+        reports_dir = self.reports_dir
+        reports_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"analysis_{asin}_{timestamp}.md"
-        filepath = reports_dir / filename
+        # Generate filename; names carry microseconds and are created exclusively, so concurrent
+        # reports for the same ASIN never overwrite each other
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filepath = reports_dir / f"analysis_{asin}_{timestamp}.md"
+        try:
+            f = open(filepath, 'x', encoding='utf-8')
+        except FileExistsError:
+            # Same microsecond: a random suffix is unique without probing
+            filepath = reports_dir / f"analysis_{asin}_{timestamp}_{uuid.uuid4().hex[:8]}.md"
+            f = open(filepath, 'x', encoding='utf-8')
         
         # Save file
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with f:
             f.write(report_content)
-        
         return str(filepath)
 
 
-def generate_enhanced_report(result: dict, scenario_input, trace_data: dict = None, language='en') -> Optional[str]:
+def generate_enhanced_report(result: dict, scenario_input, trace_data: Union[TraceIndex, dict] = None, language='en',
+                             client=None, cache: Optional[ResponseCache] = None,
+                             backend: Optional[ReportBackend] = None) -> Optional[str]:
     """Main function to generate enhanced report."""
-    generator = EnhancedReportGenerator(language=language)
+    generator = EnhancedReportGenerator(language=language, client=client, cache=cache, backend=backend)
     return generator.generate_enhanced_report(result, scenario_input, trace_data)
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""Completion backends for enhanced report generation.
+
+A backend turns chat messages into completion text. ``EnhancedReportGenerator``
+and ``ReportPipeline`` only talk to this interface, so the report path can run
+against:
+
+- ``openai``   the OpenAI API (``OPENAI_API_KEY``; honours ``OPENAI_BASE_URL``)
+- ``http``     any OpenAI-compatible server (vLLM, llama.cpp, Ollama, the stub in
+               ``scripts/stub_llm_server.py``) via stdlib HTTP, at
+               ``REPORT_BACKEND_URL`` (default ``http://127.0.0.1:8765/v1``)
+- ``template`` a deterministic local template built from the execution context;
+               no network, thousands of reports per second, for CI and
+               air-gapped batch jobs
+
+``REPORT_BACKEND`` selects the default; ``REPORT_BACKEND_MODEL`` overrides the
+model name sent by the ``openai`` and ``http`` backends.
+"""
+
+import importlib.util
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+import orjson
+
+# The OpenAI SDK and urllib.request are imported on first use; both are slow to import and only
+# the remote backends need them
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+
+BACKENDS = ('openai', 'http', 'template')
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_HTTP_URL = "http://127.0.0.1:8765/v1"
+DEFAULT_TIMEOUT_S = 120.0
+
+SECTIONS = ('EXECUTION_OVERVIEW', 'STEP_BY_STEP_ANALYSIS', 'REASONING_EVOLUTION',
+            'DISCOVERY_INSIGHTS', 'PROCESS_EVALUATION', 'EDUCATIONAL_INSIGHTS')
+
+Messages = List[Dict[str, str]]
+
+
+class Completion(NamedTuple):
+    content: str
+    total_tokens: Optional[int] = None
+
+
+class BackendError(Exception):
+    """HTTP-level failure from a completion backend; ``status_code`` is None for transport errors."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ReportBackend:
+    """Base class: ``complete()`` returns the completion for a list of chat messages."""
+
+    name = 'base'
+    # Remote backends go through the pipeline's rate limiter and the response cache
+    remote = True
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def label(self) -> str:
+        """Human-readable description for report footers."""
+        return self.model
+
+    @property
+    def cache_namespace(self) -> str:
+        """Identity of the backend in response cache keys, so backends never share entries."""
+        return self.name
+
+    def complete(self, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        raise NotImplementedError
+
+
+class OpenAIBackend(ReportBackend):
+    """OpenAI SDK client, or any object with an OpenAI-style ``chat.completions.create``."""
+
+    name = 'openai'
+
+    def __init__(self, client, model: str = DEFAULT_MODEL):
+        super().__init__(model)
+        self.client = client
+
+    @classmethod
+    def from_env(cls, model: str = None, max_retries: Optional[int] = None) -> Optional['OpenAIBackend']:
+        """Backend for ``OPENAI_API_KEY``, or None when the key or the SDK is missing."""
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not (OPENAI_AVAILABLE and api_key):
+            return None
+        import openai
+        options = {'max_retries': max_retries, 'timeout': DEFAULT_TIMEOUT_S} if max_retries is not None else {}
+        return cls(openai.OpenAI(api_key=api_key, **options), model or os.getenv('REPORT_BACKEND_MODEL', DEFAULT_MODEL))
+
+    @property
+    def label(self) -> str:
+        return f"OpenAI {'GPT-4o' if self.model == 'gpt-4o' else self.model}"
+
+    def complete(self, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        usage = getattr(response, 'usage', None)
+        return Completion(response.choices[0].message.content, getattr(usage, 'total_tokens', None))
+
+
+class HTTPBackend(ReportBackend):
+    """Minimal stdlib client for an OpenAI-compatible ``/chat/completions`` endpoint."""
+
+    name = 'http'
+
+    def __init__(self, base_url: str = None, model: str = None, api_key: str = None, timeout_s: float = DEFAULT_TIMEOUT_S):
+        super().__init__(model or os.getenv('REPORT_BACKEND_MODEL', DEFAULT_MODEL))
+        self.base_url = (base_url or os.getenv('REPORT_BACKEND_URL', DEFAULT_HTTP_URL)).rstrip('/')
+        self.api_key = api_key if api_key is not None else os.getenv('REPORT_BACKEND_API_KEY', '')
+        self.timeout_s = timeout_s
+
+    @property
+    def label(self) -> str:
+        return f"{self.model} at {self.base_url}"
+
+    @property
+    def cache_namespace(self) -> str:
+        # A stub or local server's replies must never be served as another server's output
+        return f"{self.name} {self.base_url}"
+
+    def complete(self, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        import urllib.error
+        import urllib.request
+        body = orjson.dumps({'model': self.model, 'messages': messages,
+                             'max_tokens': max_tokens, 'temperature': temperature})
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as response:
+                payload = orjson.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                retry_after = float(e.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                retry_after = None
+            raise BackendError(f"HTTP {e.code} from {self.base_url}: {e.read()[:200].decode('utf-8', 'replace')}",
+                               e.code, retry_after) from e
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise BackendError(f"Cannot reach {self.base_url}: {getattr(e, 'reason', e)}") from e
+
+        usage = payload.get('usage') or {}
+        return Completion(payload['choices'][0]['message']['content'], usage.get('total_tokens'))
+
+
+class TemplateBackend(ReportBackend):
+    """Deterministic analysis assembled from the execution context in the prompt.
+
+    Produces the six sections ``EnhancedReportGenerator._parse_ai_response``
+    expects, in English or Traditional Chinese to match the prompt.
+    """
+
+    name = 'template'
+    remote = False
+
+    _STEP = re.compile(r'^Step (\d+): (\S+) (✅ Success|❌ Failed)$')
+    _BELIEF = re.compile(r'^\* (\S+): ([\d.]+) → ([\d.]+)')
+
+    def __init__(self, model: str = 'template'):
+        super().__init__(model)
+
+    @property
+    def label(self) -> str:
+        return "local template backend"
+
+    def _parse_context(self, prompt: str) -> dict:
+        context = {'asin': 'unknown', 'goal': 'unknown', 'steps': []}
+        step = None
+        for raw in prompt.splitlines():
+            line = raw.strip()
+            if line.startswith('ASIN: '):
+                context['asin'] = line[6:]
+            elif line.startswith('Goal: '):
+                context['goal'] = line[6:]
+            elif (match := self._STEP.match(line)):
+                step = {'step': int(match[1]), 'tool': match[2], 'ok': match[3].startswith('✅'),
+                        'reasoning': '', 'findings': '', 'error': '', 'beliefs': []}
+                context['steps'].append(step)
+            elif step is not None:
+                if line.startswith('- Reasoning: '):
+                    step['reasoning'] = line[13:]
+                elif line.startswith('- Findings: '):
+                    step['findings'] = line[12:]
+                elif line.startswith('- Error: '):
+                    step['error'] = line[9:]
+                elif (match := self._BELIEF.match(line)):
+                    step['beliefs'].append((match[1], float(match[2]), float(match[3])))
+        return context
+
+    def _sections_en(self, ctx: dict) -> Dict[str, str]:
+        steps = ctx['steps']
+        tools = ', '.join(dict.fromkeys(s['tool'] for s in steps)) or 'no tools'
+        failed = [s for s in steps if not s['ok']]
+        beliefs = [(s['step'], *b) for s in steps for b in s['beliefs']]
+        return {
+            'EXECUTION_OVERVIEW': (f"The agent investigated ASIN {ctx['asin']} for the goal '{ctx['goal']}' in "
+                                   f"{len(steps)} step(s), consulting {tools}. It started from competing hypotheses "
+                                   f"and chose each tool by the information it was expected to add."),
+            'STEP_BY_STEP_ANALYSIS': '\n'.join(
+                f"• Step {s['step']} used {s['tool']} ({'succeeded' if s['ok'] else 'failed'}). "
+                f"{s['reasoning']} " + (f"Findings: {s['findings']}" if s['ok'] else f"Error: {s['error']}")
+                for s in steps) or '• No tool steps were recorded.',
+            'REASONING_EVOLUTION': '\n'.join(
+                f"• After step {step}, {hyp.replace('_', ' ')} moved from {old:.2f} to {new:.2f} "
+                f"({'strengthened' if new > old else 'weakened'})." for step, hyp, old, new in beliefs)
+                or '• No belief changed by more than 0.01.',
+            'DISCOVERY_INSIGHTS': '\n'.join(
+                f"• {s['tool']}: {s['findings']}" for s in steps if s['ok'] and s['findings'])
+                or '• No tool returned usable data.',
+            'PROCESS_EVALUATION': (f"{len(steps) - len(failed)} of {len(steps)} tool call(s) succeeded."
+                                   + (f" The agent continued without {', '.join(s['tool'] for s in failed)} "
+                                      f"and relied on the remaining evidence." if failed else
+                                      " Every step contributed evidence to the final ranking.")),
+            'EDUCATIONAL_INSIGHTS': ("This run shows hypothesis-driven diagnosis: keep several explanations open, "
+                                     "gather the evidence that best separates them, and stop once one explanation "
+                                     "clearly dominates.")
+        }
+
+    def _sections_zh(self, ctx: dict) -> Dict[str, str]:
+        steps = ctx['steps']
+        tools = '、'.join(dict.fromkeys(s['tool'] for s in steps)) or '無'
+        failed = [s for s in steps if not s['ok']]
+        beliefs = [(s['step'], *b) for s in steps for b in s['beliefs']]
+        return {
+            'EXECUTION_OVERVIEW': (f"代理針對 ASIN {ctx['asin']}（目標：{ctx['goal']}）執行了 {len(steps)} 個步驟，"
+                                   f"使用的工具：{tools}。代理從多個競爭假設出發，依預期資訊增益選擇每一步的工具。"),
+            'STEP_BY_STEP_ANALYSIS': '\n'.join(
+                f"• 第 {s['step']} 步使用 {s['tool']}（{'成功' if s['ok'] else '失敗'}）。{s['reasoning']} "
+                + (f"發現：{s['findings']}" if s['ok'] else f"錯誤：{s['error']}")
+                for s in steps) or '• 未記錄任何工具步驟。',
+            'REASONING_EVOLUTION': '\n'.join(
+                f"• 第 {step} 步後，{hyp.replace('_', ' ')} 由 {old:.2f} 變為 {new:.2f}"
+                f"（{'增強' if new > old else '減弱'}）。" for step, hyp, old, new in beliefs)
+                or '• 沒有信念變化超過 0.01。',
+            'DISCOVERY_INSIGHTS': '\n'.join(
+                f"• {s['tool']}：{s['findings']}" for s in steps if s['ok'] and s['findings'])
+                or '• 沒有工具回傳可用數據。',
+            'PROCESS_EVALUATION': (f"{len(steps)} 次工具呼叫中有 {len(steps) - len(failed)} 次成功。"
+                                   + (f"代理在缺少 {'、'.join(s['tool'] for s in failed)} 的情況下，依其餘證據繼續推理。"
+                                      if failed else "每一步都為最終排名提供了證據。")),
+            'EDUCATIONAL_INSIGHTS': "本案例展示假設驅動的診斷：同時保留多個解釋，收集最能區分它們的證據，並在某個解釋明顯勝出時停止。"
+        }
+
+    def complete(self, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        context = self._parse_context(prompt)
+        sections = self._sections_zh(context) if '繁體中文' in prompt else self._sections_en(context)
+        content = '\n\n'.join(f"{i}. {name}:\n{sections[name]}" for i, name in enumerate(SECTIONS, 1))
+        return Completion(content, None)
+
+
+def create_backend(name: Optional[str] = None, max_retries: Optional[int] = None) -> Optional[ReportBackend]:
+    """Backend by name (default ``REPORT_BACKEND`` or ``openai``); None when ``openai`` has no API key.
+
+    ``max_retries`` is passed to the OpenAI SDK; callers that retry themselves pass 0.
+    """
+    name = name or os.getenv('REPORT_BACKEND', 'openai')
+    if name == 'openai':
+        return OpenAIBackend.from_env(max_retries=max_retries)
+    if name == 'http':
+        return HTTPBackend()
+    if name == 'template':
+        return TemplateBackend()
+    raise ValueError(f"Unknown report backend {name!r}; expected one of {', '.join(BACKENDS)}")
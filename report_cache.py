@@ -0,0 +1,182 @@
+"""On-disk cache for LLM report responses.
+
+Entries are keyed by a SHA-256 of everything that determines the completion
+(backend, model, language, system prompt, user prompt, temperature, max
+tokens), so an unchanged run for the same ASIN reuses the previous analysis
+instead of calling the API again. The backend part keeps, say, a local stub
+server's replies from ever being served for a real model of the same name.
+Entries expire after a TTL; when the cache grows past its size budget the
+least recently used entries are evicted.
+
+Configuration (environment): ``REPORT_CACHE=0`` disables the cache,
+``REPORT_CACHE_DIR`` (default ``.cache/reports``), ``REPORT_CACHE_TTL`` in
+seconds (default 7 days) and ``REPORT_CACHE_MAX_MB`` (default 50).
+
+Usage:
+    python report_cache.py            # entry count and size on disk
+    python report_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from agent import metrics
+
+DEFAULT_CACHE_DIR = '.cache/reports'
+DEFAULT_TTL_S = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def cache_enabled_from_env(no_report_cache: bool = False) -> bool:
+    """Whether to cache: ``REPORT_CACHE`` is not off and the ``--no-report-cache`` flag was not given."""
+    return not no_report_cache and os.getenv('REPORT_CACHE', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+class ResponseCache:
+    """Content-addressed, TTL- and size-bounded store of completion texts."""
+
+    def __init__(self, cache_dir: str = None, ttl_s: float = None, max_bytes: int = None, enabled: bool = True):
+        self.cache_dir = Path(cache_dir or os.getenv('REPORT_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.ttl_s = float(ttl_s if ttl_s is not None else os.getenv('REPORT_CACHE_TTL', DEFAULT_TTL_S))
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else float(os.getenv('REPORT_CACHE_MAX_MB', DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, language: str, system_prompt: str, prompt: str, temperature: float,
+            max_tokens: Optional[int] = None, backend: str = '') -> str:
+        """Stable SHA-256 hex digest of the request parameters and the backend that serves them."""
+        payload = orjson.dumps({
+            'backend': backend,
+            'model': model,
+            'language': language,
+            'system': system_prompt,
+            'prompt': prompt,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached completion text, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            self._count('miss')
+            return None
+
+        if time.time() - entry.get('created', 0) > self.ttl_s:
+            path.unlink(missing_ok=True)
+            self._count('expired')
+            return None
+
+        # Touch for LRU eviction order
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hit')
+        return entry['content']
+
+    def put(self, key: str, content: str, meta: Dict[str, Any] = None) -> None:
+        """Store a completion atomically, then evict down to the size budget."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({'created': time.time(), 'meta': meta or {}, 'content': content}))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.writes += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> int:
+        """Remove all entries; returns how many were deleted."""
+        removed = 0
+        for path in self.cache_dir.glob('*/*.json'):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            if result == 'hit':
+                self.hits += 1
+            elif result == 'expired':
+                self.expired += 1
+            else:
+                self.misses += 1
+        metrics.report_cache_lookups.inc(result)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.expired
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Inspect or clear the LLM report response cache')
+    parser.add_argument('--dir', help=f'Cache directory (default: $REPORT_CACHE_DIR or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--clear', action='store_true', help='Delete all cached responses')
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.dir)
+    if args.clear:
+        print(f"Removed {cache.clear()} cached response(s) from {cache.cache_dir}")
+        return
+    sizes = [path.stat().st_size for path in cache.cache_dir.glob('*/*.json')]
+    print(f"{cache.cache_dir}: {len(sizes)} response(s), {sum(sizes) / 1024:.1f} KiB "
+          f"(budget {cache.max_bytes / 1024 / 1024:.0f} MiB, TTL {cache.ttl_s / 3600:.0f}h)")
+
+
+if __name__ == '__main__':
+    main()
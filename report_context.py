@@ -0,0 +1,210 @@
+"""Compact, token-budgeted execution context for enhanced report prompts.
+
+Tool results in a trace carry their full ``raw_data`` (every keyword row for a
+large account). Stringifying that only to truncate it costs CPU proportional to
+the account size and leaves the prompt with little signal. Instead, each tool
+has a summarizer that picks out the facts worth telling the model: aggregates,
+issue counts, grades and the top-K offenders, most important first, without
+ever touching the raw rows.
+
+Facts are then packed into a token budget round-robin across steps (every
+step's most important fact first, then every step's second, ...), so a long
+run degrades evenly instead of losing its last steps. The budget covers the
+execution steps section only; ``REPORT_CONTEXT_TOKENS`` sets the default.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from agent.trace_index import TraceStep
+
+DEFAULT_CONTEXT_TOKENS = 1200
+DEFAULT_TOP_K = 3
+MAX_GENERIC_FACTS = 8
+
+Summarizer = Callable[[Dict[str, Any], int], List[str]]
+SUMMARIZERS: Dict[str, Summarizer] = {}
+
+
+def summarizer(tool: str) -> Callable[[Summarizer], Summarizer]:
+    """Register the findings summarizer for a tool."""
+    def register(fn: Summarizer) -> Summarizer:
+        SUMMARIZERS[tool] = fn
+        return fn
+    return register
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count: ~4 ASCII characters per token, one per other character."""
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def _label(key: str) -> str:
+    return key.replace('_', ' ')
+
+
+def _scalars(block: Optional[Dict[str, Any]], keys=None) -> List[str]:
+    """``label value`` for the scalar entries of a dict, in ``keys`` order when given."""
+    if not block:
+        return []
+    items = ((key, block.get(key)) for key in keys) if keys else block.items()
+    return [f"{_label(key)} {_fmt(value)}" for key, value in items
+            if value is not None and isinstance(value, (int, float, str, bool))]
+
+
+@summarizer('ads_metrics')
+def summarize_ads_metrics(data: Dict[str, Any], top_k: int) -> List[str]:
+    facts = []
+    metrics = data.get('aggregated_metrics') or {}
+    facts.append('; '.join(_scalars(metrics, ('overall_acos', 'avg_ctr', 'avg_cvr'))))
+    facts.append('; '.join(_scalars(metrics, ('total_spend', 'total_revenue', 'total_impressions', 'total_clicks', 'total_orders'))))
+
+    issues = data.get('performance_issues')
+    if issues:
+        total = issues.get('total_keywords', 0)
+        facts.append(f"of {total} keywords: " + ', '.join(
+            f"{issues.get(key, 0)} {label}" for key, label in (
+                ('high_cpc_keywords', 'high CPC'),
+                ('no_conversion_keywords', 'no conversions'),
+                ('low_impression_keywords', 'low impressions'))))
+    for category, rows in (data.get('keyword_details') or {}).items():
+        if rows:
+            facts.append(f"worst {_label(category)}: " + ', '.join(
+                f"'{row.get('keyword')}' ({row.get('match', '?')}, cpc {_fmt(row.get('cpc', 0))}, "
+                f"spend {_fmt(row.get('spend', 0))}, orders {row.get('orders', 0)})" for row in rows[:top_k]))
+
+    if data.get('campaign_count'):
+        facts.append(f"{data['campaign_count']} campaigns")
+        rollups = data.get('rollups') or {}
+        by_type = rollups.get('by_type') or {}
+        if by_type:
+            facts.append('acos by type: ' + ', '.join(
+                f"{name} {_fmt(rollup.get('acos'))}" for name, rollup in by_type.items()))
+        budget = rollups.get('budget_utilization') or {}
+        if budget:
+            facts.append('budget: ' + ', '.join(
+                f"{(budget.get(bucket) or {}).get('campaigns', 0)} {_label(bucket)}"
+                for bucket in ('capped', 'healthy', 'under_utilized')) +
+                (f", avg utilization {_fmt(budget['avg_utilization'])}" if budget.get('avg_utilization') is not None else ''))
+        for kind, rows in (data.get('top_offenders') or {}).items():
+            if rows:
+                facts.append(f"top {kind} offenders: " + ', '.join(
+                    f"{row.get('campaign') or '?'} "
+                    f"(acos {_fmt(row.get('acos'))}, spend {_fmt(row.get('spend'))})" for row in rows[:top_k]))
+    return [fact for fact in facts if fact]
+
+
+@summarizer('listing_audit')
+def summarize_listing_audit(data: Dict[str, Any], top_k: int) -> List[str]:
+    analysis = data.get('listing_analysis') or {}
+    raw = data.get('raw_data') or {}
+    facts = ['; '.join(_scalars(analysis, ('overall_quality_score', 'quality_grade', 'conversion_impact')))]
+    if analysis.get('quality_issues'):
+        facts.append('issues: ' + ', '.join(map(str, analysis['quality_issues'][:top_k])))
+    scores = data.get('detailed_scores') or {}
+    if scores:
+        weakest = sorted(scores.items(), key=lambda item: item[1])[:top_k]
+        facts.append('weakest scores: ' + ', '.join(f"{_label(key)} {_fmt(value)}" for key, value in weakest))
+    facts.append('; '.join(_scalars(raw, ('rating', 'reviews'))))
+    return [fact for fact in facts if fact]
+
+
+@summarizer('competitor')
+def summarize_competitor(data: Dict[str, Any], top_k: int) -> List[str]:
+    analysis = data.get('competitive_analysis') or {}
+    facts = ['; '.join(_scalars(analysis, ('competitive_pressure', 'price_positioning', 'market_saturation')))]
+    if analysis.get('threats'):
+        facts.append('threats: ' + ', '.join(map(str, analysis['threats'][:top_k])))
+    facts.append('; '.join(_scalars(data.get('market_metrics'))))
+    if analysis.get('opportunities'):
+        facts.append('opportunities: ' + ', '.join(map(str, analysis['opportunities'][:top_k])))
+    return [fact for fact in facts if fact]
+
+
+@summarizer('inventory')
+def summarize_inventory(data: Dict[str, Any], top_k: int) -> List[str]:
+    analysis = data.get('inventory_analysis') or {}
+    facts = ['; '.join(_scalars(analysis, ('days_remaining', 'restock_timeline', 'risk_level', 'health_status', 'ad_impact')))]
+    if analysis.get('concerns'):
+        facts.append('concerns: ' + ', '.join(map(str, analysis['concerns'][:top_k])))
+    return [fact for fact in facts if fact]
+
+
+def summarize_generic(data: Dict[str, Any], top_k: int) -> List[str]:
+    """Scalars at the top level and one level down, skipping ``raw_data``; never stringifies containers."""
+    facts = _scalars(data)
+    for key, value in data.items():
+        if key != 'raw_data' and isinstance(value, dict):
+            facts.extend(f"{_label(key)}: {fact}" for fact in _scalars(value))
+    return facts[:MAX_GENERIC_FACTS]
+
+
+def summarize_findings(tool: str, data: Optional[Dict[str, Any]], top_k: int = DEFAULT_TOP_K) -> List[str]:
+    """Facts about one tool result, most important first."""
+    if not data:
+        return []
+    return SUMMARIZERS.get(tool, summarize_generic)(data, top_k)
+
+
+class ContextBuilder:
+    """Formats execution steps for the report prompt within a token budget."""
+
+    def __init__(self, token_budget: Optional[int] = None, top_k: int = DEFAULT_TOP_K):
+        self.token_budget = int(token_budget if token_budget is not None
+                                else os.getenv('REPORT_CONTEXT_TOKENS', DEFAULT_CONTEXT_TOKENS))
+        self.top_k = top_k
+
+    def _step_header(self, step: TraceStep) -> List[str]:
+        status = "✅ Success" if step.ok else "❌ Failed"
+        lines = [f"Step {step.step}: {step.tool} {status}",
+                 f"- Reasoning: {step.reasoning}"]
+        if step.error:
+            lines.append(f"- Error: {step.error}")
+        if step.fallback:
+            lines.append(f"- Fallback: {step.fallback}")
+        return lines
+
+    def _belief_lines(self, step: TraceStep) -> List[str]:
+        lines = []
+        for hyp, old, new in step.significant_changes():
+            arrow = "↗️" if new > old else "↘️"
+            lines.append(f"  * {hyp}: {old:.2f} → {new:.2f} {arrow}")
+        return lines
+
+    def steps_text(self, steps: List[TraceStep]) -> str:
+        """Step headers and belief updates always fit; findings fill what is left of the budget."""
+        headers = [self._step_header(step) for step in steps]
+        beliefs = [self._belief_lines(step) for step in steps]
+        facts = [summarize_findings(step.tool, step.findings, self.top_k) if step.ok else [] for step in steps]
+
+        used = sum(count_tokens(line) + 1 for lines in headers + beliefs for line in lines)
+        kept: List[List[str]] = [[] for _ in steps]
+        for rank in range(max((len(f) for f in facts), default=0)):
+            for i, step_facts in enumerate(facts):
+                if rank < len(step_facts):
+                    cost = count_tokens(step_facts[rank]) + 2
+                    if used + cost <= self.token_budget:
+                        kept[i].append(step_facts[rank])
+                        used += cost
+
+        blocks = []
+        for i, step in enumerate(steps):
+            lines = list(headers[i])
+            if step.ok:
+                if kept[i]:
+                    findings = '; '.join(kept[i])
+                else:
+                    findings = 'omitted (context budget)' if facts[i] else 'No specific findings recorded'
+                lines.insert(2, f"- Findings: {findings}")
+            if beliefs[i]:
+                lines.append("- Belief Updates:")
+                lines.extend(beliefs[i])
+            blocks.append('\n'.join(lines))
+        return '\n\n'.join(blocks)
@@ -0,0 +1,335 @@
+"""Concurrent enhanced-report generation for batches of agent runs.
+
+``ReportPipeline.submit()`` queues a ``(result, scenario_input, trace_data)``
+job and returns immediately, so the agent loop keeps running while reports are
+generated in the background. Up to ``concurrency`` jobs run at once; every LLM
+request first takes from token buckets for requests/min and tokens/min, and
+retryable failures (429, 5xx, connection errors) are retried with full-jitter
+exponential backoff, honouring ``Retry-After`` when the server sends one.
+Cache hits (see ``report_cache``) never reach the limiter.
+
+Jobs go to any ``report_backends`` backend; the ``http`` backend pointed at
+``scripts/stub_llm_server.py`` exercises the whole path offline, and the
+``template`` backend (local, never rate limited) measures pure generation
+throughput.
+
+With a ``report_portfolio.PortfolioReport`` the pipeline writes no per-ASIN
+files; every report becomes a section of that one document instead.
+
+Usage:
+    python report_pipeline.py scenarios/*.json --concurrency 4 --rpm 60 --tpm 90000
+    python report_pipeline.py scenarios/*.json --report-backend http     # against the stub server
+    python report_pipeline.py scenarios/*.json --report-backend template
+    python report_pipeline.py scenarios/*.json --report-backend template --portfolio reports/portfolio.html
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional
+
+from agent import metrics
+from enhanced_report import EnhancedReportGenerator
+from report_backends import (BACKENDS, OPENAI_AVAILABLE, BackendError, Completion, Messages, OpenAIBackend,
+                             ReportBackend, create_backend)
+from report_cache import ResponseCache, cache_enabled_from_env
+from report_context import count_tokens
+from report_portfolio import PortfolioReport
+from tools.resilience import full_jitter
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE_S = 1.0
+DEFAULT_BACKOFF_MAX_S = 30.0
+
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_min``.
+
+    Starts full; ``capacity`` defaults to one minute's worth, which allows an
+    initial burst and then settles at the configured rate.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: float = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate_per_min <= 0:
+            raise ValueError(f"rate_per_min must be positive, got {rate_per_min}")
+        self.rate = rate_per_min / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until ``amount`` tokens are available and take them; returns seconds waited."""
+        # A request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """Take (positive) or return (negative) tokens without waiting, e.g. to settle an estimate."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min buckets; either limit may be None (unlimited)."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, tokens: int) -> float:
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.tokens:
+            waited += self.tokens.acquire(tokens)
+        return waited
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Charge the difference between the estimated and the reported token usage."""
+        if self.tokens and actual is not None:
+            self.tokens.adjust(actual - estimated)
+
+
+def estimate_tokens(messages: Messages, max_tokens: Optional[int]) -> int:
+    """Rough prompt + completion token count, with a few tokens of overhead per message."""
+    return sum(count_tokens(message.get('content') or '') + 4 for message in messages) + (max_tokens or 0)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    if OPENAI_AVAILABLE:
+        import openai
+        if isinstance(error, openai.APIConnectionError):
+            return True
+    # BackendError without a status code is a transport failure
+    return isinstance(error, (BackendError, ConnectionError, TimeoutError))
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    if getattr(error, 'retry_after', None) is not None:
+        return error.retry_after
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class _LimitedBackend(ReportBackend):
+    """Routes a remote backend's completions through the pipeline's limiter and retries."""
+
+    def __init__(self, pipeline: 'ReportPipeline', backend: ReportBackend):
+        super().__init__(backend.model)
+        self.name = backend.name
+        self._pipeline = pipeline
+        self._backend = backend
+
+    @property
+    def label(self) -> str:
+        return self._backend.label
+
+    @property
+    def cache_namespace(self) -> str:
+        return self._backend.cache_namespace
+
+    def complete(self, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        return self._pipeline._complete(self._backend, messages, max_tokens, temperature)
+
+
+class ReportOutcome(NamedTuple):
+    asin: str
+    path: Optional[str]
+    status: str  # written | failed | skipped
+    seconds: float
+
+
+class ReportPipeline:
+    """Background enhanced-report generation with bounded concurrency and rate limits."""
+
+    def __init__(self, language: str = 'en', concurrency: int = DEFAULT_CONCURRENCY, rpm: Optional[float] = None,
+                 tpm: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base_s: float = DEFAULT_BACKOFF_BASE_S, backoff_max_s: float = DEFAULT_BACKOFF_MAX_S,
+                 backend: Optional[ReportBackend] = None, client=None, cache: Optional[ResponseCache] = None,
+                 portfolio: Optional[PortfolioReport] = None):
+        """``backend`` defaults to ``create_backend()`` with the OpenAI SDK's own retries disabled; ``client`` is a
+        shortcut for an OpenAI backend around any object with an OpenAI-style ``chat.completions.create``.
+        ``portfolio`` collects every report as a section of one document instead of a file per ASIN; the caller
+        closes it after ``close()``."""
+        self.language = language
+        self.portfolio = portfolio
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.cache = cache if cache is not None else ResponseCache(enabled=cache_enabled_from_env())
+
+        if backend is None:
+            backend = OpenAIBackend(client) if client is not None else create_backend(max_retries=0)
+        # Local backends are neither rate limited nor retried
+        self.backend = _LimitedBackend(self, backend) if backend and backend.remote else backend
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='report')
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'written': 0, 'failed': 0, 'skipped': 0,
+                       'requests': 0, 'retries': 0, 'errors': 0, 'rate_wait_s': 0.0}
+
+    def submit(self, result: dict, scenario_input, trace_data: dict = None) -> 'Future[ReportOutcome]':
+        """Queue a report job; returns at once with a future for its outcome."""
+        with self._lock:
+            self._stats['submitted'] += 1
+        future = self._executor.submit(self._generate, result, scenario_input, trace_data)
+        self._futures.append(future)
+        return future
+
+    def _generate(self, result: dict, scenario_input, trace_data: Optional[dict]) -> ReportOutcome:
+        start = time.perf_counter()
+        generator = EnhancedReportGenerator(language=self.language, cache=self.cache, backend=self.backend)
+        if self.portfolio is not None:
+            # The section (with the agent's recommendations) is added even when the report failed
+            report = generator.render_report(result, scenario_input, trace_data)
+            self.portfolio.add(result, scenario_input, report)
+            path = str(self.portfolio.path) if report is not None else None
+        else:
+            path = generator.generate_enhanced_report(result, scenario_input, trace_data)
+        status = 'written' if path else ('failed' if self.backend else 'skipped')
+        with self._lock:
+            self._stats[status] += 1
+        return ReportOutcome(scenario_input.asin, path, status, time.perf_counter() - start)
+
+    def _complete(self, backend: ReportBackend, messages: Messages, max_tokens: int, temperature: float) -> Completion:
+        estimated = estimate_tokens(messages, max_tokens)
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire(estimated)
+            with self._lock:
+                self._stats['requests'] += 1
+                self._stats['rate_wait_s'] += waited
+            try:
+                completion = backend.complete(messages, max_tokens, temperature)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    with self._lock:
+                        self._stats['errors'] += 1
+                    metrics.report_requests.inc('error')
+                    raise
+                delay = max(full_jitter(attempt, self.backoff_base_s, self.backoff_max_s), _retry_after(e) or 0.0)
+                with self._lock:
+                    self._stats['retries'] += 1
+                metrics.report_requests.inc('retry')
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self.limiter.settle(estimated, completion.total_tokens)
+            metrics.report_requests.inc('ok')
+            return completion
+
+    def wait(self) -> List[ReportOutcome]:
+        """Block until every submitted job has finished; outcomes in submission order."""
+        return [future.result() for future in self._futures]
+
+    def close(self) -> List[ReportOutcome]:
+        outcomes = self.wait()
+        self._executor.shutdown(wait=True)
+        return outcomes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, rate_wait_s=round(self._stats['rate_wait_s'], 3))
+
+    def __enter__(self) -> 'ReportPipeline':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run a batch of scenarios and generate enhanced reports concurrently')
+    parser.add_argument('scenarios', nargs='+', help='Scenario JSON files')
+    parser.add_argument('--lang', choices=['en', 'zh-tw'], default='en', help='Report language')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Reports generated at once (default: 4)')
+    parser.add_argument('--rpm', type=float, help='Max LLM requests per minute')
+    parser.add_argument('--tpm', type=float, help='Max LLM tokens per minute (prompt + max completion, estimated)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help='Retries per request on 429/5xx/connection errors')
+    parser.add_argument('--report-backend', choices=BACKENDS, help='Completion backend (default: $REPORT_BACKEND or openai)')
+    parser.add_argument('--no-report-cache', action='store_true', help='Always call the LLM instead of reusing cached responses')
+    parser.add_argument('--portfolio', metavar='PATH',
+                        help='Write one consolidated report (.md, or .html/.htm) instead of a file per ASIN')
+    args = parser.parse_args()
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from agent.loop import AgentLoop
+    from demo import load_scenario
+
+    console = Console()
+    agent = AgentLoop(headless=True)
+    cache = ResponseCache(enabled=cache_enabled_from_env(args.no_report_cache))
+    started = time.perf_counter()
+
+    backend = create_backend(args.report_backend, max_retries=0)
+    portfolio = PortfolioReport(args.portfolio, language=args.lang) if args.portfolio else None
+    with ReportPipeline(args.lang, args.concurrency, args.rpm, args.tpm, args.max_retries, backend=backend,
+                        cache=cache, portfolio=portfolio) as pipeline:
+        if pipeline.backend is None:
+            console.print("[dim yellow]💡 Set OPENAI_API_KEY environment variable to generate enhanced reports[/dim yellow]")
+        for path in args.scenarios:
+            scenario_input, data_dir = load_scenario(path)
+            result = agent.run(scenario_input, data_dir, {})
+            trace_data = agent.trace_manager.load_trace(result['trace_file']) if result.get('trace_file') else None
+            pipeline.submit(result, scenario_input, trace_data)
+        runs_done = time.perf_counter() - started
+        outcomes = pipeline.wait()
+    if portfolio is not None:
+        portfolio.close()
+
+    table = Table(title=f"📋 ENHANCED REPORTS ({len(outcomes)} runs)", show_header=True, header_style="bold magenta")
+    table.add_column("ASIN", style="cyan", no_wrap=True)
+    table.add_column("Status", no_wrap=True)
+    table.add_column("Seconds", justify="right", no_wrap=True)
+    table.add_column("Report", overflow="fold")
+    for outcome in outcomes:
+        table.add_row(outcome.asin, outcome.status, f"{outcome.seconds:.2f}", outcome.path or '-')
+    console.print(table)
+    if portfolio is not None:
+        console.print(f"📊 Portfolio report ({portfolio.count} ASINs): {portfolio.path}")
+
+    stats = pipeline.stats()
+    console.print(f"Agent runs finished in {runs_done:.2f}s, reports in {time.perf_counter() - started:.2f}s; "
+                  f"{stats['requests']} request(s), {stats['retries']} retr{'y' if stats['retries'] == 1 else 'ies'}, "
+                  f"{stats['rate_wait_s']:.2f}s waiting on rate limits, cache {cache.stats()['hits']} hit(s)")
+
+
+if __name__ == '__main__':
+    main()
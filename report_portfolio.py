@@ -0,0 +1,263 @@
+"""Consolidated portfolio report for a batch of agent runs.
+
+``PortfolioReport`` collects one section per ASIN into a single markdown or
+HTML document, headed by a summary table of strategies, confidences and risk
+levels across the batch. Sections are streamed to a spool file as they are
+added and summary rows to another, so only running totals stay in memory and
+memory use does not grow with the number of ASINs. ``close()`` assembles the
+final document next to its destination and moves it into place atomically;
+a batch that fails part-way leaves no half-written report behind.
+
+``add()`` is thread-safe. Sections appear in the order they were added, which
+for ``ReportPipeline`` is completion order.
+
+Usage:
+    python report_pipeline.py scenarios/*.json --report-backend template --portfolio reports/portfolio.md
+    python report_pipeline.py scenarios/*.json --portfolio reports/portfolio.html
+"""
+
+import html
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+try:
+    from markdown_it import MarkdownIt
+    MARKDOWN_AVAILABLE = True
+except ImportError:
+    MARKDOWN_AVAILABLE = False
+
+FORMATS = ('md', 'html')
+
+LABELS = {
+    'en': {
+        'title': '📊 Portfolio Report',
+        'asins': 'ASINs',
+        'generated': 'Generated',
+        'avg_confidence': 'Average confidence',
+        'strategies': 'Strategies',
+        'risk_levels': 'Risk levels',
+        'summary': '📋 Summary',
+        'reports': '🔍 Reports',
+        'columns': ('#', 'ASIN', 'Strategy', 'Confidence', 'Risk', 'Primary hypothesis', 'Steps'),
+        'strategy': 'Strategy',
+        'confidence': 'Confidence',
+        'risk': 'Risk',
+        'unavailable': 'Enhanced analysis unavailable for this run.',
+    },
+    'zh-tw': {
+        'title': '📊 投資組合報告',
+        'asins': 'ASIN 數',
+        'generated': '生成時間',
+        'avg_confidence': '平均信心水準',
+        'strategies': '策略',
+        'risk_levels': '風險等級',
+        'summary': '📋 摘要',
+        'reports': '🔍 報告',
+        'columns': ('#', 'ASIN', '策略', '信心水準', '風險', '主要假設', '步數'),
+        'strategy': '策略',
+        'confidence': '信心水準',
+        'risk': '風險',
+        'unavailable': '此次執行沒有可用的增強分析。',
+    },
+}
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="{lang}">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; max-width: 980px; margin: 2em auto; padding: 0 1em; line-height: 1.5; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #d0d7de; padding: 4px 10px; text-align: left; }}
+pre {{ background: #f6f8fa; padding: 1em; overflow-x: auto; }}
+section {{ border-top: 1px solid #d0d7de; margin-top: 2em; }}
+</style>
+</head>
+<body>
+"""
+
+
+def demote_headings(markdown: str, levels: int) -> str:
+    """Shift ATX headings down by ``levels`` (capped at ``######``), leaving fenced code untouched."""
+    lines = []
+    fenced = False
+    for line in markdown.split('\n'):
+        if line.startswith('```'):
+            fenced = not fenced
+        elif not fenced and line.startswith('#'):
+            hashes = len(line) - len(line.lstrip('#'))
+            if line[hashes:hashes + 1] == ' ':
+                line = '#' * min(6, hashes + levels) + line[hashes:]
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def _cell(value) -> str:
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
+
+class PortfolioReport:
+    """One document for many ASINs, written incrementally."""
+
+    def __init__(self, path: Union[str, Path], fmt: Optional[str] = None, language: str = 'en'):
+        """``fmt`` defaults to ``html`` for ``.html``/``.htm`` paths and ``md`` otherwise."""
+        self.path = Path(path)
+        self.fmt = fmt or ('html' if self.path.suffix.lower() in ('.html', '.htm') else 'md')
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unknown portfolio format {self.fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.language = language
+        self.labels = LABELS.get(language, LABELS['en'])
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Spools live next to the destination so the final move stays on one filesystem
+        self._rows = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.path.parent)
+        self._sections = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.path.parent)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+        self.count = 0
+        self.confidence_total = 0.0
+        self.strategies: Counter = Counter()
+        self.risk_levels: Counter = Counter()
+
+    def add(self, result: dict, scenario_input, report: Optional[str] = None) -> int:
+        """Append one ASIN: a summary row and a section holding ``report`` (the enhanced markdown report).
+
+        Without a report the section still lists the agent's recommendations. Returns the section number.
+        """
+        asin = scenario_input.asin
+        strategy = result.get('strategy', 'unknown')
+        confidence = result.get('confidence', 0) or 0
+        risk_level = result.get('risk_level', 'unknown')
+        body = self._render_body(result, report)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Portfolio report is already closed')
+            self.count += 1
+            number = self.count
+            self.confidence_total += confidence
+            self.strategies[strategy] += 1
+            self.risk_levels[risk_level] += 1
+
+            cells = [number, asin, strategy, f"{confidence:.0%}", str(risk_level).upper(),
+                     result.get('primary_hypothesis', '-'), result.get('total_steps', '-')]
+            labels = self.labels
+            if self.fmt == 'html':
+                cells[0] = f'<a href="#asin-{number}">{number}</a>'
+                self._rows.write('<tr>' + ''.join(
+                    f"<td>{cell if i == 0 else html.escape(str(cell))}</td>" for i, cell in enumerate(cells)) + '</tr>\n')
+                self._sections.write(
+                    f'<section id="asin-{number}">\n<h2>{number}. {html.escape(asin)}</h2>\n'
+                    f"<p><strong>{labels['strategy']}:</strong> {html.escape(strategy)} | "
+                    f"<strong>{labels['confidence']}:</strong> {confidence:.0%} | "
+                    f"<strong>{labels['risk']}:</strong> {html.escape(str(risk_level).upper())}</p>\n"
+                    f"{body}\n</section>\n")
+            else:
+                cells[0] = f"[{number}](#asin-{number})"
+                self._rows.write('| ' + ' | '.join(_cell(cell) for cell in cells) + ' |\n')
+                self._sections.write(
+                    f'<a id="asin-{number}"></a>\n\n## {number}. {asin}\n\n'
+                    f"**{labels['strategy']}:** {strategy} | **{labels['confidence']}:** {confidence:.0%} | "
+                    f"**{labels['risk']}:** {str(risk_level).upper()}\n\n{body}\n\n---\n\n")
+        return number
+
+    def _render_body(self, result: dict, report: Optional[str]) -> str:
+        if report is None:
+            recommendations: List[str] = result.get('recommendations') or []
+            report = '\n'.join([f"_{self.labels['unavailable']}_", ''] + [f"- {rec}" for rec in recommendations])
+        else:
+            # The report's own title becomes a level-3 heading under the section's "## N. ASIN"
+            report = demote_headings(report.strip(), 2)
+        if self.fmt == 'md':
+            return report
+        if not MARKDOWN_AVAILABLE:
+            return f"<pre>{html.escape(report)}</pre>"
+        renderer = getattr(self._local, 'renderer', None)
+        if renderer is None:
+            renderer = self._local.renderer = MarkdownIt('commonmark', {'html': False}).enable('table')
+        return renderer.render(report)
+
+    def _header(self) -> str:
+        labels = self.labels
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        average = self.confidence_total / self.count if self.count else 0.0
+        strategies = ', '.join(f"{name} ×{n}" for name, n in self.strategies.most_common()) or '-'
+        risk_levels = ', '.join(f"{str(level).upper()} ×{n}" for level, n in self.risk_levels.most_common()) or '-'
+        columns = labels['columns']
+
+        if self.fmt == 'html':
+            return (HTML_HEAD.format(lang=self.language, title=labels['title']) +
+                    f"<h1>{labels['title']}</h1>\n"
+                    f"<p><strong>{labels['asins']}:</strong> {self.count} | "
+                    f"<strong>{labels['generated']}:</strong> {timestamp} | "
+                    f"<strong>{labels['avg_confidence']}:</strong> {average:.0%}</p>\n"
+                    f"<p><strong>{labels['strategies']}:</strong> {html.escape(strategies)}<br>\n"
+                    f"<strong>{labels['risk_levels']}:</strong> {html.escape(risk_levels)}</p>\n"
+                    f"<h2>{labels['summary']}</h2>\n<table>\n<thead><tr>" +
+                    ''.join(f"<th>{column}</th>" for column in columns) + "</tr></thead>\n<tbody>\n")
+
+        return (f"# {labels['title']}\n"
+                f"**{labels['asins']}:** {self.count} | **{labels['generated']}:** {timestamp} | "
+                f"**{labels['avg_confidence']}:** {average:.0%}\n\n"
+                f"**{labels['strategies']}:** {strategies}  \n"
+                f"**{labels['risk_levels']}:** {risk_levels}\n\n"
+                f"## {labels['summary']}\n\n"
+                f"| {' | '.join(columns)} |\n"
+                f"|{'|'.join('---' for _ in columns)}|\n")
+
+    def _between(self) -> str:
+        if self.fmt == 'html':
+            return f"</tbody>\n</table>\n<h2>{self.labels['reports']}</h2>\n"
+        return f"\n## {self.labels['reports']}\n\n"
+
+    def close(self) -> str:
+        """Assemble the document from the spools, move it into place and return its path."""
+        with self._lock:
+            if self._closed:
+                return str(self.path)
+            self._closed = True
+
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{id(self):x}.tmp")
+        try:
+            with open(tmp_path, 'x', encoding='utf-8') as out:
+                out.write(self._header())
+                for spool, separator in ((self._rows, self._between()), (self._sections, None)):
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, out)
+                    if separator:
+                        out.write(separator)
+                if self.fmt == 'html':
+                    out.write("</body>\n</html>\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self._rows.close()
+            self._sections.close()
+        return str(self.path)
+
+    def discard(self) -> None:
+        """Drop everything added so far without writing the document."""
+        with self._lock:
+            self._closed = True
+        self._rows.close()
+        self._sections.close()
+
+    def __enter__(self) -> 'PortfolioReport':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
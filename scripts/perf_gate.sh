@@ -0,0 +1,42 @@
+#!/bin/bash
+# Performance regression gate: benchmark a base ref and the working tree on the
+# key paths, then compare with noise-aware thresholds.
+#
+# Usage: scripts/perf_gate.sh [BASE_REF] [RUNS]
+#   BASE_REF  git ref to compare against (default: main)
+#   RUNS      suite runs per side; samples are pooled (default: 3)
+#
+# Extra compare options can be passed through PERF_GATE_COMPARE_ARGS,
+# e.g. PERF_GATE_COMPARE_ARGS="--tolerance 0.05".
+
+set -euo pipefail
+
+BASE_REF=${1:-main}
+RUNS=${2:-3}
+ROOT=$(git rev-parse --show-toplevel)
+WORK=$(mktemp -d)
+SUITE_ARGS=(--filter tool.ads_metrics agent.run --keywords 1000 1000000 --repeat 5 --data-dir "$ROOT/benchmarks/.data")
+
+cleanup() {
+    git -C "$ROOT" worktree remove --force "$WORK/base" >/dev/null 2>&1 || true
+    rm -rf "$WORK"
+}
+trap cleanup EXIT
+
+git -C "$ROOT" worktree add --detach "$WORK/base" "$BASE_REF" >/dev/null
+if [ ! -f "$WORK/base/benchmarks/suite.py" ]; then
+    echo "❌ $BASE_REF has no benchmarks/suite.py to compare against"
+    exit 2
+fi
+
+mkdir -p "$WORK/results/base" "$WORK/results/head"
+# Alternate sides so drift in machine load affects both equally
+for i in $(seq 1 "$RUNS"); do
+    echo "⏱️  Run $i/$RUNS: $BASE_REF"
+    (cd "$WORK/base" && python -m benchmarks.suite "${SUITE_ARGS[@]}" --out "$WORK/results/base/$i.json" >/dev/null)
+    echo "⏱️  Run $i/$RUNS: working tree"
+    (cd "$ROOT" && python -m benchmarks.suite "${SUITE_ARGS[@]}" --out "$WORK/results/head/$i.json" >/dev/null)
+done
+
+cd "$ROOT"
+python -m benchmarks.compare "$WORK/results/base" "$WORK/results/head" --strict ${PERF_GATE_COMPARE_ARGS:-}
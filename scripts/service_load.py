@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Local load generator for the agent service.
+
+Runs ``--concurrency`` closed-loop clients, each with a keep-alive connection.
+A client submits a run (``POST /runs``), long-polls ``GET /runs/{id}?wait=``
+until it finishes, then submits the next, cycling through the bundled
+scenarios. Runs refused with 429 are counted and resubmitted after the
+server's ``Retry-After``. Prints end-to-end latency percentiles (first submit,
+including any 429 backoff, to finished result) next to the server's own
+queue-wait and run-time percentiles from ``/stats``. The server figures are
+interpolated within log2 histogram buckets, so they are estimates. The bundled
+scenarios repeat, so with request coalescing on, most runs are served from the
+cache; ``--no-coalesce`` (or a service started with it) measures execution.
+
+Usage:
+    python service.py --workers 4 &
+    python scripts/service_load.py --url http://127.0.0.1:8080 --requests 500 --concurrency 16
+    python scripts/service_load.py --start --workers 4 --queue-size 8 --concurrency 32   # in-process service
+"""
+
+import argparse
+import http.client
+import itertools
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import orjson
+from rich.console import Console
+from rich.table import Table
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def scenario_payloads(scenarios_dir: Path, flags: Dict) -> List[bytes]:
+    """``POST /runs`` bodies for every ``scenario_<name>.json`` with data under ``mock/<name>``."""
+    payloads = []
+    for path in sorted(scenarios_dir.glob('scenario_*.json')):
+        if (ROOT / 'mock' / path.stem.replace('scenario_', '')).is_dir():
+            payloads.append(orjson.dumps({'scenario': orjson.loads(path.read_bytes()),
+                                          'data': path.stem.replace('scenario_', ''), 'flags': flags}))
+    return payloads
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples."""
+    if not samples:
+        return None
+    return samples[max(0, math.ceil(q * len(samples)) - 1)]
+
+
+class LoadClient:
+    def __init__(self, host: str, port: int, timeout_s: float):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout_s)
+
+    def request(self, method: str, path: str, body: bytes = None) -> tuple:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, response.getheader('Retry-After'), response.read()
+
+    def run(self, payload: bytes, wait_s: float) -> tuple:
+        """(latency_s, rejections, final run dict); latency runs from the first submit, 429 backoff included."""
+        started = time.perf_counter()
+        rejections = 0
+        while True:
+            status, retry_after, body = self.request('POST', '/runs', payload)
+            if status != 429:
+                break
+            rejections += 1
+            time.sleep(float(retry_after or 1))
+        if status != 202:
+            raise RuntimeError(f"POST /runs returned {status}: {body[:200]!r}")
+        run = orjson.loads(body)
+        while run['status'] not in ('succeeded', 'failed'):
+            _, _, body = self.request('GET', f"/runs/{run['id']}?wait={wait_s}")
+            run = orjson.loads(body)
+        return time.perf_counter() - started, rejections, run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load-test the agent service')
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help='Service base URL')
+    parser.add_argument('--requests', type=int, default=500, help='Runs to complete')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent closed-loop clients')
+    parser.add_argument('--scenarios', default=str(ROOT / 'scenarios'), help='Directory of scenario_*.json files')
+    parser.add_argument('--flags', default='{}', help='JSON flags sent with every run')
+    parser.add_argument('--wait', type=float, default=10.0, help='Long-poll seconds per GET /runs/{id}')
+    parser.add_argument('--start', action='store_true', help='Start an in-process service on --url first')
+    parser.add_argument('--workers', type=int, help='With --start: service workers')
+    parser.add_argument('--queue-size', type=int, help='With --start: service queue size')
+    parser.add_argument('--no-coalesce', action='store_true',
+                        help='With --start: execute every run instead of sharing identical ones')
+    args = parser.parse_args()
+
+    console = Console()
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    payloads = scenario_payloads(Path(args.scenarios), orjson.loads(args.flags))
+    if not payloads:
+        console.print(f"[red]No runnable scenarios in {args.scenarios}[/red]")
+        sys.exit(1)
+
+    server = None
+    if args.start:
+        from service import serve
+        options = {key: value for key, value in (('workers', args.workers), ('queue_size', args.queue_size))
+                   if value is not None}
+        server = serve(port, host, data_root=str(ROOT / 'mock'), coalesce=not args.no_coalesce, **options)
+
+    latencies: List[float] = []
+    counts = {'rejected': 0, 'failed': 0, 'errors': 0}
+    sources: Dict[str, int] = {}
+    lock = threading.Lock()
+    tickets = itertools.count()
+
+    def client() -> None:
+        load_client = LoadClient(host, port, args.wait + 30)
+        while True:
+            ticket = next(tickets)
+            if ticket >= args.requests:
+                return
+            try:
+                latency, rejections, run = load_client.run(payloads[ticket % len(payloads)], args.wait)
+            except (OSError, RuntimeError, http.client.HTTPException) as e:
+                with lock:
+                    counts['errors'] += 1
+                console.print(f"[yellow]⚠️  {type(e).__name__}: {e}[/yellow]")
+                load_client = LoadClient(host, port, args.wait + 30)
+                continue
+            with lock:
+                latencies.append(latency)
+                counts['rejected'] += rejections
+                counts['failed'] += run['status'] == 'failed'
+                sources[run.get('source', 'unknown')] = sources.get(run.get('source', 'unknown'), 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, name=f'load-{i}') for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = orjson.loads(LoadClient(host, port, 10).request('GET', '/stats')[2])
+    if server is not None:
+        server.shutdown()
+        server.service.stop()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    table = Table(title=f"🚦 SERVICE LOAD ({args.concurrency} clients, {stats['workers']} workers, "
+                        f"queue {stats['queue_size']})", show_header=True, header_style="bold magenta")
+    table.add_column("Latency", style="cyan", no_wrap=True)
+    for column in ("p50 ms", "p90 ms", "p99 ms", "max ms"):
+        table.add_column(column, justify="right", no_wrap=True)
+
+    def fmt(value: Optional[float]) -> str:
+        return '-' if value is None else f"{value:.1f}"
+
+    table.add_row("end-to-end (client)", *(fmt(percentile(latencies_ms, q)) for q in (0.5, 0.9, 0.99, 1.0)))
+    # Server percentiles are interpolated within log2 buckets; max is exact
+    for label, key in (("queue wait (server, est.)", 'queue_wait'), ("run (server, est.)", 'run_latency')):
+        summary = stats[key]
+        table.add_row(label, *(fmt(summary[f]) for f in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')))
+    console.print(table)
+    console.print(f"{len(latencies)} run(s) in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} runs/s); "
+                  f"{counts['rejected']} rejected with 429 and resubmitted, {counts['failed']} failed, "
+                  f"{counts['errors']} client error(s)")
+    if stats.get('dedup'):
+        console.print(f"Served by source: {', '.join(f'{name} {n}' for name, n in sorted(sources.items()))}; "
+                      f"server dedup hit rate {stats['dedup']['hit_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+In-process smoke/regression runner for every scenario.
+
+Discovers ``scenarios/scenario_*.json``, runs each through a headless AgentLoop
+(optionally on several threads), checks strategy, primary hypothesis and step
+count against ``scripts/smoke_golden.json`` and reports per-scenario wall time.
+
+Usage:
+    python scripts/smoke.py
+    python scripts/smoke.py --jobs 4
+    python scripts/smoke.py --update-golden     # after an intended behaviour change
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+from rich.console import Console
+from rich.table import Table
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from agent.loop import AgentLoop
+from demo import resolve_scenario
+
+GOLDEN_FILE = Path(__file__).resolve().parent / 'smoke_golden.json'
+CHECKED_FIELDS = ('strategy', 'primary_hypothesis', 'total_steps')
+
+console = Console()
+
+
+def discover(scenario_dir: Path) -> List[Path]:
+    return sorted(scenario_dir.glob('scenario_*.json'))
+
+
+def run_scenarios(paths: List[Path], jobs: int, trace_dir: Path) -> List[Dict[str, Any]]:
+    """Run each scenario headless; one AgentLoop per worker thread."""
+    local = threading.local()
+
+    def run_one(path: Path) -> Dict[str, Any]:
+        agent = getattr(local, 'agent', None)
+        if agent is None:
+            agent = local.agent = AgentLoop(headless=True, trace_dir=str(trace_dir))
+        start = time.perf_counter()
+        try:
+            scenario_input, data_dir = resolve_scenario(str(path), mock_root=str(ROOT / 'mock'))
+            result = agent.run(scenario_input, data_dir, {})
+        except Exception as e:
+            return {'scenario': path.stem, 'error': f"{type(e).__name__}: {e}",
+                    'wall_ms': (time.perf_counter() - start) * 1000}
+        outcome = {field: result.get(field) for field in CHECKED_FIELDS}
+        outcome.update(scenario=path.stem, wall_ms=(time.perf_counter() - start) * 1000)
+        return outcome
+
+    if jobs <= 1:
+        return [run_one(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run_one, paths))
+
+
+def check(outcome: Dict[str, Any], golden: Dict[str, Any]) -> Optional[str]:
+    """Mismatch description, or None when the outcome matches its golden entry."""
+    if outcome.get('error'):
+        return outcome['error']
+    expected = golden.get(outcome['scenario'])
+    if expected is None:
+        return 'no golden entry (run with --update-golden)'
+    diffs = [f"{field}: expected {expected.get(field)!r}, got {outcome[field]!r}"
+             for field in CHECKED_FIELDS if expected.get(field) != outcome[field]]
+    return '; '.join(diffs) or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run every scenario in-process and check it against the golden file')
+    parser.add_argument('--scenarios', default=str(ROOT / 'scenarios'), help='Scenario directory')
+    parser.add_argument('--golden', default=str(GOLDEN_FILE), help='Golden expectations file')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker threads (default: 1)')
+    parser.add_argument('--update-golden', action='store_true', help='Rewrite the golden file from this run')
+    args = parser.parse_args()
+
+    paths = discover(Path(args.scenarios))
+    if not paths:
+        console.print(f"[red]No scenario_*.json files in {args.scenarios}[/red]")
+        sys.exit(1)
+
+    golden_path = Path(args.golden)
+    golden = orjson.loads(golden_path.read_bytes()) if golden_path.exists() else {}
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='smoke-trace-') as trace_dir:
+        outcomes = run_scenarios(paths, args.jobs, Path(trace_dir))
+    total_ms = (time.perf_counter() - started) * 1000
+
+    if args.update_golden:
+        failed = [o for o in outcomes if o.get('error')]
+        if failed:
+            for outcome in failed:
+                console.print(f"[red]{outcome['scenario']}: {outcome['error']}[/red]")
+            sys.exit(1)
+        golden = {o['scenario']: {field: o[field] for field in CHECKED_FIELDS} for o in outcomes}
+        golden_path.write_bytes(orjson.dumps(golden, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b'\n')
+        console.print(f"[green]Updated {golden_path} with {len(golden)} scenario(s)[/green]")
+        return
+
+    table = Table(title=f"🧪 SMOKE ({len(outcomes)} scenarios, {args.jobs} job{'s' if args.jobs != 1 else ''})",
+                  show_header=True, header_style="bold magenta")
+    table.add_column("Scenario", style="cyan", no_wrap=True)
+    table.add_column("Strategy", overflow="fold")
+    table.add_column("Primary Hypothesis", overflow="fold")
+    table.add_column("Steps", justify="right", no_wrap=True)
+    table.add_column("Wall ms", justify="right", no_wrap=True)
+    table.add_column("OK", justify="center", no_wrap=True)
+
+    failures = []
+    for outcome in outcomes:
+        problem = check(outcome, golden)
+        if problem:
+            failures.append((outcome['scenario'], problem))
+        table.add_row(
+            outcome['scenario'].replace('scenario_', ''),
+            str(outcome.get('strategy', '-')),
+            str(outcome.get('primary_hypothesis', '-')),
+            str(outcome.get('total_steps', '-')),
+            f"{outcome['wall_ms']:.1f}",
+            "❌" if problem else "✅"
+        )
+    console.print(table)
+
+    for scenario, problem in failures:
+        console.print(f"[red]{scenario}: {problem}[/red]")
+    status = "[red]FAILED[/red]" if failures else "[green]passed[/green]"
+    console.print(f"{len(outcomes) - len(failures)}/{len(outcomes)} {status} in {total_ms:.0f} ms")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
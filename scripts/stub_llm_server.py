@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local stub of the OpenAI chat-completions API for exercising report generation.
+
+Serves ``POST /v1/chat/completions`` with a canned reply containing all six
+report sections, after a configurable latency. It can inject failures (429 with
+``Retry-After`` or 500) at a given rate and enforce its own requests-per-minute
+limit, so retries and client-side rate limiting can be observed without network
+access. ``GET /stats`` returns request counts and the peak number of requests
+in flight.
+
+Usage:
+    python scripts/stub_llm_server.py --port 8765 --latency 0.5 --fail-rate 0.2
+    python report_pipeline.py scenarios/*.json --report-backend http
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+
+SECTIONS = ('EXECUTION_OVERVIEW', 'STEP_BY_STEP_ANALYSIS', 'REASONING_EVOLUTION',
+            'DISCOVERY_INSIGHTS', 'PROCESS_EVALUATION', 'EDUCATIONAL_INSIGHTS')
+
+
+class StubState:
+    def __init__(self, latency_s: float, fail_rate: float, rpm: float, seed: int):
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.rpm = rpm
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'ok': 0, 'injected_429': 0, 'injected_500': 0, 'rate_limited': 0,
+                      'peak_in_flight': 0, 'prompt_chars': 0}
+
+    def admit(self) -> str:
+        """'ok', 'rate_limited', '429' or '500' for a new request."""
+        with self.lock:
+            now = time.monotonic()
+            self.stats['requests'] += 1
+            while self.recent and now - self.recent[0] > 60:
+                self.recent.popleft()
+            if self.rpm and len(self.recent) >= self.rpm:
+                self.stats['rate_limited'] += 1
+                return 'rate_limited'
+            self.recent.append(now)
+            if self.random.random() < self.fail_rate:
+                kind = self.random.choice(('429', '500'))
+                self.stats[f'injected_{kind}'] += 1
+                return kind
+            self.in_flight += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+            return 'ok'
+
+    def done(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self.stats['ok'] += 1
+
+
+def completion(request: dict) -> dict:
+    prompt_tokens = sum(len(m.get('content') or '') for m in request.get('messages', [])) // 4
+    content = '\n\n'.join(f"{i}. {section}:\nStub analysis for {section.lower().replace('_', ' ')}."
+                          for i, section in enumerate(SECTIONS, 1))
+    completion_tokens = len(content) // 4
+    return {
+        'id': f"chatcmpl-stub-{time.time_ns()}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': request.get('model', 'stub'),
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens}
+    }
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict, headers: dict = None):
+            body = orjson.dumps(payload)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/stats':
+                self._send(404, {'error': {'message': 'not found'}})
+                return
+            with state.lock:
+                self._send(200, dict(state.stats, in_flight=state.in_flight))
+
+        def do_POST(self):
+            if self.path.split('?')[0] not in ('/v1/chat/completions', '/chat/completions'):
+                self._send(404, {'error': {'message': 'not found'}})
+                return
+            request = orjson.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            verdict = state.admit()
+            if verdict in ('rate_limited', '429'):
+                self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                           {'Retry-After': '1'})
+                return
+            if verdict == '500':
+                self._send(500, {'error': {'message': 'Injected server error', 'type': 'server_error'}})
+                return
+            try:
+                with state.lock:
+                    state.stats['prompt_chars'] += sum(len(m.get('content') or '') for m in request.get('messages', []))
+                time.sleep(state.latency_s)
+                self._send(200, completion(request))
+            finally:
+                state.done()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8765, host: str = '127.0.0.1', latency_s: float = 0.5, fail_rate: float = 0.0,
+          rpm: float = 0, seed: int = 0) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread; ``server.state.stats`` holds the counters."""
+    state = StubState(latency_s, fail_rate, rpm, seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, name='stub-llm', daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Stub OpenAI chat-completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds per successful completion')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 429 or 500')
+    parser.add_argument('--rpm', type=float, default=0, help='Reject requests beyond this many per minute with 429')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.host, args.latency, args.fail_rate, args.rpm, args.seed)
+    print(f"Stub chat-completions API on http://{args.host}:{args.port}/v1 (stats at /stats); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Long-running agent service with an HTTP API.
+
+Every ``demo.py`` invocation pays interpreter start-up, imports, registry and
+tool construction before the first step. The service pays that once: each
+worker thread owns a headless ``AgentLoop`` built at start-up, and tool data
+caches (partitioned datasets, keyword histories) and policy tables stay warm
+for the life of the process.
+
+Runs are queued on a bounded queue served by a fixed pool of workers. When the
+queue is full, ``POST /runs`` answers 429 with ``Retry-After`` instead of
+letting latency grow without bound.
+
+Identical requests are coalesced (``agent.coalesce``) at submit time: a
+request whose twin finished within ``--coalesce-ttl`` seconds is answered from
+the cache at once, and one whose twin is queued or running attaches to it and
+finishes with it. Neither takes a queue slot or a worker. Each run reports how
+it was served in ``source``.
+
+Endpoints:
+    POST /runs              {"scenario": {ScenarioInput}, "data": "high_acos", "flags": {...}} -> 202 {"id", ...}
+    GET  /runs/{id}         run status and, once finished, the final action plan
+    GET  /runs/{id}?wait=5  long-poll up to 5 seconds for the run to finish
+    GET  /stats             queue depth, admission counters, latency percentiles and dedup hit rates
+    GET  /metrics           OpenMetrics counters (with --metrics)
+
+``data`` names a scenario data directory under ``--data-root`` (default ``mock``).
+
+Usage:
+    python service.py --port 8080 --workers 4 --queue-size 64
+    python scripts/service_load.py --url http://127.0.0.1:8080 --requests 500 --concurrency 16
+"""
+
+import argparse
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import orjson
+from pydantic import ValidationError
+
+from agent import metrics
+from agent.coalesce import CACHED, COALESCED, DEFAULT_TTL_S, EXECUTED, RunCoalescer, run_key
+from agent.instrumentation import Histogram
+from agent.loop import AgentLoop
+from agent.types import ScenarioInput
+from tools.resilience import breaker_states
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_KEEP_RUNS = 10000
+MAX_WAIT_S = 30.0
+MAX_BODY_BYTES = 1 << 20
+
+
+class AdmissionError(Exception):
+    """The run queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Run:
+    """One submitted run and its outcome."""
+
+    __slots__ = ('id', 'scenario', 'data_dir', 'flags', 'key', 'status', 'submitted_ns', 'started_ns', 'finished_ns',
+                 'result', 'error', 'source', 'done')
+
+    def __init__(self, scenario: ScenarioInput, data_dir: str, flags: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.scenario = scenario
+        self.data_dir = data_dir
+        self.flags = flags
+        # Coalescing key when this run leads its identical requests
+        self.key = None
+        self.status = 'queued'
+        self.submitted_ns = time.perf_counter_ns()
+        self.started_ns: Optional[int] = None
+        self.finished_ns: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # executed, coalesced or cached once finished
+        self.source: Optional[str] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        run = {'id': self.id, 'status': self.status, 'asin': self.scenario.asin, 'goal': self.scenario.goal}
+        if self.started_ns is not None:
+            run['queue_ms'] = round((self.started_ns - self.submitted_ns) / 1e6, 3)
+        if self.finished_ns is not None:
+            run['run_ms'] = round((self.finished_ns - self.started_ns) / 1e6, 3)
+        if self.source is not None:
+            run['source'] = self.source
+        if self.result is not None:
+            run['result'] = self.result
+        if self.error is not None:
+            run['error'] = self.error
+        return run
+
+
+class AgentService:
+    """Warm agent loops behind a bounded run queue."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 data_root: str = 'mock', trace_dir: str = './trace', keep_runs: int = DEFAULT_KEEP_RUNS,
+                 coalesce: bool = True, coalesce_ttl_s: float = DEFAULT_TTL_S):
+        """With ``coalesce``, identical runs share one execution and results are reused for ``coalesce_ttl_s``."""
+        self.workers = workers
+        self.data_root = Path(data_root).resolve()
+        self.trace_dir = trace_dir
+        self.keep_runs = keep_runs
+        self._queue: 'queue.Queue[Optional[Run]]' = queue.Queue(maxsize=queue_size)
+        self._runs: 'OrderedDict[str, Run]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+        self._stats = {'accepted': 0, 'rejected': 0, 'succeeded': 0, 'failed': 0}
+        self._queue_wait = Histogram()
+        self._run_latency = Histogram()
+        self.coalescer = RunCoalescer(coalesce_ttl_s) if coalesce else None
+
+    def start(self) -> 'AgentService':
+        """Build one AgentLoop per worker (loops are not shared across threads) and start the workers."""
+        ready = threading.Barrier(self.workers + 1)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(ready,), name=f'agent-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Finish queued runs, then stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def resolve_data_dir(self, name: str) -> str:
+        """Map a request's ``data`` name to a directory under the data root."""
+        data_dir = (self.data_root / name).resolve()
+        if not data_dir.is_relative_to(self.data_root) or not data_dir.is_dir():
+            raise ValueError(f"Unknown data directory {name!r} under {self.data_root}")
+        return str(data_dir)
+
+    def submit(self, scenario: ScenarioInput, data_dir: str, flags: Dict[str, Any] = None) -> Run:
+        """Queue a run; raises AdmissionError when the queue is full."""
+        run = Run(scenario, data_dir, dict(flags or {}))
+        with self._lock:
+            self._runs[run.id] = run
+            self._evict()
+        if self.coalescer is not None:
+            key = run_key(scenario, data_dir, run.flags)
+            # A duplicate never waits in the queue: it starts now and may finish with its twin before begin() returns
+            run.started_ns, run.status = run.submitted_ns, 'running'
+            result, source = self.coalescer.begin(key, lambda result, error: self._finish(run, result, error, COALESCED))
+            if source != EXECUTED:
+                with self._lock:
+                    self._stats['accepted'] += 1
+                if source == CACHED:
+                    self._finish(run, result, None, CACHED)
+                return run
+            run.key, run.started_ns, run.status = key, None, 'queued'
+        try:
+            self._queue.put_nowait(run)
+        except queue.Full:
+            error = AdmissionError(f"Run queue is full ({self._queue.maxsize} waiting)")
+            with self._lock:
+                self._runs.pop(run.id, None)
+                self._stats['rejected'] += 1
+            if run.key is not None:
+                # Duplicates that attached in the meantime fail with the leader
+                self.coalescer.finish(run.key, error=error)
+            raise error
+        with self._lock:
+            self._stats['accepted'] += 1
+        return run
+
+    def get(self, run_id: str) -> Optional[Run]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def _evict(self) -> None:
+        """Forget the oldest finished runs beyond ``keep_runs``; queued and running ones are kept."""
+        excess = len(self._runs) - self.keep_runs
+        if excess <= 0:
+            return
+        stale = []
+        for run_id, run in self._runs.items():
+            if len(stale) >= excess:
+                break
+            if run.done.is_set():
+                stale.append(run_id)
+        for run_id in stale:
+            del self._runs[run_id]
+
+    def _work(self, ready: threading.Barrier) -> None:
+        agent = AgentLoop(headless=True, trace_dir=self.trace_dir)
+        ready.wait()
+        while True:
+            run = self._queue.get()
+            if run is None:
+                return
+            run.started_ns = time.perf_counter_ns()
+            run.status = 'running'
+            with self._lock:
+                self._busy += 1
+                self._queue_wait.observe(run.started_ns - run.submitted_ns)
+            try:
+                result, error = agent.run(run.scenario, run.data_dir, run.flags), None
+            except Exception as e:
+                result, error = None, e
+            with self._lock:
+                self._busy -= 1
+            self._finish(run, result, error, EXECUTED)
+            if run.key is not None:
+                self.coalescer.finish(run.key, result, error)
+
+    def _finish(self, run: Run, result: Optional[Dict[str, Any]], error: Optional[BaseException], source: str) -> None:
+        """Record a run's outcome; cache hits are not counted in the run-time histogram."""
+        run.finished_ns = time.perf_counter_ns()
+        run.source = source
+        if error is None:
+            run.result, run.status = result, 'succeeded'
+        else:
+            run.error, run.status = f"{type(error).__name__}: {error}", 'failed'
+        with self._lock:
+            self._stats[run.status] += 1
+            if source != CACHED:
+                self._run_latency.observe(run.finished_ns - run.started_ns)
+        run.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, busy=self._busy, queued=self._queue.qsize(),
+                        queue_size=self._queue.maxsize, queue_wait=self._queue_wait.summary(),
+                        run_latency=self._run_latency.summary(),
+                        dedup=self.coalescer.stats() if self.coalescer is not None else None,
+                        breakers=breaker_states())
+
+
+def parse_run_request(service: AgentService, body: bytes) -> Run:
+    """Validate a ``POST /runs`` body and submit it; raises ValueError for a bad request."""
+    try:
+        request = orjson.loads(body or b'{}')
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+    if not isinstance(request, dict) or not isinstance(request.get('scenario'), dict):
+        raise ValueError('Body must be an object with a "scenario" object')
+    try:
+        scenario = ScenarioInput(**request['scenario'])
+    except ValidationError as e:
+        raise ValueError('Invalid scenario: ' + '; '.join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())) from e
+    if not isinstance(request.get('data'), str):
+        raise ValueError('"data" must name a scenario data directory')
+    flags = request.get('flags') or {}
+    if not isinstance(flags, dict):
+        raise ValueError('"flags" must be an object')
+    return service.submit(scenario, service.resolve_data_dir(request['data']), flags)
+
+
+def make_handler(service: AgentService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; with Nagle on, keep-alive clients stall ~40 ms on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, payload: Any, headers: dict = None,
+                  content_type: str = 'application/json') -> None:
+            body = payload if isinstance(payload, bytes) else orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str, headers: dict = None) -> None:
+            self._send(status, {'error': message}, headers)
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_BODY_BYTES:
+                self._error(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+                return
+            body = self.rfile.read(length)
+            if path != '/runs':
+                self._error(404, 'not found')
+                return
+            try:
+                run = parse_run_request(service, body)
+            except AdmissionError as e:
+                self._error(429, str(e), {'Retry-After': str(e.retry_after)})
+                return
+            except ValueError as e:
+                self._error(400, str(e))
+                return
+            self._send(202, run.to_dict(), {'Location': f"/runs/{run.id}"})
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/stats':
+                self._send(200, service.stats())
+            elif url.path == '/metrics':
+                self._send(200, metrics.render_metrics().encode('utf-8'), content_type=metrics.CONTENT_TYPE)
+            elif url.path.startswith('/runs/'):
+                run = service.get(url.path[len('/runs/'):])
+                if run is None:
+                    self._error(404, 'unknown run')
+                    return
+                try:
+                    wait_s = min(float(parse_qs(url.query).get('wait', ['0'])[0]), MAX_WAIT_S)
+                except ValueError:
+                    self._error(400, '"wait" must be a number of seconds')
+                    return
+                if wait_s > 0:
+                    run.done.wait(wait_s)
+                self._send(200, run.to_dict())
+            else:
+                self._error(404, 'not found')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8080, host: str = '127.0.0.1', **service_options) -> ThreadingHTTPServer:
+    """Start the service on a daemon thread; ``server.service`` is the AgentService."""
+    service = AgentService(**service_options).start()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, name='agent-http', daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve agent runs over HTTP with warm agent loops')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent runs (default: 4)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Runs waiting for a worker before POST /runs answers 429 (default: 64)')
+    parser.add_argument('--data-root', default='mock', help='Directory holding scenario data directories')
+    parser.add_argument('--trace-dir', default='./trace', help='Where run traces are saved')
+    parser.add_argument('--keep-runs', type=int, default=DEFAULT_KEEP_RUNS, help='Finished runs kept for GET /runs/{id}')
+    parser.add_argument('--coalesce-ttl', type=float, default=DEFAULT_TTL_S,
+                        help='Seconds a finished run answers identical requests (default: 300; 0 shares in-flight runs only)')
+    parser.add_argument('--no-coalesce', action='store_true', help='Run every request, even identical ones')
+    parser.add_argument('--metrics', action='store_true', help='Enable OpenMetrics counters at /metrics')
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable_metrics()
+    server = serve(args.port, args.host, workers=args.workers, queue_size=args.queue_size,
+                   data_root=args.data_root, trace_dir=args.trace_dir, keep_runs=args.keep_runs,
+                   coalesce=not args.no_coalesce, coalesce_ttl_s=args.coalesce_ttl)
+    print(f"Agent service on http://{args.host}:{args.port} ({args.workers} workers, queue {args.queue_size}); "
+          f"Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.service.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""BatchPolicyEngine against the scalar PolicyEngine, on every bundled scenario."""
+
+from pathlib import Path
+
+import orjson
+import pytest
+
+from agent import reasoning
+from agent.loop import AgentLoop
+from agent.types import ScenarioInput
+
+ROOT = Path(__file__).resolve().parent.parent
+NAMES = sorted(p.stem[len('scenario_'):] for p in (ROOT / 'scenarios').glob('scenario_*.json'))
+
+# Prefixes of the scalar stop messages, by BatchPolicyEngine reason
+STOP_MESSAGES = {
+    'Very high confidence': 'very_high_confidence',
+    'High confidence': 'high_confidence_tools_completed',
+    'Maximum iterations': 'max_iterations',
+    'All main tools used': 'main_tools_low_confidence',
+    'No more informative tools': 'no_tool_available',
+}
+
+
+def stop_reason(trace):
+    for entry in trace['execution_trace']:
+        if entry['type'] == 'decision' and entry['data'].get('action') == 'stop':
+            return next(reason for prefix, reason in STOP_MESSAGES.items()
+                        if entry['data']['reasoning'].startswith(prefix))
+    return ''
+
+
+@pytest.fixture(scope='module')
+def loop(tmp_path_factory):
+    reasoning.console.quiet = True
+    return AgentLoop(headless=True, trace_dir=str(tmp_path_factory.mktemp('trace')))
+
+
+@pytest.fixture(scope='module')
+def scenarios():
+    return [ScenarioInput(**orjson.loads((ROOT / 'scenarios' / f'scenario_{name}.json').read_bytes()))
+            for name in NAMES]
+
+
+@pytest.fixture(scope='module')
+def scalar(loop, scenarios):
+    """Trace of each scenario's AgentLoop.run."""
+    return [loop.trace_manager.load_trace(loop.run(scenario, str(ROOT / 'mock' / name), {})['trace_file'])
+            for name, scenario in zip(NAMES, scenarios)]
+
+
+@pytest.fixture(scope='module')
+def batch(loop, scenarios):
+    return loop.run_batch(scenarios, [str(ROOT / 'mock' / name) for name in NAMES])
+
+
+def test_bundled_scenarios_are_covered(batch):
+    assert len(NAMES) >= 6
+    assert len(batch) == len(NAMES)
+
+
+@pytest.mark.parametrize('i', range(len(NAMES)), ids=NAMES)
+def test_batch_matches_scalar_engine(scalar, batch, i):
+    trace, result = scalar[i], batch[i]
+    final_action = trace['final_state']['final_action']
+
+    assert result['tools'] == [entry['data']['tool'] for entry in trace['execution_trace']
+                               if entry['type'] == 'action']
+    assert result['beliefs'] == {name: hyp['belief'] for name, hyp in trace['final_state']['hypotheses'].items()}
+    assert result['stop_reason'] == stop_reason(trace)
+    assert result['total_steps'] == trace['metadata']['total_steps']
+    for field in ('primary_hypothesis', 'confidence', 'strategy', 'risk_level'):
+        assert result[field] == final_action[field]
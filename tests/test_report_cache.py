@@ -0,0 +1,162 @@
+"""Report response cache, exercised through EnhancedReportGenerator with a local fake OpenAI client."""
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import report_cache
+from agent import reasoning
+from agent.loop import AgentLoop
+from agent.types import ScenarioInput
+from enhanced_report import EnhancedReportGenerator
+from report_backends import HTTPBackend, OpenAIBackend
+from report_cache import ResponseCache, cache_enabled_from_env
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class FakeCompletions:
+    """Stands in for ``client.chat.completions``; records every request."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, messages, max_tokens, temperature):
+        self.calls.append(messages)
+        content = f"EXECUTION_OVERVIEW: fake analysis #{len(self.calls)}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(total_tokens=100))
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=FakeCompletions())
+
+    @property
+    def calls(self):
+        return self.chat.completions.calls
+
+
+@pytest.fixture(scope='module')
+def runs(tmp_path_factory):
+    """(result, scenario, trace) for two scenarios, from headless agent runs."""
+    reasoning.console.quiet = True
+    loop = AgentLoop(headless=True, trace_dir=str(tmp_path_factory.mktemp('trace')))
+    runs = {}
+    for name in ('high_acos', 'low_impr'):
+        scenario = ScenarioInput(**orjson.loads((ROOT / 'scenarios' / f'scenario_{name}.json').read_bytes()))
+        result = loop.run(scenario, str(ROOT / 'mock' / name), {})
+        runs[name] = (result, scenario, loop.trace_manager.load_trace(result['trace_file']))
+    return runs
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+def render(client, cache, run):
+    return EnhancedReportGenerator(client=client, cache=cache).render_report(*run)
+
+
+def test_identical_prompt_hits_and_changed_prompt_misses(tmp_path, client, runs):
+    cache = ResponseCache(str(tmp_path))
+
+    first = render(client, cache, runs['high_acos'])
+    second = render(client, cache, runs['high_acos'])
+    assert len(client.calls) == 1
+    assert 'fake analysis #1' in first
+    assert first == second
+
+    render(client, cache, runs['low_impr'])
+    assert len(client.calls) == 2
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_cache_persists_across_generators(tmp_path, client, runs):
+    render(client, ResponseCache(str(tmp_path)), runs['high_acos'])
+    render(client, ResponseCache(str(tmp_path)), runs['high_acos'])
+    assert len(client.calls) == 1
+
+
+def test_expired_entry_is_refetched(tmp_path, client, runs, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl_s=60)
+    render(client, cache, runs['high_acos'])
+
+    now = report_cache.time.time()
+    monkeypatch.setattr(report_cache.time, 'time', lambda: now + 120)
+    render(client, cache, runs['high_acos'])
+
+    assert len(client.calls) == 2
+    assert cache.stats()['expired'] == 1
+    assert cache.stats()['writes'] == 2
+
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path):
+    content = 'x' * 400
+    cache = ResponseCache(str(tmp_path), max_bytes=1200)
+    cache.put('aa' * 32, content)
+    cache.put('bb' * 32, content)
+    # Make 'aa' the older file, then touch it with a hit so 'bb' becomes least recently used
+    now = report_cache.time.time()
+    os.utime(cache._path('aa' * 32), (now - 200, now - 200))
+    os.utime(cache._path('bb' * 32), (now - 100, now - 100))
+    assert cache.get('aa' * 32) == content
+
+    cache.put('cc' * 32, content)
+
+    assert cache.get('bb' * 32) is None
+    assert cache.get('aa' * 32) == content
+    assert cache.get('cc' * 32) == content
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.parametrize('env, flag', [('0', False), ('off', False), ('1', True)])
+def test_cache_can_be_bypassed(tmp_path, client, runs, monkeypatch, env, flag):
+    # REPORT_CACHE=0 or --no-report-cache
+    monkeypatch.setenv('REPORT_CACHE', env)
+    cache = ResponseCache(str(tmp_path), enabled=cache_enabled_from_env(flag))
+
+    render(client, cache, runs['high_acos'])
+    render(client, cache, runs['high_acos'])
+
+    assert len(client.calls) == 2
+    assert list(tmp_path.iterdir()) == []
+    assert cache.stats()['hit_rate'] is None
+
+
+def test_cache_is_enabled_by_default(monkeypatch):
+    monkeypatch.delenv('REPORT_CACHE', raising=False)
+    assert cache_enabled_from_env()
+    assert not cache_enabled_from_env(no_report_cache=True)
+
+
+def test_stats_counters(tmp_path, client, runs):
+    cache = ResponseCache(str(tmp_path))
+    for _ in range(3):
+        render(client, cache, runs['high_acos'])
+
+    assert cache.stats() == {
+        'enabled': True,
+        'hits': 2,
+        'misses': 1,
+        'expired': 0,
+        'writes': 1,
+        'evictions': 0,
+        'hit_rate': 0.667
+    }
+
+
+def test_backends_with_the_same_model_do_not_share_entries():
+    http, openai = HTTPBackend('http://127.0.0.1:8000/v1'), OpenAIBackend(FakeClient())
+    assert http.model == openai.model
+
+    def key(backend):
+        return ResponseCache.key(backend.model, 'en', 'system', 'prompt', 0.7, 1500, backend=backend.cache_namespace)
+
+    assert key(http) != key(openai)
+    assert key(http) != key(HTTPBackend('http://127.0.0.1:9000/v1'))
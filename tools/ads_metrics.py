@@ -1,16 +1,28 @@
+import heapq
 import os
-import orjson
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from .base import BaseTool, wrap_call
+from .columnar import KeywordColumns, find_keyword_columns, load_keyword_columns
+from .keyword_history import find_keyword_history, open_keyword_history
+from .dataset import open_dataset
 from agent.errors import DataMissingError
 from agent.types import ToolResult
 
+DEFAULT_TOP_K = 3
+KEYWORD_ISSUES = ('low_impression', 'high_cpc', 'no_conversion')
+
+# Share of the period budget spent
+BUDGET_CAPPED_THRESHOLD = 0.95
+BUDGET_UNDERUSED_THRESHOLD = 0.5
+
 
 class AdsMetricsTool(BaseTool):
     """Tool for analyzing advertising metrics data."""
@@ -25,7 +37,10 @@ class AdsMetricsTool(BaseTool):
         
         Expected context:
         - scenario_dir: Path to scenario data directory
+        - asin: ASIN to serve when scenario_dir is a partitioned dataset
         - mode: 'keyword' or 'campaign' (defaults to 'keyword')
+        - top_k: Number of worst offenders to report per category (defaults to 3)
+        - lookback_days: Window for the daily keyword store and daily campaign budgets
         - flags: Dict that may contain 'break_ads' for testing
         """
         # Check for test mode break
@@ -33,83 +48,332 @@ class AdsMetricsTool(BaseTool):
         if flags.get('break_ads', False):
             raise DataMissingError("Simulated ads metrics data unavailable (test mode)")
         
-        scenario_dir = Path(ctx['scenario_dir'])
         mode = ctx.get('mode', 'keyword')
         
         if mode == 'keyword':
-            file_path = scenario_dir / 'ads_keywords.json'
+            filename = 'ads_keywords.json'
         elif mode == 'campaign':
-            file_path = scenario_dir / 'ads_campaign.json'
+            filename = 'ads_campaign.json'
         else:
             raise ValueError(f"Invalid ads_metrics mode: {mode}. Must be 'keyword' or 'campaign'")
         
-        if not file_path.exists():
-            raise DataMissingError(f"Ads metrics file not found: {file_path}")
+        top_k = int(ctx.get('top_k', DEFAULT_TOP_K))
+        scenario_dir = Path(ctx['scenario_dir'])
+        history_path = columns_path = window = None
+        if mode == 'keyword' and open_dataset(scenario_dir) is None:
+            history_path = find_keyword_history(scenario_dir)
+            if history_path is None:
+                columns_path = find_keyword_columns(scenario_dir)
+        
+        if history_path is not None:
+            # Daily store: answer the lookback window from cumulative snapshots
+            with self.timed(ctx, 'read'):
+                columns, window = open_keyword_history(history_path).window(ctx.get('lookback_days', 7))
+            source = str(history_path)
+            keyword_count = len(columns)
+            analysis_data = self._analyze_keyword_columns(columns, top_k)
+            analysis_data['raw_data'] = {'format': 'daily', 'rows': keyword_count, 'window': window}
+        elif columns_path is not None:
+            # Columnar store: aggregate directly over memory-mapped columns
+            with self.timed(ctx, 'read'):
+                columns = load_keyword_columns(columns_path)
+            source = str(columns_path)
+            keyword_count = len(columns)
+            analysis_data = self._analyze_keyword_columns(columns, top_k)
+        else:
+            raw_data, source = self.load_data(ctx, filename, 'Ads metrics')
+            if mode == 'keyword':
+                keywords = raw_data.get('keywords', [])
+                keyword_count = len(keywords)
+                analysis_data = self._analyze_keywords(raw_data, keywords, top_k)
+            else:  # campaign mode
+                keyword_count = 0
+                analysis_data = self._analyze_campaigns(raw_data, top_k, ctx.get('lookback_days', 7))
         
-        # Load raw data
-        with open(file_path, 'rb') as f:
-            raw_data = orjson.loads(f.read())
+        meta = {
+            'mode': mode,
+            'source': source,
+            'keywords_analyzed': keyword_count,
+            'latency_ms': 0  # Will be set by wrap_call
+        }
+        if window is not None:
+            meta['window'] = window
         
-        # Calculate derived metrics for analysis
-        if mode == 'keyword':
-            keywords = raw_data.get('keywords', [])
+        return ToolResult(
+            name=self.name,
+            ok=True,
+            data=analysis_data,
+            meta=meta
+        )
+    
+    def _analyze_keywords(self, raw_data: Dict[str, Any], keywords: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+        """Aggregate keyword rows parsed from ads_keywords.json in a single pass.
+        
+        Detail lists keep the K most severe keywords per category in bounded heaps:
+        lowest impressions, highest CPC, and highest spend without conversions.
+        """
+        total_impressions = total_clicks = total_orders = 0
+        total_spend = total_revenue = 0
+        counts = {category: 0 for category in KEYWORD_ISSUES}
+        heaps: Dict[str, List[Tuple]] = {category: [] for category in KEYWORD_ISSUES}
+        
+        for i, k in enumerate(keywords):
+            impressions = k.get('impressions', 0)
+            cpc = k.get('cpc', 0)
+            spend = k.get('spend', 0)
+            orders = k.get('orders', 0)
             
-            # Calculate aggregated metrics
-            total_impressions = sum(k.get('impressions', 0) for k in keywords)
-            total_clicks = sum(k.get('clicks', 0) for k in keywords)
-            total_spend = sum(k.get('spend', 0) for k in keywords)
-            total_orders = sum(k.get('orders', 0) for k in keywords)
-            total_revenue = sum(k.get('revenue', 0) for k in keywords)
+            total_impressions += impressions
+            total_clicks += k.get('clicks', 0)
+            total_spend += spend
+            total_orders += orders
+            total_revenue += k.get('revenue', 0)
             
-            avg_ctr = total_clicks / total_impressions if total_impressions > 0 else 0
-            avg_cvr = total_orders / total_clicks if total_clicks > 0 else 0
-            overall_acos = total_spend / total_revenue if total_revenue > 0 else float('inf')
+            # Analyze performance patterns; -i keeps earlier keywords on ties
+            if impressions < 500:
+                counts['low_impression'] += 1
+                self._push_top_k(heaps['low_impression'], (-impressions, -i, i), top_k)
+            if cpc > 0.5:
+                counts['high_cpc'] += 1
+                self._push_top_k(heaps['high_cpc'], (cpc, -i, i), top_k)
+            if orders == 0:
+                counts['no_conversion'] += 1
+                self._push_top_k(heaps['no_conversion'], (spend, -i, i), top_k)
+        
+        return self._keyword_analysis(
+            raw_data,
+            (total_impressions, total_clicks, total_spend, total_orders, total_revenue),
+            self._issue_counts(counts, len(keywords)),
+            {
+                category: [keywords[entry[2]] for entry in sorted(heap, reverse=True)]
+                for category, heap in heaps.items()
+            }
+        )
+    
+    def _analyze_keyword_columns(self, columns: KeywordColumns, top_k: int) -> Dict[str, Any]:
+        """Aggregate a columnar keyword store with vectorized reductions."""
+        impressions = columns['impressions']
+        orders = columns['orders']
+        cpc = columns['cpc']
+        
+        totals = (
+            int(impressions.sum()),
+            int(columns['clicks'].sum()),
+            float(np.nansum(columns['spend'])),
+            int(orders.sum()),
+            float(np.nansum(columns['revenue']))
+        )
+        
+        # (category mask, severity where larger is worse)
+        issues = {
+            'low_impression': (impressions < 500, -impressions),
+            'high_cpc': (cpc > 0.5, cpc),
+            'no_conversion': (orders == 0, np.nan_to_num(columns['spend']))
+        }
+        counts = {category: int(np.count_nonzero(mask)) for category, (mask, _) in issues.items()}
+        details = {
+            category: [columns.row(int(i)) for i in self._top_k_rows(mask, severity, top_k)]
+            for category, (mask, severity) in issues.items()
+        }
+        
+        return self._keyword_analysis(
+            {'format': 'columnar', 'rows': len(columns)},
+            totals,
+            self._issue_counts(counts, len(columns)),
+            details
+        )
+    
+    @staticmethod
+    def _top_k_rows(mask: np.ndarray, severity: np.ndarray, k: int) -> np.ndarray:
+        """Row indices of the K most severe masked rows, worst first, earlier rows first on ties."""
+        count = int(np.count_nonzero(mask))
+        k = min(k, count)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        
+        scores = np.where(mask, severity.astype(np.float64), -np.inf)
+        threshold = scores[np.argpartition(scores, -k)[-k:]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:k]]
+    
+    @staticmethod
+    def _issue_counts(counts: Dict[str, int], total_keywords: int) -> Dict[str, int]:
+        return {
+            'low_impression_keywords': counts['low_impression'],
+            'high_cpc_keywords': counts['high_cpc'],
+            'no_conversion_keywords': counts['no_conversion'],
+            'total_keywords': total_keywords
+        }
+    
+    def _keyword_analysis(self, raw_data: Dict[str, Any], totals: Tuple, issues: Dict[str, int],
+                          details: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        return {
+            'raw_data': raw_data,
+            'aggregated_metrics': self._aggregated_metrics(*totals),
+            'performance_issues': issues,
+            'keyword_details': details
+        }
+    
+    def _analyze_campaigns(self, raw_data: Dict[str, Any], top_k: int, lookback_days: int) -> Dict[str, Any]:
+        """Roll up campaign rows in one pass, keeping only the top-K offenders."""
+        campaigns = raw_data.get('campaigns') or []
+        if not campaigns:
+            return self._analyze_account_summary(raw_data)
+        
+        days = (raw_data.get('summary') or {}).get('days') or raw_data.get('days') or lookback_days
+        totals = [0, 0, 0.0, 0, 0.0]
+        by_type: Dict[str, Dict[str, Any]] = {}
+        utilization = {
+            bucket: {'campaigns': 0, 'spend': 0.0}
+            for bucket in ('capped', 'healthy', 'under_utilized', 'unknown')
+        }
+        utilization_sum = 0.0
+        budgeted = 0
+        acos_heap: List[Tuple] = []
+        spend_heap: List[Tuple] = []
+        
+        for i, campaign in enumerate(campaigns):
+            impressions = campaign.get('impressions', 0)
+            clicks = campaign.get('clicks', 0)
+            spend = campaign.get('spend', 0)
+            orders = campaign.get('orders', 0)
+            revenue = campaign.get('revenue', 0)
             
-            # Analyze performance patterns
-            low_impr_keywords = [k for k in keywords if k.get('impressions', 0) < 500]
-            high_cpc_keywords = [k for k in keywords if k.get('cpc', 0) > 0.5]
-            no_conversion_keywords = [k for k in keywords if k.get('orders', 0) == 0]
+            totals[0] += impressions
+            totals[1] += clicks
+            totals[2] += spend
+            totals[3] += orders
+            totals[4] += revenue
             
-            analysis_data = {
-                'raw_data': raw_data,
-                'aggregated_metrics': {
-                    'total_impressions': total_impressions,
-                    'total_clicks': total_clicks,
-                    'total_spend': round(total_spend, 2),
-                    'total_orders': total_orders,
-                    'total_revenue': round(total_revenue, 2),
-                    'avg_ctr': round(avg_ctr, 4),
-                    'avg_cvr': round(avg_cvr, 4),
-                    'overall_acos': round(overall_acos, 2) if overall_acos != float('inf') else None
-                },
-                'performance_issues': {
-                    'low_impression_keywords': len(low_impr_keywords),
-                    'high_cpc_keywords': len(high_cpc_keywords),
-                    'no_conversion_keywords': len(no_conversion_keywords),
-                    'total_keywords': len(keywords)
-                },
-                'keyword_details': {
-                    'low_impression': low_impr_keywords[:3],  # Top 3 for analysis
-                    'high_cpc': high_cpc_keywords[:3],
-                    'no_conversion': no_conversion_keywords[:3]
+            campaign_type = campaign.get('type') or campaign.get('campaign_type') or 'unknown'
+            rollup = by_type.get(campaign_type)
+            if rollup is None:
+                rollup = by_type[campaign_type] = {
+                    'campaigns': 0, 'impressions': 0, 'clicks': 0, 'spend': 0.0, 'orders': 0, 'revenue': 0.0
                 }
-            }
-        else:  # campaign mode
-            campaigns = raw_data.get('campaigns', [])
-            analysis_data = {
-                'raw_data': raw_data,
-                'campaign_count': len(campaigns),
-                'performance_summary': campaigns  # For campaign analysis
-            }
+            rollup['campaigns'] += 1
+            rollup['impressions'] += impressions
+            rollup['clicks'] += clicks
+            rollup['spend'] += spend
+            rollup['orders'] += orders
+            rollup['revenue'] += revenue
+            
+            budget_used = self._budget_utilization(campaign, days)
+            if budget_used is None:
+                bucket = 'unknown'
+            else:
+                utilization_sum += budget_used
+                budgeted += 1
+                if budget_used >= BUDGET_CAPPED_THRESHOLD:
+                    bucket = 'capped'
+                elif budget_used < BUDGET_UNDERUSED_THRESHOLD:
+                    bucket = 'under_utilized'
+                else:
+                    bucket = 'healthy'
+            utilization[bucket]['campaigns'] += 1
+            utilization[bucket]['spend'] += spend
+            
+            # Bounded min-heaps: the smallest retained offender is evicted first;
+            # -i keeps earlier campaigns on ties
+            if spend > 0:
+                acos = spend / revenue if revenue > 0 else float('inf')
+                self._push_top_k(acos_heap, ((acos, spend), -i, i), top_k)
+                self._push_top_k(spend_heap, (spend, -i, i), top_k)
         
-        return ToolResult(
-            name=self.name,
-            ok=True,
-            data=analysis_data,
-            meta={
-                'mode': mode,
-                'source': str(file_path),
-                'keywords_analyzed': len(keywords) if mode == 'keyword' else 0,
-                'latency_ms': 0  # Will be set by wrap_call
+        for rollup in by_type.values():
+            rollup['spend'] = round(rollup['spend'], 2)
+            rollup['revenue'] = round(rollup['revenue'], 2)
+            rollup['acos'] = round(rollup['spend'] / rollup['revenue'], 2) if rollup['revenue'] > 0 else None
+        for bucket in utilization.values():
+            bucket['spend'] = round(bucket['spend'], 2)
+        
+        return {
+            'raw_data': {key: value for key, value in raw_data.items() if key != 'campaigns'},
+            'campaign_count': len(campaigns),
+            'aggregated_metrics': self._aggregated_metrics(*totals),
+            'rollups': {
+                'by_type': by_type,
+                'budget_utilization': {
+                    **utilization,
+                    'avg_utilization': round(utilization_sum / budgeted, 4) if budgeted else None
+                }
+            },
+            'top_offenders': {
+                'acos': [self._campaign_summary(campaigns[entry[2]], days) for entry in sorted(acos_heap, reverse=True)],
+                'spend': [self._campaign_summary(campaigns[entry[2]], days) for entry in sorted(spend_heap, reverse=True)]
             }
-        )
\ No newline at end of file
+        }
+    
+    def _analyze_account_summary(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregate account-level ads data (summary and daily rows) without a campaign breakdown."""
+        summary = raw_data.get('summary')
+        if summary:
+            totals = (
+                summary.get('impressions', 0),
+                summary.get('clicks', 0),
+                summary.get('spend', 0),
+                summary.get('orders', 0),
+                summary.get('revenue', 0)
+            )
+        else:
+            daily = raw_data.get('daily', [])
+            totals = tuple(
+                sum(day.get(field, 0) for day in daily)
+                for field in ('impressions', 'clicks', 'spend', 'orders', 'revenue')
+            )
+        
+        return {
+            'raw_data': raw_data,
+            'campaign_count': 0,
+            'aggregated_metrics': self._aggregated_metrics(*totals)
+        }
+    
+    @staticmethod
+    def _push_top_k(heap: List[Tuple], entry: Tuple, k: int) -> None:
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif k > 0 and entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    @staticmethod
+    def _budget_utilization(campaign: Dict[str, Any], days: int) -> Optional[float]:
+        """Share of the period budget spent, or None when the campaign has no budget."""
+        budget = campaign.get('budget')
+        if not budget and campaign.get('daily_budget'):
+            budget = campaign['daily_budget'] * days
+        if not budget:
+            return None
+        return campaign.get('spend', 0) / budget
+    
+    def _campaign_summary(self, campaign: Dict[str, Any], days: int) -> Dict[str, Any]:
+        spend = campaign.get('spend', 0)
+        revenue = campaign.get('revenue', 0)
+        budget_used = self._budget_utilization(campaign, days)
+        return {
+            'campaign': campaign.get('name') or campaign.get('campaign_name') or campaign.get('campaign_id'),
+            'type': campaign.get('type') or campaign.get('campaign_type') or 'unknown',
+            'spend': round(spend, 2),
+            'revenue': round(revenue, 2),
+            'orders': campaign.get('orders', 0),
+            'acos': round(spend / revenue, 2) if revenue > 0 else None,
+            'budget_utilization': round(budget_used, 4) if budget_used is not None else None
+        }
+    
+    @staticmethod
+    def _aggregated_metrics(total_impressions: int, total_clicks: int, total_spend: float,
+                            total_orders: int, total_revenue: float) -> Dict[str, Any]:
+        avg_ctr = total_clicks / total_impressions if total_impressions > 0 else 0
+        avg_cvr = total_orders / total_clicks if total_clicks > 0 else 0
+        overall_acos = total_spend / total_revenue if total_revenue > 0 else float('inf')
+        
+        return {
+            'total_impressions': total_impressions,
+            'total_clicks': total_clicks,
+            'total_spend': round(total_spend, 2),
+            'total_orders': total_orders,
+            'total_revenue': round(total_revenue, 2),
+            'avg_ctr': round(avg_ctr, 4),
+            'avg_cvr': round(avg_cvr, 4),
+            'overall_acos': round(overall_acos, 2) if overall_acos != float('inf') else None
+        }
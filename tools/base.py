@@ -1,13 +1,24 @@
+import logging
 import os
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Callable
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Tuple
 from functools import wraps
 
+import orjson
+
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from agent.types import ToolResult
+from agent import metrics
+from agent.errors import CircuitOpenError, DataMissingError
+from agent.instrumentation import ns_to_ms, tool_timings
+from .dataset import open_dataset
+from .resilience import CircuitBreaker, RetryPolicy, breaker_for, is_retryable
+
+logger = logging.getLogger(__name__)
 
 
 class BaseTool(ABC):
@@ -16,79 +27,135 @@ class BaseTool(ABC):
     def __init__(self, name: str, timeout_s: int = 30):
         self.name = name
         self.timeout_s = int(os.getenv('TOOL_TIMEOUT_S', timeout_s))
+        self.retry_policy = RetryPolicy.from_env()
     
     @abstractmethod
     def run(self, ctx: Dict[str, Any]) -> ToolResult:
         """Execute the tool with given context."""
         pass
+    
+    @contextmanager
+    def timed(self, ctx: Dict[str, Any], phase: str) -> Iterator[None]:
+        """Accumulate time spent in a tool-internal phase (e.g. read, parse) into the call's timings."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            timings = ctx.setdefault('timings_ns', {})
+            timings[phase] = timings.get(phase, 0) + time.perf_counter_ns() - start
+    
+    def load_data(self, ctx: Dict[str, Any], filename: str, label: str) -> Tuple[Dict[str, Any], str]:
+        """Load a scenario data file, or the ASIN's slice when scenario_dir is a partitioned dataset.
+        
+        Returns:
+            Tuple of (raw data, source description)
+        """
+        scenario_dir = Path(ctx['scenario_dir'])
+        
+        dataset = open_dataset(scenario_dir)
+        if dataset is not None:
+            asin = ctx.get('asin')
+            with self.timed(ctx, 'read'):
+                return dataset.get(filename, asin), f"{scenario_dir / filename}#{asin}"
+        
+        file_path = scenario_dir / filename
+        if not file_path.exists():
+            raise DataMissingError(f"{label} file not found: {file_path}")
+        
+        with self.timed(ctx, 'read'):
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        with self.timed(ctx, 'parse'):
+            return orjson.loads(content), str(file_path)
 
 
 def wrap_call(func: Callable) -> Callable:
-    """Decorator to wrap tool calls with timeout, retry, and error handling."""
+    """Decorator to wrap tool calls with error classification, retry, and a per-tool circuit breaker."""
     
     @wraps(func)
     def wrapper(self, ctx: Dict[str, Any]) -> ToolResult:
-        start_time = time.time()
-        attempts = 2  # Initial attempt + 1 retry
-        last_error = None
+        start_ns = time.perf_counter_ns()
+        breaker = breaker_for(self.name)
+        source = f"{self.__class__.__module__}.{self.__class__.__name__}"
+        metrics.tool_calls.inc(self.name)
         
-        for attempt in range(attempts):
-            try:
-                # Execute the function
-                result = func(self, ctx)
-                
-                # Ensure result is a ToolResult
-                if isinstance(result, ToolResult):
-                    return result
-                elif isinstance(result, dict):
-                    # Convert dict to ToolResult if needed
-                    elapsed_ms = int((time.time() - start_time) * 1000)
-                    return ToolResult(
-                        name=self.name,
-                        ok=True,
-                        data=result,
-                        meta={
-                            'latency_ms': elapsed_ms,
-                            'source': f"{self.__class__.__module__}.{self.__class__.__name__}",
-                            'attempt': attempt + 1
-                        }
-                    )
-                else:
-                    raise ValueError(f"Tool {self.name} returned invalid result type: {type(result)}")
-                    
-            except Exception as e:
-                last_error = e
-                elapsed_ms = int((time.time() - start_time) * 1000)
-                
-                # Print retry information for visibility
-                if attempt < attempts - 1:
-                    print(f"🔄 Tool '{self.name}' failed on attempt {attempt + 1}, retrying... (Error: {str(e)[:50]}{'...' if len(str(e)) > 50 else ''})")
-                
-                # If this is the last attempt or a critical error, return failure
-                if attempt == attempts - 1:
-                    return ToolResult(
-                        name=self.name,
-                        ok=False,
-                        data={},
-                        meta={
-                            'latency_ms': elapsed_ms,
-                            'source': f"{self.__class__.__module__}.{self.__class__.__name__}",
-                            'attempt': attempt + 1,
-                            'error_type': type(e).__name__
-                        },
-                        error=str(e)
-                    )
-                
-                # Wait before retry (exponential backoff)
-                time.sleep(0.5 * (2 ** attempt))
+        if not breaker.allow():
+            # Fail fast: the tool kept failing with transient errors in recent runs
+            metrics.tool_short_circuits.inc(self.name)
+            error = CircuitOpenError(f"Circuit open for tool {self.name} after repeated failures; "
+                                     f"next probe in {breaker.retry_in():.1f}s")
+            return ToolResult(
+                name=self.name,
+                ok=False,
+                data={},
+                meta={
+                    'latency_ms': ns_to_ms(time.perf_counter_ns() - start_ns),
+                    'source': source,
+                    'attempt': 0,
+                    'error_type': type(error).__name__
+                },
+                error=str(error)
+            )
         
-        # Should never reach here, but safety fallback
-        return ToolResult(
-            name=self.name,
-            ok=False,
-            data={},
-            meta={'latency_ms': int((time.time() - start_time) * 1000)},
-            error=f"Unexpected failure after {attempts} attempts: {last_error}"
-        )
+        try:
+            return _call_with_retries(self, func, ctx, breaker, source, start_ns)
+        except BaseException:
+            # Interrupted (KeyboardInterrupt, SystemExit): a held half-open probe would block the tool for good
+            breaker.release()
+            raise
     
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def _call_with_retries(tool: BaseTool, func: Callable, ctx: Dict[str, Any], breaker: CircuitBreaker,
+                       source: str, start_ns: int) -> ToolResult:
+    policy = tool.retry_policy
+    for attempt in range(policy.max_attempts):
+        if attempt > 0:
+            metrics.tool_retries.inc(tool.name)
+        attempt_start_ns = time.perf_counter_ns()
+        ctx['timings_ns'] = {}
+        try:
+            # Execute the function
+            result = func(tool, ctx)
+            
+            # Convert dict to ToolResult if needed
+            if isinstance(result, dict):
+                result = ToolResult(name=tool.name, ok=True, data=result, meta={'source': source, 'attempt': attempt + 1})
+            elif not isinstance(result, ToolResult):
+                raise ValueError(f"Tool {tool.name} returned invalid result type: {type(result)}")
+            
+            breaker.record_success()
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            metrics.tool_latency.observe(elapsed_ns / 1e9, tool.name)
+            result.meta['latency_ms'] = ns_to_ms(elapsed_ns)
+            result.meta['timings'] = tool_timings(ctx['timings_ns'], time.perf_counter_ns() - attempt_start_ns)
+            return result
+                
+        except Exception as e:
+            retryable = is_retryable(e)
+            
+            # Permanent errors (missing data, bad input) fail the same way on every attempt
+            if not retryable or attempt == policy.max_attempts - 1:
+                breaker.record_failure(retryable)
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                metrics.tool_failures.inc(tool.name, type(e).__name__)
+                metrics.tool_latency.observe(elapsed_ns / 1e9, tool.name)
+                return ToolResult(
+                    name=tool.name,
+                    ok=False,
+                    data={},
+                    meta={
+                        'latency_ms': ns_to_ms(elapsed_ns),
+                        'source': source,
+                        'attempt': attempt + 1,
+                        'error_type': type(e).__name__
+                    },
+                    error=str(e)
+                )
+            
+            # Wait before retry (jittered exponential backoff)
+            delay = policy.delay(attempt)
+            logger.info("Tool %s failed on attempt %d (%s: %s), retrying in %.2fs",
+                        tool.name, attempt + 1, type(e).__name__, e, delay)
+            time.sleep(delay)
@@ -0,0 +1,242 @@
+"""
+Columnar on-disk format for keyword metrics.
+
+``ads_keywords.json`` is converted into a directory of memory-mapped NumPy arrays
+(one ``.npy`` per metric column) plus string tables for keyword text and match
+type, so loading is near zero-copy and aggregation runs directly over the mapped
+buffers. When ``pyarrow`` is installed an Arrow IPC file is supported as well.
+
+Layout of ``ads_keywords.columns/``:
+- ``meta.json``            row count and column list
+- ``<metric>.npy``         one array per numeric column
+- ``keyword.offsets.npy``  int64 offsets into ``keyword.utf8`` (rows + 1 entries)
+- ``keyword.utf8``         concatenated UTF-8 keyword text
+- ``match.codes.npy``      int16 codes into the ``match_types`` list in meta.json
+
+Usage:
+    python -m tools.columnar mock/high_acos/ads_keywords.json
+    python -m tools.columnar data/ads_keywords.json --out data/ads_keywords.columns
+    python -m tools.columnar data/ads_keywords.json --format arrow
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+COLUMNS_DIRNAME = 'ads_keywords.columns'
+ARROW_FILENAME = 'ads_keywords.arrow'
+
+# Numeric columns and their storage dtypes, in JSON field order
+NUMERIC_COLUMNS = {
+    'impressions': np.int64,
+    'clicks': np.int64,
+    'ctr': np.float64,
+    'cpc': np.float64,
+    'spend': np.float64,
+    'orders': np.int64,
+    'cvr': np.float64,
+    'revenue': np.float64,
+    'acos': np.float64,
+}
+
+
+class KeywordColumns:
+    """Column-oriented keyword metrics backed by memory-mapped (or Arrow) buffers."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], keywords: List[str], match_types: List[str],
+                 match_codes: np.ndarray, source: str):
+        self.columns = columns
+        self.match_types = match_types
+        self.match_codes = match_codes
+        self.source = source
+        self._keywords = keywords
+
+    def __len__(self) -> int:
+        return len(self.match_codes)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def keyword(self, row: int) -> str:
+        return self._keywords[row]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialize one keyword as the dict shape used in ads_keywords.json."""
+        record: Dict[str, Any] = {
+            'keyword': self.keyword(index),
+            'match': self.match_types[self.match_codes[index]],
+        }
+        for name, values in self.columns.items():
+            value = values[index].item()
+            record[name] = None if isinstance(value, float) and value != value else value
+        return record
+
+
+class _StringTable:
+    """Lazy view over an offsets + UTF-8 blob string table."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+
+def find_keyword_columns(data_dir: Path) -> Optional[Path]:
+    """Return the freshest columnar keyword store in a data dir, if it is not older than the JSON."""
+    data_dir = Path(data_dir)
+    json_path = data_dir / 'ads_keywords.json'
+    json_mtime = json_path.stat().st_mtime_ns if json_path.exists() else None
+
+    for candidate, marker in ((data_dir / COLUMNS_DIRNAME, 'meta.json'), (data_dir / ARROW_FILENAME, None)):
+        marker_path = candidate / marker if marker else candidate
+        if not marker_path.exists():
+            continue
+        if candidate.suffix == '.arrow' and not ARROW_AVAILABLE:
+            continue
+        if json_mtime is None or marker_path.stat().st_mtime_ns >= json_mtime:
+            return candidate
+    return None
+
+
+def load_keyword_columns(path: Path) -> KeywordColumns:
+    """Open a columnar keyword store (``.columns`` directory or ``.arrow`` file)."""
+    path = Path(path)
+    if path.suffix == '.arrow':
+        return _load_arrow(path)
+
+    with open(path / 'meta.json', 'rb') as f:
+        meta = orjson.loads(f.read())
+
+    columns = {name: np.load(path / f'{name}.npy', mmap_mode='r') for name in meta['columns']}
+    keywords = _StringTable(
+        np.load(path / 'keyword.offsets.npy', mmap_mode='r'),
+        np.memmap(path / 'keyword.utf8', dtype=np.uint8, mode='r') if meta['keyword_bytes'] else np.zeros(0, np.uint8)
+    )
+    match_codes = np.load(path / 'match.codes.npy', mmap_mode='r')
+    return KeywordColumns(columns, keywords, meta['match_types'], match_codes, str(path))
+
+
+def _load_arrow(path: Path) -> KeywordColumns:
+    if not ARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to read Arrow keyword stores")
+
+    table = pa_ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    columns = {
+        name: table.column(name).to_numpy()
+        for name in NUMERIC_COLUMNS if name in table.column_names
+    }
+    match = table.column('match').combine_chunks().dictionary_encode()
+    return KeywordColumns(
+        columns,
+        table.column('keyword').to_pylist(),
+        match.dictionary.to_pylist(),
+        match.indices.to_numpy(zero_copy_only=False),
+        str(path)
+    )
+
+
+def _or_default(value: Any, default: Any) -> Any:
+    return default if value is None else value
+
+
+def write_keyword_columns(keywords: List[Dict[str, Any]], out_dir: Path) -> Path:
+    """Write keyword rows as a ``.columns`` directory of ``.npy`` arrays."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    n = len(keywords)
+
+    for name, dtype in NUMERIC_COLUMNS.items():
+        default = np.nan if dtype is np.float64 else 0
+        values = np.fromiter(
+            (_or_default(k.get(name), default) for k in keywords), dtype=dtype, count=n
+        )
+        np.save(out_dir / f'{name}.npy', values)
+
+    encoded = [str(k.get('keyword', '')).encode('utf-8') for k in keywords]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(out_dir / 'keyword.offsets.npy', offsets)
+    with open(out_dir / 'keyword.utf8', 'wb') as f:
+        f.write(b''.join(encoded))
+
+    match_types: List[str] = []
+    match_index: Dict[str, int] = {}
+    codes = np.empty(n, dtype=np.int16)
+    for i, k in enumerate(keywords):
+        match = k.get('match', '')
+        if match not in match_index:
+            match_index[match] = len(match_types)
+            match_types.append(match)
+        codes[i] = match_index[match]
+    np.save(out_dir / 'match.codes.npy', codes)
+
+    # meta.json is written last: its mtime marks the store as complete
+    with open(out_dir / 'meta.json', 'wb') as f:
+        f.write(orjson.dumps({
+            'rows': n,
+            'columns': list(NUMERIC_COLUMNS),
+            'match_types': match_types,
+            'keyword_bytes': int(offsets[-1])
+        }))
+    return out_dir
+
+
+def write_keyword_arrow(keywords: List[Dict[str, Any]], out_path: Path) -> Path:
+    """Write keyword rows as an Arrow IPC file."""
+    if not ARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to write Arrow keyword stores")
+
+    arrays = {
+        'keyword': pa.array([str(k.get('keyword', '')) for k in keywords], pa.string()),
+        'match': pa.array([k.get('match', '') for k in keywords], pa.string()),
+    }
+    for name, dtype in NUMERIC_COLUMNS.items():
+        arrow_type = pa.float64() if dtype is np.float64 else pa.int64()
+        arrays[name] = pa.array([k.get(name, None if dtype is np.float64 else 0) for k in keywords], arrow_type)
+
+    table = pa.table(arrays)
+    with pa_ipc.new_file(str(out_path), table.schema) as writer:
+        writer.write_table(table)
+    return Path(out_path)
+
+
+def convert_json(json_path: Path, out: Optional[Path] = None, fmt: str = 'npy') -> Path:
+    """Convert an ``ads_keywords.json`` file into a columnar store next to it."""
+    json_path = Path(json_path)
+    with open(json_path, 'rb') as f:
+        keywords = orjson.loads(f.read()).get('keywords', [])
+
+    if fmt == 'arrow':
+        return write_keyword_arrow(keywords, out or json_path.parent / ARROW_FILENAME)
+    return write_keyword_columns(keywords, out or json_path.parent / COLUMNS_DIRNAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Convert ads_keywords.json into a columnar keyword store')
+    parser.add_argument('json_path', type=str, help='Path to ads_keywords.json')
+    parser.add_argument('--out', type=str, help='Output path (default: next to the JSON file)')
+    parser.add_argument('--format', choices=['npy', 'arrow'], default='npy', help='Columnar format (default: npy)')
+    args = parser.parse_args()
+
+    out = convert_json(Path(args.json_path), Path(args.out) if args.out else None, args.format)
+    print(f"Wrote {out}")
+
+
+if __name__ == '__main__':
+    main()
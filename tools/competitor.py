@@ -1,4 +1,3 @@
-import orjson
 from pathlib import Path
 from typing import Dict, Any
 
@@ -24,6 +23,7 @@ class CompetitorTool(BaseTool):
         
         Expected context:
         - scenario_dir: Path to scenario data directory
+        - asin: ASIN to serve when scenario_dir is a partitioned dataset
         - flags: Dict that may contain 'break_competitor' for testing
         """
         # Check for error simulation flag
@@ -31,15 +31,8 @@ class CompetitorTool(BaseTool):
         if flags.get('break_competitor', False):
             raise DataMissingError("Simulated competitor data unavailable (test mode)")
         
-        scenario_dir = Path(ctx['scenario_dir'])
-        file_path = scenario_dir / 'competitor.json'
-        
-        if not file_path.exists():
-            raise DataMissingError(f"Competitor file not found: {file_path}")
-        
         # Load raw data
-        with open(file_path, 'rb') as f:
-            raw_data = orjson.loads(f.read())
+        raw_data, source = self.load_data(ctx, 'competitor.json', 'Competitor')
         
         # Extract key metrics
         avg_competitor_price = raw_data.get('avg_competitor_price', 0)
@@ -101,7 +94,7 @@ class CompetitorTool(BaseTool):
             ok=True,
             data=analysis_data,
             meta={
-                'source': str(file_path),
+                'source': source,
                 'competitive_pressure': competitive_pressure,
                 'latency_ms': 0  # Will be set by wrap_call
             }
@@ -0,0 +1,118 @@
+"""
+Partitioned (multi-ASIN) datasets for bulk runs.
+
+A warehouse export directory holds one file per data source covering many ASINs,
+plus a ``manifest.json`` marking it as partitioned. Each file is parsed once per
+process and served as per-ASIN slices from an in-memory index, so a batch does one
+parse per file instead of one per ASIN per tool.
+
+Supported file layouts (any one per file):
+- ``{"partitions": {"<ASIN>": <per-ASIN payload>}}``
+- ``{"records": [{"asin": "<ASIN>", ...}]}`` - one record per ASIN (e.g. inventory)
+- ``{"<key>": [{"asin": "<ASIN>", ...}, ...]}`` - rows grouped per ASIN into ``{"<key>": [...]}``
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from agent.errors import DataMissingError
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class PartitionedDataset:
+    """Lazily parsed, ASIN-indexed view over a partitioned export directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        with open(self.root / MANIFEST_NAME, 'rb') as f:
+            manifest = orjson.loads(f.read())
+        self.partition_key = manifest.get('partition_key', 'asin')
+        self.parse_count = 0
+        self._indexes: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str, asin: str) -> Any:
+        """Return the ASIN's slice of a data file."""
+        partition = self._index(filename).get(asin)
+        if partition is None:
+            raise DataMissingError(f"No {filename} partition for ASIN {asin} in {self.root}")
+        return partition
+
+    def _index(self, filename: str) -> Dict[str, Any]:
+        path = self.root / filename
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise DataMissingError(f"Dataset file not found: {path}")
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._indexes.get(filename)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._indexes.get(filename)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            with open(path, 'rb') as f:
+                raw = orjson.loads(f.read())
+            index = self._build_index(raw)
+            self._indexes[filename] = (version, index)
+            self.parse_count += 1
+            return index
+
+    def _build_index(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Index a parsed export file by partition key."""
+        key = self.partition_key
+
+        if 'partitions' in raw:
+            return dict(raw['partitions'])
+
+        if 'records' in raw:
+            return {record[key]: record for record in raw['records']}
+
+        index: Dict[str, Dict[str, list]] = {}
+        for field, rows in raw.items():
+            if not isinstance(rows, list):
+                continue
+            for row in rows:
+                partition = index.get(row[key])
+                if partition is None:
+                    partition = index[row[key]] = {}
+                partition.setdefault(field, []).append(row)
+        return index
+
+
+_datasets: Dict[str, PartitionedDataset] = {}
+_datasets_lock = threading.Lock()
+
+
+def open_dataset(data_dir: Path) -> Optional[PartitionedDataset]:
+    """Return the shared dataset for a partitioned directory, or None for per-ASIN dirs."""
+    key = str(data_dir)
+    dataset = _datasets.get(key)
+    if dataset is not None:
+        return dataset
+
+    if not (Path(data_dir) / MANIFEST_NAME).exists():
+        return None
+
+    with _datasets_lock:
+        dataset = _datasets.get(key)
+        if dataset is None:
+            dataset = _datasets[key] = PartitionedDataset(Path(data_dir))
+    return dataset
+
+
+def clear_dataset_cache() -> None:
+    """Drop all parsed dataset indexes."""
+    with _datasets_lock:
+        _datasets.clear()
@@ -1,4 +1,3 @@
-import orjson
 from pathlib import Path
 from typing import Dict, Any
 
@@ -24,6 +23,7 @@ class InventoryTool(BaseTool):
         
         Expected context:
         - scenario_dir: Path to scenario data directory
+        - asin: ASIN to serve when scenario_dir is a partitioned dataset
         - flags: Dict that may contain 'break_inventory' for testing
         """
         # Check for test mode break
@@ -31,15 +31,8 @@ class InventoryTool(BaseTool):
         if flags.get('break_inventory', False):
             raise DataMissingError("Simulated inventory data unavailable (test mode)")
         
-        scenario_dir = Path(ctx['scenario_dir'])
-        file_path = scenario_dir / 'inventory.json'
-        
-        if not file_path.exists():
-            raise DataMissingError(f"Inventory file not found: {file_path}")
-        
         # Load raw data
-        with open(file_path, 'rb') as f:
-            raw_data = orjson.loads(f.read())
+        raw_data, source = self.load_data(ctx, 'inventory.json', 'Inventory')
         
         # Calculate derived insights
         days_of_inventory = raw_data.get('days_of_inventory', 0)
@@ -80,7 +73,7 @@ class InventoryTool(BaseTool):
             ok=True,
             data=analysis_data,
             meta={
-                'source': str(file_path),
+                'source': source,
                 'health_status': inventory_health,
                 'latency_ms': 0  # Will be set by wrap_call
             }
@@ -0,0 +1,298 @@
+"""
+Time-partitioned keyword metrics with cumulative daily rollups.
+
+Daily keyword reports are appended one day at a time into ``ads_keywords.daily/``.
+Each day stores the running (prefix) sum of every keyword's additive metrics, so
+any lookback window is the difference of two cumulative snapshots: O(1) in the
+number of days, and appending a day never touches earlier snapshots.
+
+Layout of ``ads_keywords.daily/``:
+- ``meta.json``                       ingested dates (ascending) and keyword count
+- ``keywords.jsonl``                  append-only keyword vocabulary (keyword, match)
+- ``cumulative/<date>.counts.npy``    int64 prefix sums: impressions, clicks, orders, days_active
+- ``cumulative/<date>.amounts.npy``   float64 prefix sums: spend, revenue
+
+Usage:
+    python -m tools.keyword_history append data/ads_keywords.daily 2025-09-10 reports/2025-09-10.json
+    python -m tools.keyword_history ingest data/ads_keywords.daily reports/
+"""
+
+import argparse
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from .columnar import KeywordColumns
+
+HISTORY_DIRNAME = 'ads_keywords.daily'
+
+COUNT_METRICS = ('impressions', 'clicks', 'orders', 'days_active')
+AMOUNT_METRICS = ('spend', 'revenue')
+
+
+class _Subset:
+    """Sequence view selecting rows of another sequence."""
+
+    def __init__(self, values: Sequence[str], rows: np.ndarray):
+        self._values = values
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index: int) -> str:
+        return self._values[int(self._rows[index])]
+
+
+class KeywordHistory:
+    """Append-only daily keyword metrics answering lookback windows from prefix sums."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._meta_path = self.root / 'meta.json'
+        if self._meta_path.exists():
+            with open(self._meta_path, 'rb') as f:
+                meta = orjson.loads(f.read())
+        else:
+            meta = {'dates': [], 'keywords': 0}
+        self.dates: List[str] = meta['dates']
+        self._vocab_size = meta['keywords']
+        self._keywords: Optional[List[str]] = None
+        self._matches: Optional[List[str]] = None
+        self._vocab_bytes = 0
+        self._codes: Optional[Tuple[List[str], np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def append_day(self, day: str, keywords: List[Dict[str, Any]]) -> None:
+        """Add one day of keyword rows (ads_keywords.json shape) on top of the latest snapshot."""
+        day = date.fromisoformat(day).isoformat()
+        with self._lock:
+            if self.dates and day <= self.dates[-1]:
+                raise ValueError(f"Day {day} is not after the last ingested day {self.dates[-1]}")
+
+            vocab_keywords, vocab_matches = self._vocab()
+            index = {(k, m): i for i, (k, m) in enumerate(zip(vocab_keywords, vocab_matches))}
+            new_entries = []
+            rows = np.empty(len(keywords), dtype=np.int64)
+            for i, k in enumerate(keywords):
+                key = (k.get('keyword', ''), k.get('match', ''))
+                position = index.get(key)
+                if position is None:
+                    position = index[key] = len(vocab_keywords)
+                    vocab_keywords.append(key[0])
+                    vocab_matches.append(key[1])
+                    new_entries.append(key)
+                rows[i] = position
+
+            size = len(vocab_keywords)
+            counts, amounts = self._snapshot(len(self.dates) - 1, size)
+            counts = np.array(counts)
+            amounts = np.array(amounts)
+
+            day_counts = np.array(
+                [[k.get('impressions', 0), k.get('clicks', 0), k.get('orders', 0), 0] for k in keywords],
+                dtype=np.int64
+            ).reshape(-1, len(COUNT_METRICS))
+            day_amounts = np.array(
+                [[k.get('spend', 0) or 0, k.get('revenue', 0) or 0] for k in keywords],
+                dtype=np.float64
+            ).reshape(-1, len(AMOUNT_METRICS))
+            np.add.at(counts, rows, day_counts)
+            np.add.at(amounts, rows, day_amounts)
+            # days_active counts each keyword once per day it appears
+            counts[np.unique(rows), COUNT_METRICS.index('days_active')] += 1
+
+            snapshot_dir = self.root / 'cumulative'
+            snapshot_dir.mkdir(parents=True, exist_ok=True)
+            np.save(snapshot_dir / f'{day}.counts.npy', counts)
+            np.save(snapshot_dir / f'{day}.amounts.npy', amounts)
+            if new_entries:
+                lines = b''.join(orjson.dumps({'keyword': k, 'match': m}) + b'\n' for k, m in new_entries)
+                with open(self.root / 'keywords.jsonl', 'ab') as f:
+                    # Drop entries left by an append that never committed, so rows keep their names
+                    f.truncate(self._vocab_bytes)
+                    f.write(lines)
+                self._vocab_bytes += len(lines)
+
+            # meta.json is replaced last: it commits the new day
+            self._codes = None
+            self.dates.append(day)
+            self._vocab_size = size
+            tmp_path = self._meta_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps({'dates': self.dates, 'keywords': size}))
+            os.replace(tmp_path, self._meta_path)
+
+    def window(self, days: int, end: Optional[str] = None) -> Tuple[KeywordColumns, Dict[str, Any]]:
+        """Keyword metrics summed over the ``days`` calendar days ending at ``end`` (default: latest day).
+
+        Returns:
+            Tuple of (columns for keywords active in the window, window description)
+        """
+        if not self.dates:
+            raise ValueError(f"No days ingested in {self.root}")
+        end_pos = bisect_right(self.dates, end or self.dates[-1]) - 1
+        if end_pos < 0:
+            raise ValueError(f"No data on or before {end} in {self.root}")
+
+        end_day = self.dates[end_pos]
+        start_day = (date.fromisoformat(end_day) - timedelta(days=max(days, 1) - 1)).isoformat()
+        before_pos = bisect_left(self.dates, start_day) - 1
+
+        counts, amounts = self._snapshot(end_pos)
+        if before_pos >= 0:
+            prev_counts, prev_amounts = self._snapshot(before_pos, len(counts))
+            counts = counts - prev_counts
+            amounts = amounts - prev_amounts
+
+        active = np.flatnonzero(counts[:, COUNT_METRICS.index('days_active')] > 0)
+        counts = counts[active]
+        amounts = np.round(amounts[active], 2)
+
+        impressions, clicks, orders = (counts[:, COUNT_METRICS.index(m)] for m in ('impressions', 'clicks', 'orders'))
+        spend, revenue = amounts[:, 0], amounts[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns = {
+                'impressions': impressions,
+                'clicks': clicks,
+                'ctr': np.round(np.where(impressions > 0, clicks / impressions, 0.0), 4),
+                'cpc': np.round(np.where(clicks > 0, spend / clicks, 0.0), 2),
+                'spend': spend,
+                'orders': orders,
+                'cvr': np.round(np.where(clicks > 0, orders / clicks, 0.0), 4),
+                'revenue': revenue,
+                'acos': np.round(np.where(revenue > 0, spend / revenue, np.nan), 2),
+            }
+
+        vocab_keywords, _ = self._vocab()
+        match_types, vocab_codes = self._match_codes()
+
+        window = {
+            'start': max(start_day, self.dates[0]),
+            'end': end_day,
+            'days': days,
+            'days_with_data': end_pos - before_pos
+        }
+        columns = KeywordColumns(columns, _Subset(vocab_keywords, active), match_types, vocab_codes[active], str(self.root))
+        return columns, window
+
+    def _snapshot(self, position: int, size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative (counts, amounts) through ``dates[position]``, zero-padded to ``size`` keywords."""
+        if position < 0:
+            counts = np.zeros((0, len(COUNT_METRICS)), dtype=np.int64)
+            amounts = np.zeros((0, len(AMOUNT_METRICS)), dtype=np.float64)
+        else:
+            snapshot_dir = self.root / 'cumulative'
+            day = self.dates[position]
+            counts = np.load(snapshot_dir / f'{day}.counts.npy', mmap_mode='r')
+            amounts = np.load(snapshot_dir / f'{day}.amounts.npy', mmap_mode='r')
+
+        if size is not None and len(counts) < size:
+            pad = size - len(counts)
+            counts = np.concatenate([counts, np.zeros((pad, len(COUNT_METRICS)), dtype=np.int64)])
+            amounts = np.concatenate([amounts, np.zeros((pad, len(AMOUNT_METRICS)), dtype=np.float64)])
+        return counts, amounts
+
+    def _match_codes(self) -> Tuple[List[str], np.ndarray]:
+        """Match-type dictionary and per-keyword codes for the whole vocabulary."""
+        if self._codes is None:
+            _, matches = self._vocab()
+            match_types = sorted(set(matches))
+            match_index = {m: i for i, m in enumerate(match_types)}
+            self._codes = (match_types, np.fromiter((match_index[m] for m in matches), dtype=np.int16, count=len(matches)))
+        return self._codes
+
+    def _vocab(self) -> Tuple[List[str], List[str]]:
+        """Committed vocabulary; also records its byte length in ``keywords.jsonl``."""
+        if self._keywords is None:
+            keywords, matches = [], []
+            size = 0
+            vocab_path = self.root / 'keywords.jsonl'
+            if vocab_path.exists():
+                with open(vocab_path, 'rb') as f:
+                    for line in f:
+                        if len(keywords) == self._vocab_size:
+                            break  # ignore entries from an append that never committed
+                        entry = orjson.loads(line)
+                        keywords.append(entry['keyword'])
+                        matches.append(entry['match'])
+                        size += len(line)
+            self._keywords, self._matches = keywords, matches
+            self._vocab_bytes = size
+        return self._keywords, self._matches
+
+
+def find_keyword_history(data_dir: Path) -> Optional[Path]:
+    """Return the daily keyword store in a data dir, if one has been ingested."""
+    path = Path(data_dir) / HISTORY_DIRNAME
+    return path if (path / 'meta.json').exists() else None
+
+
+_histories: Dict[str, Tuple[int, KeywordHistory]] = {}
+_histories_lock = threading.Lock()
+
+
+def open_keyword_history(path: Path) -> KeywordHistory:
+    """Shared store for a path, reopened when its meta.json changes."""
+    key = str(path)
+    version = os.stat(Path(path) / 'meta.json').st_mtime_ns
+    cached = _histories.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _histories_lock:
+        history = KeywordHistory(Path(path))
+        _histories[key] = (version, history)
+    return history
+
+
+def ingest_directory(history: KeywordHistory, reports_dir: Path) -> List[str]:
+    """Append every ``<YYYY-MM-DD>.json`` report newer than the last ingested day."""
+    ingested = []
+    for report in sorted(Path(reports_dir).glob('*.json')):
+        day = report.stem
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        if history.dates and day <= history.dates[-1]:
+            continue
+        with open(report, 'rb') as f:
+            history.append_day(day, orjson.loads(f.read()).get('keywords', []))
+        ingested.append(day)
+    return ingested
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Maintain a daily keyword metrics store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append = subparsers.add_parser('append', help='Append one day of keyword metrics')
+    append.add_argument('store', type=str, help='Store directory (e.g. data/ads_keywords.daily)')
+    append.add_argument('day', type=str, help='Report date (YYYY-MM-DD)')
+    append.add_argument('report', type=str, help='Keyword report in ads_keywords.json format')
+
+    ingest = subparsers.add_parser('ingest', help='Append all new <YYYY-MM-DD>.json reports from a directory')
+    ingest.add_argument('store', type=str, help='Store directory (e.g. data/ads_keywords.daily)')
+    ingest.add_argument('reports_dir', type=str, help='Directory of daily keyword reports')
+
+    args = parser.parse_args()
+    history = KeywordHistory(Path(args.store))
+
+    if args.command == 'append':
+        with open(args.report, 'rb') as f:
+            history.append_day(args.day, orjson.loads(f.read()).get('keywords', []))
+        print(f"Appended {args.day} to {args.store}")
+    else:
+        ingested = ingest_directory(history, Path(args.reports_dir))
+        print(f"Appended {len(ingested)} day(s) to {args.store}" + (f": {ingested[0]} .. {ingested[-1]}" if ingested else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,3 @@
-import orjson
 from pathlib import Path
 from typing import Dict, Any
 
@@ -24,6 +23,7 @@ class ListingAuditTool(BaseTool):
         
         Expected context:
         - scenario_dir: Path to scenario data directory
+        - asin: ASIN to serve when scenario_dir is a partitioned dataset
         - flags: Dict that may contain 'break_audit' for testing
         """
         # Check for test mode break
@@ -31,15 +31,8 @@ class ListingAuditTool(BaseTool):
         if flags.get('break_audit', False):
             raise DataMissingError("Simulated audit data unavailable (test mode)")
         
-        scenario_dir = Path(ctx['scenario_dir'])
-        file_path = scenario_dir / 'listing_audit.json'
-        
-        if not file_path.exists():
-            raise DataMissingError(f"Listing audit file not found: {file_path}")
-        
         # Load raw data
-        with open(file_path, 'rb') as f:
-            raw_data = orjson.loads(f.read())
+        raw_data, source = self.load_data(ctx, 'listing_audit.json', 'Listing audit')
         
         # Extract key metrics
         title_kws_coverage = raw_data.get('title_kws_coverage', 0)
@@ -118,7 +111,7 @@ class ListingAuditTool(BaseTool):
             ok=True,
             data=analysis_data,
             meta={
-                'source': str(file_path),
+                'source': source,
                 'quality_grade': self._get_quality_grade(overall_score),
                 'latency_ms': 0  # Will be set by wrap_call
             }
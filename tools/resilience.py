@@ -0,0 +1,195 @@
+"""
+Retry policy and per-tool circuit breakers for ``wrap_call``.
+
+Failures are classified before they are retried. Deterministic errors
+(missing or unreadable data, bad input, programming errors) fail on the first
+attempt because retrying cannot change the outcome. Timeouts, connection
+errors and unknown exceptions are retried with full-jitter exponential backoff.
+
+Each tool name has one process-wide ``CircuitBreaker``, shared by every loop and
+thread. After ``threshold`` consecutive calls that failed with a retryable
+error, the breaker opens and calls fail fast without touching the tool. After
+``reset_s`` it lets a single probe call through (half-open). The probe either
+closes the breaker or reopens it. Permanent errors never count towards the
+threshold: a missing file says nothing about the next ASIN's data.
+
+Configuration comes from the environment, like ``TOOL_TIMEOUT_S``:
+``TOOL_MAX_ATTEMPTS`` (2), ``TOOL_BACKOFF_BASE_S`` (0.5), ``TOOL_BACKOFF_MAX_S``
+(5), ``TOOL_BREAKER_THRESHOLD`` (5, 0 disables breakers) and
+``TOOL_BREAKER_RESET_S`` (30).
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from agent import metrics
+from agent.errors import ConflictError, DataMissingError
+
+# Errors that fail the same way on every attempt
+PERMANENT_ERRORS = (
+    DataMissingError, ConflictError, FileNotFoundError, IsADirectoryError, NotADirectoryError, PermissionError,
+    ValueError, KeyError, IndexError, TypeError, AttributeError, ImportError, NotImplementedError,
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether another attempt could succeed; an explicit ``retryable`` attribute wins."""
+    retryable = getattr(error, 'retryable', None)
+    if retryable is not None:
+        return bool(retryable)
+    # FileNotFoundError and friends are OSErrors too, so check the permanent list first
+    return not isinstance(error, PERMANENT_ERRORS)
+
+
+def full_jitter(attempt: int, base_s: float, max_s: float) -> float:
+    """Full-jitter exponential backoff before retry ``attempt + 1``: uniform in [0, min(max_s, base_s * 2**attempt)]."""
+    return random.uniform(0, min(max_s, base_s * 2 ** attempt))
+
+
+class RetryPolicy:
+    """How many times to attempt a tool call and how long to wait in between."""
+
+    def __init__(self, max_attempts: int = 2, backoff_base_s: float = 0.5, backoff_max_s: float = 5.0):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        return cls(
+            max_attempts=int(os.getenv('TOOL_MAX_ATTEMPTS', 2)),
+            backoff_base_s=float(os.getenv('TOOL_BACKOFF_BASE_S', 0.5)),
+            backoff_max_s=float(os.getenv('TOOL_BACKOFF_MAX_S', 5.0))
+        )
+
+    def delay(self, attempt: int) -> float:
+        return full_jitter(attempt, self.backoff_base_s, self.backoff_max_s)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open after ``threshold`` failures → half-open probe after ``reset_s``."""
+
+    def __init__(self, name: str, threshold: int = 5, reset_s: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_s:
+                return HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        with self._lock:
+            return max(0.0, self._opened_at + self.reset_s - self._clock()) if self._state == OPEN else 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; in half-open state only one probe at a time is let through."""
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_s:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self, retryable: bool) -> None:
+        """Count a failed call; permanent failures close a half-open probe without tripping the breaker."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            was_probe = self._probing
+            self._probing = False
+            if not retryable:
+                # The tool responded; the input was the problem
+                self._failures = 0
+                if was_probe:
+                    self._transition(CLOSED)
+                return
+            self._failures += 1
+            if was_probe or (self._state == CLOSED and self._failures >= self.threshold):
+                self._opened_at = self._clock()
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a half-open probe whose call ended without an outcome (e.g. it was interrupted)."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        metrics.tool_breaker_transitions.inc(self.name, state)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(tool_name: str) -> CircuitBreaker:
+    """The process-wide breaker for a tool, created from the environment on first use."""
+    breaker = _breakers.get(tool_name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(tool_name)
+            if breaker is None:
+                breaker = _breakers[tool_name] = CircuitBreaker(
+                    tool_name,
+                    threshold=int(os.getenv('TOOL_BREAKER_THRESHOLD', 5)),
+                    reset_s=float(os.getenv('TOOL_BREAKER_RESET_S', 30))
+                )
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current state of every breaker created so far, by tool name."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
+
+
+def reset_breakers(tool_name: Optional[str] = None) -> None:
+    """Close one tool's breaker, or all of them."""
+    with _breakers_lock:
+        breakers = [_breakers[tool_name]] if tool_name in _breakers else ([] if tool_name else list(_breakers.values()))
+    for breaker in breakers:
+        breaker.reset()